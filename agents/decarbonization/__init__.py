@@ -8,4 +8,8 @@ Phases:
   2. Diagnostic Agent — Source identification and prioritisation
   3. Pathway Agent — SBTi-aligned decarbonisation pathway
   4. Financial Agent — MACC curves and business case
+
+The inventory models and scalar ``EmissionsEngine`` are pure Python; the
+columnar and vectorised engines and the Phase 2-4 agents require NumPy
+(``requirements.txt``).
 """
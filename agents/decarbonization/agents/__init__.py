@@ -1,16 +1,27 @@
 """Decarbonization AI Agents — Phases 2, 3, 4."""
 
+from .category_classifier import CategoryClassifier, CategoryProfile, classify
 from .diagnostic_agent import DiagnosticAgent, DiagnosticInput, DiagnosticOutput
 from .pathway_agent import PathwayAgent, PathwayOutput
 from .financial_agent import FinancialAgent, FinancialOutput, MeasureEconomics
+from .measure_catalog import MeasureCatalog, MeasureTemplate
+from .portfolio import PortfolioReport, PortfolioResult, PortfolioRunner
 
 __all__ = [
+    "CategoryClassifier",
+    "CategoryProfile",
     "DiagnosticAgent",
     "DiagnosticInput",
     "DiagnosticOutput",
     "FinancialAgent",
     "FinancialOutput",
+    "MeasureCatalog",
     "MeasureEconomics",
+    "MeasureTemplate",
     "PathwayAgent",
     "PathwayOutput",
+    "PortfolioReport",
+    "PortfolioResult",
+    "PortfolioRunner",
+    "classify",
 ]
@@ -0,0 +1,124 @@
+"""
+Clasificador de Categorías de Fuente
+====================================
+Maps a source ``categoria`` string to the profile the diagnostic and pathway
+agents and the BAU forecast derive from it: lever family, time horizon,
+reduction potential, technical feasibility, the pathway decision rule and
+the BAU growth drivers.
+
+Each attribute keeps its own keyword precedence (e.g. "gas" sets the
+potential but not the feasibility), so the table below reproduces the
+original per-helper substring checks exactly. All keywords are found in one
+pass of a compiled multi-pattern regex, and the resulting profile is cached
+per distinct category string.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Optional, Sequence, TypeVar
+
+from ..models.inventory import TimeHorizon
+
+T = TypeVar("T")
+Rules = Sequence[tuple[frozenset[str], T]]
+
+# (keywords, value) in order of precedence; the first rule with any keyword wins.
+FAMILIA_RULES: Rules[str] = (
+    (frozenset({"electricidad", "grid"}), "electricidad"),
+    (frozenset({"caldera", "gas", "termico"}), "termico"),
+    (frozenset({"vehiculo", "transporte", "flota"}), "transporte"),
+    (frozenset({"refrigeracion", "fugitivas"}), "refrigerante"),
+)
+HORIZONTE_RULES: Rules[TimeHorizon] = (
+    (frozenset({"electricidad", "grid", "iluminacion"}), TimeHorizon.SHORT),
+    (frozenset({"caldera", "transporte", "flota"}), TimeHorizon.MEDIUM),
+)
+POTENCIAL_RULES: Rules[float] = (
+    (frozenset({"electricidad", "grid"}), 0.90),  # up to 90% with full renewables
+    (frozenset({"caldera", "gas"}), 0.60),
+    (frozenset({"vehiculo", "transporte"}), 0.50),
+)
+VIABILIDAD_RULES: Rules[str] = (
+    (frozenset({"electricidad", "grid"}), "alta"),
+    (frozenset({"caldera", "transporte"}), "media"),
+)
+REGLA_RULES: Rules[str] = (
+    (frozenset({"electricidad", "grid", "comprada", "red"}), "electricidad"),
+    (frozenset({"gas", "caldera", "termico", "combustion"}), "gas_natural"),
+    (frozenset({"transporte", "vehiculo", "flota", "logistica"}), "transporte"),
+)
+# (activity driver, intensity driver) of the BAU forecast
+DRIVERS_BAU_RULES: Rules[tuple[str, str]] = (
+    (frozenset({"electricidad", "grid", "comprada"}), ("produccion", "red")),
+    (frozenset({"gas", "caldera", "termico", "combustion", "diesel", "transporte", "flota", "vehiculo"}),
+     ("produccion", "combustible")),
+    (frozenset({"oficina", "viaje", "desplazamiento"}), ("plantilla", "ninguna")),
+    (frozenset({"refrigera", "fugitiva"}), ("constante", "ninguna")),
+)
+
+
+@dataclass(frozen=True)
+class CategoryProfile:
+    """Everything the agents derive from one source category."""
+    familia: str                 # lever family: electricidad, termico, transporte, refrigerante, otros
+    horizonte: TimeHorizon
+    potencial_pct: float         # share of current emissions that can be reduced
+    viabilidad: str              # "alta" | "media" | "baja"
+    regla: Optional[str]         # pathway decision rule; None -> generic
+    drivers_bau: tuple[str, str]  # BAU (activity, intensity) drivers
+
+
+class CategoryClassifier:
+    """Compiled keyword matcher with a per-category profile cache."""
+
+    def __init__(self):
+        self._rules = (
+            FAMILIA_RULES, HORIZONTE_RULES, POTENCIAL_RULES, VIABILIDAD_RULES, REGLA_RULES, DRIVERS_BAU_RULES,
+        )
+        keywords = sorted({k for rules in self._rules for keys, _ in rules for k in keys}, key=lambda k: (-len(k), k))
+        # Only the longest keyword matches at each position; the keywords it
+        # starts with (e.g. "refrigera" in "refrigeracion") are added back.
+        self._pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))")
+        self._prefixes = {b: frozenset(a for a in keywords if b.startswith(a)) for b in keywords}
+        self._cache: dict[str, CategoryProfile] = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def keywords(self, categoria: str) -> frozenset[str]:
+        """Keywords contained in ``categoria`` (case-insensitive)."""
+        found: set[str] = set()
+        for m in self._pattern.finditer(categoria.lower()):
+            found |= self._prefixes[m.group(1)]
+        return frozenset(found)
+
+    def classify(self, categoria: str) -> CategoryProfile:
+        profile = self._cache.get(categoria)
+        if profile is None:
+            found = self.keywords(categoria)
+            profile = self._cache[categoria] = CategoryProfile(
+                familia=_first(FAMILIA_RULES, found, "otros"),
+                horizonte=_first(HORIZONTE_RULES, found, TimeHorizon.LONG),
+                potencial_pct=_first(POTENCIAL_RULES, found, 0.30),
+                viabilidad=_first(VIABILIDAD_RULES, found, "baja"),
+                regla=_first(REGLA_RULES, found, None),
+                drivers_bau=_first(DRIVERS_BAU_RULES, found, ("produccion", "ninguna")),
+            )
+        return profile
+
+
+def _first(rules: Rules[T], found: frozenset[str], default: T) -> T:
+    for keys, value in rules:
+        if keys & found:
+            return value
+    return default
+
+
+DEFAULT_CLASSIFIER = CategoryClassifier()
+
+
+def classify(categoria: str) -> CategoryProfile:
+    """Profile of ``categoria`` from the shared ``DEFAULT_CLASSIFIER``."""
+    return DEFAULT_CLASSIFIER.classify(categoria)
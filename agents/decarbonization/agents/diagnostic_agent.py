@@ -9,7 +9,9 @@ Outputs: Top 3-5 priority sources, scope assignment, preliminary targets, timeli
 
 from __future__ import annotations
 
+import heapq
 from dataclasses import dataclass, field
+from operator import itemgetter
 
 from ..models.inventory import (
     DecarbonizationTarget,
@@ -19,6 +21,31 @@ from ..models.inventory import (
     Scope,
     TimeHorizon,
 )
+from .category_classifier import classify
+
+# Alternatives suggested for each lever family of ``CategoryProfile``.
+ALTERNATIVAS_POR_FAMILIA: dict[str, tuple[str, ...]] = {
+    "electricidad": (
+        "Contrato PPA de energía renovable",
+        "Instalación de autoconsumo fotovoltaico",
+        "Mejora de eficiencia energética en iluminación y climatización",
+    ),
+    "termico": (
+        "Electrificación de calderas (bomba de calor industrial)",
+        "Mejora de eficiencia térmica (aislamiento, recuperación de calor)",
+        "Sustitución por biogás o hidrógeno verde",
+    ),
+    "transporte": (
+        "Electrificación de flota (BEV)",
+        "Optimización de rutas y conducción eficiente",
+        "Combustibles alternativos (HVO, biocombustibles)",
+    ),
+    "refrigerante": (
+        "Sustitución de refrigerantes de alto GWP",
+        "Mejora de estanqueidad y mantenimiento preventivo",
+    ),
+    "otros": ("Auditoría energética específica requerida",),
+}
 
 
 @dataclass
@@ -69,6 +96,8 @@ class DiagnosticAgent:
     """
 
     COVERAGE_THRESHOLD = 0.80  # target 80% of emissions
+    MIN_PRIORITY_SOURCES = 3
+    MAX_PRIORITY_SOURCES = 5
 
     def run(
         self,
@@ -93,20 +122,16 @@ class DiagnosticAgent:
                 continue
             source_totals[r.source_id] = source_totals.get(r.source_id, 0.0) + r.tCO2e
 
-        # Sort descending
-        ranked = sorted(source_totals.items(), key=lambda x: x[1], reverse=True)
-
         # --- Select top sources covering ~80% ---
         source_map = {s.id: s for s in sources}
+        ranked = self._rank_known(source_totals, source_map)
         priority_sources: list[PrioritySource] = []
         accumulated = 0.0
 
         for src_id, tco2e in ranked:
-            if accumulated / total >= self.COVERAGE_THRESHOLD and len(priority_sources) >= 3:
+            if accumulated / total >= self.COVERAGE_THRESHOLD and len(priority_sources) >= self.MIN_PRIORITY_SOURCES:
                 break
-            src = source_map.get(src_id)
-            if src is None:
-                continue
+            src = source_map[src_id]
 
             pct = tco2e / total * 100
             alternatives = self._suggest_alternatives(src, di)
@@ -125,7 +150,7 @@ class DiagnosticAgent:
             ))
             accumulated += tco2e
 
-            if len(priority_sources) >= 5:
+            if len(priority_sources) >= self.MAX_PRIORITY_SOURCES:
                 break
 
         # --- Preliminary reduction target ---
@@ -149,67 +174,40 @@ class DiagnosticAgent:
 
     # --- Private helpers ---
 
+    def _rank_known(
+        self,
+        source_totals: dict[str, float],
+        source_map: dict[str, EmissionSource],
+    ) -> list[tuple[str, float]]:
+        """Largest ``MAX_PRIORITY_SOURCES`` totals of known sources, descending,
+        ties in first-seen order (same as a stable full sort).
+
+        A bounded heap replaces the full sort; it only widens when results
+        without a matching source crowd the top.
+        """
+        k = self.MAX_PRIORITY_SOURCES
+        while True:
+            top = heapq.nlargest(k, source_totals.items(), key=itemgetter(1))
+            known = [item for item in top if item[0] in source_map]
+            if len(known) >= self.MAX_PRIORITY_SOURCES or k >= len(source_totals):
+                return known[:self.MAX_PRIORITY_SOURCES]
+            k *= 4
+
     def _suggest_alternatives(
         self, source: EmissionSource, di: DiagnosticInput
     ) -> list[str]:
-        cat = source.categoria.lower()
-        alternatives: list[str] = []
-
-        if "electricidad" in cat or "grid" in cat:
-            alternatives.extend([
-                "Contrato PPA de energía renovable",
-                "Instalación de autoconsumo fotovoltaico",
-                "Mejora de eficiencia energética en iluminación y climatización",
-            ])
-        elif "caldera" in cat or "gas" in cat or "termico" in cat:
-            alternatives.extend([
-                "Electrificación de calderas (bomba de calor industrial)",
-                "Mejora de eficiencia térmica (aislamiento, recuperación de calor)",
-                "Sustitución por biogás o hidrógeno verde",
-            ])
-        elif "vehiculo" in cat or "transporte" in cat or "flota" in cat:
-            alternatives.extend([
-                "Electrificación de flota (BEV)",
-                "Optimización de rutas y conducción eficiente",
-                "Combustibles alternativos (HVO, biocombustibles)",
-            ])
-        elif "refrigeracion" in cat or "fugitivas" in cat:
-            alternatives.extend([
-                "Sustitución de refrigerantes de alto GWP",
-                "Mejora de estanqueidad y mantenimiento preventivo",
-            ])
-        else:
-            alternatives.append("Auditoría energética específica requerida")
-
-        return alternatives
+        return list(ALTERNATIVAS_POR_FAMILIA[classify(source.categoria).familia])
 
     def _estimate_horizon(self, source: EmissionSource) -> TimeHorizon:
-        cat = source.categoria.lower()
-        if any(k in cat for k in ["electricidad", "grid", "iluminacion"]):
-            return TimeHorizon.SHORT
-        if any(k in cat for k in ["caldera", "transporte", "flota"]):
-            return TimeHorizon.MEDIUM
-        return TimeHorizon.LONG
+        return classify(source.categoria).horizonte
 
     def _estimate_reduction_potential(
         self, source: EmissionSource, current_tCO2e: float
     ) -> float:
-        cat = source.categoria.lower()
-        if "electricidad" in cat or "grid" in cat:
-            return current_tCO2e * 0.90  # up to 90% with full renewables
-        if "caldera" in cat or "gas" in cat:
-            return current_tCO2e * 0.60
-        if "vehiculo" in cat or "transporte" in cat:
-            return current_tCO2e * 0.50
-        return current_tCO2e * 0.30
+        return current_tCO2e * classify(source.categoria).potencial_pct
 
     def _assess_feasibility(self, source: EmissionSource) -> str:
-        cat = source.categoria.lower()
-        if "electricidad" in cat or "grid" in cat:
-            return "alta"
-        if "caldera" in cat or "transporte" in cat:
-            return "media"
-        return "baja"
+        return classify(source.categoria).viabilidad
 
     def _build_trajectory(
         self,
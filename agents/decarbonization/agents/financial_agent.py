@@ -14,17 +14,31 @@ Flow:
     4. Calcular MACC — Cost per tonne abated.
     5. Ordenar — Rank by MACC (negative first = cost-saving).
     6. Generar Roadmap — Build abatement curve + implementation schedule.
+
+Measures on the same source are applied in standalone MACC order to the
+source's residual emissions (multiplicative ``StackingEngine`` by default)
+and re-ranked; ``apilar=False`` adds their standalone reductions instead.
+
+With a ``DCFEngine`` the agent also computes NPV, IRR and discounted payback
+(``models.dcf``) and a discounted MACC curve next to the undiscounted one:
+
+    MACC_VAN = -VAN / tCO2e_evitadas_acumuladas
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
 
 from ..models.inventory import (
     EconomicVariables,
     ReductionMeasure,
     TimeHorizon,
 )
+from ..models.dcf import DCFEngine, DCFResult
+from ..models.stacking import StackingEngine
 from .pathway_agent import PathwayOutput
 
 
@@ -48,6 +62,11 @@ class MACCEntry:
     # Metadata
     horizonte: TimeHorizon
     palanca: str
+    # Discounted cash flow (DCF mode only)
+    van_eur: Optional[float] = None
+    macc_descontado_eur_per_tCO2e: Optional[float] = None
+    tir_pct: Optional[float] = None
+    payback_descontado_anios: Optional[float] = None
 
 
 @dataclass
@@ -56,6 +75,7 @@ class FinancialOutput:
     ranking: list[MACCEntry]
     curva_macc: list[dict]  # [{x_start, x_end, y, label}, ...]
     roadmap: list[dict]     # [{year, measures, investment, reduction}, ...]
+    curva_macc_descontada: list[dict] = field(default_factory=list)  # DCF mode, same layout
     # Aggregates
     reduccion_total_tCO2e: float = 0.0
     inversion_total_eur: float = 0.0
@@ -76,8 +96,23 @@ class FinancialAgent:
 
     Takes the pathway alternatives and economic data, computes the MACC curve,
     and generates a prioritised roadmap.
+
+    Args:
+        apilamiento: stacking of measures on the same source
+            (multiplicative by default).
+        dcf: optional discounted cash-flow engine.
+        apilar: ``False`` adds standalone reductions without stacking.
     """
 
+    def __init__(
+        self,
+        apilamiento: Optional[StackingEngine] = None,
+        dcf: Optional[DCFEngine] = None,
+        apilar: bool = True,
+    ):
+        self.apilamiento = (apilamiento or StackingEngine()) if apilar else None
+        self.dcf = dcf
+
     def run(
         self,
         pathway: PathwayOutput,
@@ -86,6 +121,7 @@ class FinancialAgent:
 
         econ_map = {e.measure_id: e for e in economics}
         entries: list[MACCEntry] = []
+        anuales = self._annual_reductions(pathway, econ_map)
 
         # --- Steps 1-4: Vincular, Estimar, Análisis Económico, Calcular MACC ---
         for measure in pathway.medidas:
@@ -94,7 +130,7 @@ class FinancialAgent:
                 continue
 
             # Step 2: tCO2e evitadas
-            tCO2e_anuales = measure.reduccion_estimada_tCO2e
+            tCO2e_anuales = anuales[measure.id]
             tCO2e_acumuladas = tCO2e_anuales * measure.vida_util_anios
 
             # Step 3: Coste Neto = CAPEX - (Ahorro_Operativo_Anual * Vida_Util)
@@ -119,6 +155,14 @@ class FinancialAgent:
                 palanca=measure.tipo.value,
             ))
 
+        # --- Discounted cash flows of every measure in one pass ---
+        curva_descontada: list[dict] = []
+        if self.dcf is not None and entries:
+            self._apply_dcf(entries, econ_map)
+            curva_descontada = self._build_macc_curve(
+                sorted(entries, key=lambda e: e.macc_descontado_eur_per_tCO2e), descontada=True,
+            )
+
         # --- Step 5: Ordenar (MACC negativo primero) ---
         entries.sort(key=lambda e: e.macc_eur_per_tCO2e)
 
@@ -140,22 +184,67 @@ class FinancialAgent:
             ranking=entries,
             curva_macc=curva_macc,
             roadmap=roadmap,
+            curva_macc_descontada=curva_descontada,
             reduccion_total_tCO2e=round(reduccion_total, 1),
             inversion_total_eur=round(inversion_total, 2),
             coste_medio_eur_per_tCO2e=round(coste_medio, 2),
             resumen=self._generate_summary(entries, reduccion_total, inversion_total, coste_medio),
         )
 
+    # ------------------------------------------------------------------
+    # Measure interaction
+    # ------------------------------------------------------------------
+
+    def _annual_reductions(
+        self,
+        pathway: PathwayOutput,
+        econ_map: dict[str, MeasureEconomics],
+    ) -> dict[str, float]:
+        """Annual tCO2e per measure id: standalone, or stacked in MACC order."""
+        if self.apilamiento is None or not pathway.emisiones_fuente:
+            return {m.id: m.reduccion_estimada_tCO2e for m in pathway.medidas}
+
+        def standalone_macc(m: ReductionMeasure) -> float:
+            econ = econ_map.get(m.id)
+            acumuladas = m.reduccion_estimada_tCO2e * m.vida_util_anios
+            if econ is None or acumuladas <= 0:
+                return float("inf")
+            return (econ.capex_eur - econ.ahorro_operativo_anual_eur * m.vida_util_anios) / acumuladas
+
+        ordered = sorted(pathway.medidas, key=standalone_macc)
+        return self.apilamiento.stack_measures(ordered, pathway.emisiones_fuente)
+
+    def _apply_dcf(self, entries: list[MACCEntry], econ_map: dict[str, MeasureEconomics]) -> None:
+        """Fill the DCF fields of every entry from one vectorised evaluation."""
+        econ = [econ_map[e.measure_id] for e in entries]
+        result: DCFResult = self.dcf.evaluate(
+            np.array([x.capex_eur for x in econ]),
+            np.array([x.ahorro_operativo_anual_eur for x in econ]),
+            np.array([e.vida_util_anios for e in entries]),
+            np.array([e.tCO2e_evitadas_anuales for e in entries]),
+        )
+        for entry, van, macc, tir, payback in zip(
+            entries,
+            result.van_eur.tolist(),
+            result.macc_eur_per_tCO2e.tolist(),
+            result.tir_pct.tolist(),
+            result.payback_descontado_anios.tolist(),
+        ):
+            entry.van_eur = round(van, 2)
+            entry.macc_descontado_eur_per_tCO2e = round(macc, 2)
+            entry.tir_pct = None if np.isnan(tir) else round(tir, 2)
+            entry.payback_descontado_anios = round(payback, 2)
+
     # ------------------------------------------------------------------
     # MACC Curve construction
     # ------------------------------------------------------------------
 
-    def _build_macc_curve(self, entries: list[MACCEntry]) -> list[dict]:
+    def _build_macc_curve(self, entries: list[MACCEntry], descontada: bool = False) -> list[dict]:
         """Build coordinate pairs for plotting the MACC curve.
 
         Each bar:
             x_start, x_end = cumulative tCO2e range
-            y = MACC (€/tCO2e)
+            y = MACC (€/tCO2e), or the NPV-based MACC if ``descontada``
         """
         curve: list[dict] = []
         cumulative = 0.0
@@ -170,7 +259,7 @@ class FinancialAgent:
                 "label": entry.nombre,
                 "x_start": round(x_start, 1),
                 "x_end": round(x_end, 1),
-                "y": entry.macc_eur_per_tCO2e,
+                "y": entry.macc_descontado_eur_per_tCO2e if descontada else entry.macc_eur_per_tCO2e,
                 "horizonte": entry.horizonte.value,
             })
             cumulative = x_end
@@ -220,6 +309,7 @@ class FinancialAgent:
                 capex_eur=e.capex_eur,
                 opex_diferencial_eur=e.ahorro_operativo_anual_eur,
                 macc_eur_per_tCO2e=e.macc_eur_per_tCO2e,
+                payback_descontado_anios=e.payback_descontado_anios,
             )
             ev.compute_payback()
             variables.append(ev)
@@ -265,4 +355,8 @@ class FinancialAgent:
                     f"({e.tCO2e_evitadas_anuales:.0f} tCO2e/año)"
                 )
 
+        if self.dcf is not None and entries:
+            van_total = sum(e.van_eur for e in entries)
+            lines.append(f"VAN total (descuento {self.dcf.supuestos.tasa_descuento_pct:g} %): {van_total:+,.0f} €")
+
         return "\n".join(lines)
@@ -0,0 +1,169 @@
+"""
+Catálogo de Medidas
+===================
+Declarative measure templates for the pathway decision rules.
+
+The catalog (``data/measure_catalog.json``) lists templates with the
+decision rule they belong to (``CategoryProfile.regla``, or ``"generica"``),
+their lever, horizon, useful life and the fraction of the source's emissions
+they avoid. Optional ``sectores`` / ``paises`` / ``scopes`` restrict where a
+template applies.
+
+At load time templates are compiled into an index per rule (ordered by
+priority) and a NumPy column of their fractions. Each (regla, sector, país, scope)
+key resolves once to a block of template positions, kept in a dispatch
+table. Expanding thousands of priority sources is then a lookup per source
+and one vectorised product for ``reduccion_estimada_tCO2e``; dataclasses are
+only built on request.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ..models.inventory import ReductionLever, ReductionMeasure, Scope, TimeHorizon
+
+DEFAULT_CATALOG = Path(__file__).with_name("data") / "measure_catalog.json"
+GENERIC_RULE = "generica"
+
+
+@dataclass(frozen=True)
+class MeasureTemplate:
+    """One reduction measure template of the catalog."""
+    regla: str
+    prioridad: int
+    palanca: ReductionLever
+    medida: str
+    fraccion: float                     # share of the source's tCO2e avoided
+    horizonte: TimeHorizon
+    vida_util_anios: int = 10
+    sectores: frozenset[str] = frozenset()   # empty -> any
+    paises: frozenset[str] = frozenset()
+    scopes: frozenset[int] = frozenset()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> MeasureTemplate:
+        return cls(
+            regla=data["regla"],
+            prioridad=int(data["prioridad"]),
+            palanca=ReductionLever(data["palanca"]),
+            medida=data["medida"],
+            fraccion=float(data["fraccion"]),
+            horizonte=TimeHorizon(data["horizonte"]),
+            vida_util_anios=int(data.get("vida_util_anios", 10)),
+            sectores=frozenset(data.get("sectores", ())),
+            paises=frozenset(data.get("paises", ())),
+            scopes=frozenset(int(s) for s in data.get("scopes", ())),
+        )
+
+    def applies(self, sector: Optional[str], pais: Optional[str], scope: Optional[int]) -> bool:
+        return (
+            (not self.sectores or sector in self.sectores)
+            and (not self.paises or pais in self.paises)
+            and (not self.scopes or scope in self.scopes)
+        )
+
+
+@dataclass
+class AlternativeTable:
+    """Columnar expansion: one row per (source, applicable template)."""
+    fila: np.ndarray              # position of the source in the input
+    plantilla: np.ndarray         # template position in the catalog
+    reduccion_tCO2e: np.ndarray   # rounded to 0.1 t, as in the agent output
+
+    def __len__(self) -> int:
+        return len(self.fila)
+
+
+class MeasureCatalog:
+    """Compiled measure templates with a memoised dispatch table."""
+
+    def __init__(self, plantillas: Sequence[MeasureTemplate]):
+        self.plantillas = list(plantillas)
+        self.fraccion = np.array([t.fraccion for t in self.plantillas], dtype=np.float64)
+        self._by_rule: dict[str, list[int]] = {}
+        for pos in sorted(range(len(self.plantillas)), key=lambda i: self.plantillas[i].prioridad):
+            self._by_rule.setdefault(self.plantillas[pos].regla, []).append(pos)
+        self._dispatch: dict[tuple, int] = {}
+        self._blocks: list[np.ndarray] = []
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_CATALOG) -> MeasureCatalog:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        return cls([MeasureTemplate.from_dict(t) for t in data["plantillas"]])
+
+    def __len__(self) -> int:
+        return len(self.plantillas)
+
+    @property
+    def reglas(self) -> list[str]:
+        return list(self._by_rule)
+
+    def block(
+        self,
+        regla: Optional[str],
+        sector: Optional[str] = None,
+        pais: Optional[str] = None,
+        scope: Optional[int] = None,
+    ) -> int:
+        """Dispatch-table entry for a key; unknown rules use ``"generica"``."""
+        key = (regla, sector, pais, scope)
+        pos = self._dispatch.get(key)
+        if pos is None:
+            candidates = self._by_rule.get(regla) or self._by_rule.get(GENERIC_RULE, [])
+            self._blocks.append(np.array(
+                [i for i in candidates if self.plantillas[i].applies(sector, pais, scope)], dtype=np.int64,
+            ))
+            pos = self._dispatch[key] = len(self._blocks) - 1
+        return pos
+
+    def templates(self, block: int) -> list[MeasureTemplate]:
+        return [self.plantillas[i] for i in self._blocks[block]]
+
+    def expand(self, bloques: np.ndarray, base_tCO2e: np.ndarray) -> AlternativeTable:
+        """Alternatives of every source given its block and tCO2e."""
+        bloques = np.asarray(bloques, dtype=np.int64)
+        sizes = np.array([len(b) for b in self._blocks], dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1])) if len(sizes) else sizes
+        flat = np.concatenate(self._blocks) if self._blocks else np.zeros(0, dtype=np.int64)
+
+        counts = sizes[bloques]
+        fila = np.repeat(np.arange(len(bloques)), counts)
+        offset = np.arange(len(fila)) - np.repeat(np.cumsum(counts) - counts, counts)
+        plantilla = flat[np.repeat(starts[bloques], counts) + offset]
+        reduccion = _round_tenths(np.asarray(base_tCO2e, dtype=np.float64)[fila] * self.fraccion[plantilla])
+        return AlternativeTable(fila=fila, plantilla=plantilla, reduccion_tCO2e=reduccion)
+
+    def measure(self, plantilla: int, source_id: str, scope: Scope, reduccion_tCO2e: float) -> ReductionMeasure:
+        t = self.plantillas[plantilla]
+        return ReductionMeasure(
+            id="", nombre=t.medida, descripcion=t.medida,
+            tipo=t.palanca, scope_aplicable=scope,
+            source_id=source_id,
+            reduccion_estimada_tCO2e=reduccion_tCO2e,
+            horizonte=t.horizonte, vida_util_anios=t.vida_util_anios,
+        )
+
+
+def _round_tenths(values: np.ndarray) -> np.ndarray:
+    """Elementwise ``round(v, 1)`` with Python's semantics.
+
+    ``np.round`` rounds the float ``v * 10``, which can land on (or off) an
+    exact half; those near-tie elements are rounded by Python instead.
+    """
+    scaled = values * 10.0
+    out = np.rint(scaled) / 10.0
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-9 * np.maximum(np.abs(scaled), 1.0)
+    idx = np.flatnonzero(near_half)
+    if idx.size:
+        out[idx] = [round(v, 1) for v in values[idx].tolist()]
+    return out
+
+
+DEFAULT_MEASURES = MeasureCatalog.load()
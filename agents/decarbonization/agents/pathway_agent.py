@@ -8,12 +8,22 @@ Decision Rules (IF/THEN):
   - IF combustión gas natural  → THEN eficiencia térmica + electrificación calderas + sustitución
   - IF transporte              → THEN electrificación de flota + combustibles alternativos
 
+The measure templates of each rule live in the declarative catalog
+``data/measure_catalog.json`` (see ``measure_catalog``).
+
 Outputs: Preliminary SBTi pathway, reduction alternatives by source, timeline, estimated potential.
+An optional business-as-usual baseline (``models.forecast``) adds the gap
+between BAU and the pathway that the measures must close;
+``models.deployment.DeploymentSimulator.from_pathway`` deploys the measures
+year by year and reports the remaining gap at each milestone.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
 
 from ..models.inventory import (
     ReductionLever,
@@ -21,7 +31,9 @@ from ..models.inventory import (
     Scope,
     TimeHorizon,
 )
+from .category_classifier import classify
 from .diagnostic_agent import DiagnosticOutput, PrioritySource
+from .measure_catalog import DEFAULT_MEASURES, AlternativeTable, MeasureCatalog
 
 
 @dataclass
@@ -44,6 +56,9 @@ class PathwayOutput:
     alternativas: list[SourceAlternative]
     medidas: list[ReductionMeasure]
     resumen: str = ""
+    linea_base_bau: dict[int, float] = field(default_factory=dict)   # year -> BAU tCO2e
+    brecha_bau: dict[int, float] = field(default_factory=dict)       # year -> BAU - senda tCO2e
+    emisiones_fuente: dict[str, float] = field(default_factory=dict)  # source_id -> base tCO2e
 
 
 class PathwayAgent:
@@ -53,19 +68,26 @@ class PathwayAgent:
     reduction pathway with prioritised alternatives per source.
     """
 
-    def run(self, diagnostic: DiagnosticOutput) -> PathwayOutput:
-        alternativas: list[SourceAlternative] = []
-        medidas: list[ReductionMeasure] = []
-        measure_counter = 0
+    def __init__(self, catalogo: Optional[MeasureCatalog] = None):
+        self.catalogo = catalogo or DEFAULT_MEASURES
 
-        for ps in diagnostic.fuentes_prioritarias:
-            cat = ps.source.categoria.lower()
-            src_alts, src_measures = self._apply_decision_rules(ps, cat)
-            for m in src_measures:
-                measure_counter += 1
-                m.id = f"M-{measure_counter:03d}"
-            alternativas.extend(src_alts)
-            medidas.extend(src_measures)
+    def run(
+        self,
+        diagnostic: DiagnosticOutput,
+        linea_base: Optional[dict[int, float]] = None,
+        sector: Optional[str] = None,
+        pais: Optional[str] = None,
+    ) -> PathwayOutput:
+        """Build the pathway; ``linea_base`` is an optional BAU trajectory
+        (e.g. ``BAUProjection.trayectoria()``) the measures reduce from.
+        ``sector`` and ``pais`` select catalog templates restricted to them."""
+        fuentes = diagnostic.fuentes_prioritarias
+        bloques = np.fromiter(
+            (self.catalogo.block(classify(ps.source.categoria).regla, sector, pais, ps.scope.value) for ps in fuentes),
+            dtype=np.int64, count=len(fuentes),
+        )
+        tabla = self.catalogo.expand(bloques, np.fromiter((ps.tCO2e for ps in fuentes), dtype=np.float64))
+        alternativas, medidas = self._build_alternatives(fuentes, tabla)
 
         # --- Build preliminary SBTi pathway ---
         senda = self._build_senda(diagnostic)
@@ -73,230 +95,52 @@ class PathwayAgent:
         # --- Assign required reduction per source across the pathway ---
         self._distribute_reductions(senda, alternativas, diagnostic)
 
+        # --- Gap between business-as-usual and the pathway ---
+        linea_base = dict(linea_base or {})
+        brecha = {
+            year: round(linea_base[year] - target, 1)
+            for year, target in senda.items()
+            if year in linea_base
+        }
+
         return PathwayOutput(
             senda_preliminar=senda,
             alternativas=sorted(alternativas, key=lambda a: a.prioridad),
             medidas=medidas,
-            resumen=self._generate_summary(senda, alternativas),
+            resumen=self._generate_summary(senda, alternativas, brecha),
+            linea_base_bau=linea_base,
+            brecha_bau=brecha,
+            emisiones_fuente={ps.source.id: ps.tCO2e for ps in fuentes},
         )
 
     # ------------------------------------------------------------------
     # Decision Rules (IF / THEN)
     # ------------------------------------------------------------------
 
-    def _apply_decision_rules(
-        self, ps: PrioritySource, categoria: str
+    def _build_alternatives(
+        self, fuentes: list[PrioritySource], tabla: AlternativeTable
     ) -> tuple[list[SourceAlternative], list[ReductionMeasure]]:
+        """Materialise the catalog expansion; measures are numbered in order."""
         alts: list[SourceAlternative] = []
         measures: list[ReductionMeasure] = []
-
-        if self._is_electricity(categoria):
-            # IF electricidad comprada → THEN renovables + eficiencia
-            alts, measures = self._rule_electricity(ps)
-
-        elif self._is_natural_gas(categoria):
-            # IF combustión gas natural → THEN eficiencia térmica + electrificación + sustitución
-            alts, measures = self._rule_natural_gas(ps)
-
-        elif self._is_transport(categoria):
-            # IF transporte → THEN electrificación flota + combustibles alternativos
-            alts, measures = self._rule_transport(ps)
-
-        else:
-            # Generic fallback
-            alts, measures = self._rule_generic(ps)
-
-        return alts, measures
-
-    # --- Category detection helpers ---
-
-    @staticmethod
-    def _is_electricity(cat: str) -> bool:
-        return any(k in cat for k in ["electricidad", "grid", "comprada", "red"])
-
-    @staticmethod
-    def _is_natural_gas(cat: str) -> bool:
-        return any(k in cat for k in ["gas", "caldera", "termico", "combustion"])
-
-    @staticmethod
-    def _is_transport(cat: str) -> bool:
-        return any(k in cat for k in ["transporte", "vehiculo", "flota", "logistica"])
-
-    # ------------------------------------------------------------------
-    # Rule implementations
-    # ------------------------------------------------------------------
-
-    def _rule_electricity(
-        self, ps: PrioritySource
-    ) -> tuple[list[SourceAlternative], list[ReductionMeasure]]:
-        base = ps.tCO2e
-        alts = [
-            SourceAlternative(
-                source_id=ps.source.id,
-                source_nombre=ps.source.nombre,
-                scope=ps.scope,
-                palanca=ReductionLever.RENEWABLES,
-                medida="Contrato PPA de electricidad 100% renovable",
-                reduccion_estimada_tCO2e=round(base * 0.80, 1),
-                horizonte=TimeHorizon.SHORT,
-                prioridad=1,
-            ),
-            SourceAlternative(
-                source_id=ps.source.id,
-                source_nombre=ps.source.nombre,
-                scope=ps.scope,
-                palanca=ReductionLever.RENEWABLES,
-                medida="Instalación fotovoltaica de autoconsumo",
-                reduccion_estimada_tCO2e=round(base * 0.30, 1),
-                horizonte=TimeHorizon.MEDIUM,
-                prioridad=2,
-            ),
-            SourceAlternative(
-                source_id=ps.source.id,
-                source_nombre=ps.source.nombre,
-                scope=ps.scope,
-                palanca=ReductionLever.EFFICIENCY,
-                medida="Programa de eficiencia energética (LED, HVAC, BMS)",
-                reduccion_estimada_tCO2e=round(base * 0.15, 1),
-                horizonte=TimeHorizon.SHORT,
-                prioridad=3,
-            ),
-        ]
-        measures = [
-            ReductionMeasure(
-                id="", nombre=a.medida, descripcion=a.medida,
-                tipo=a.palanca, scope_aplicable=a.scope,
-                source_id=a.source_id,
-                reduccion_estimada_tCO2e=a.reduccion_estimada_tCO2e,
-                horizonte=a.horizonte, vida_util_anios=15 if "fotovoltaica" in a.medida else 10,
-            )
-            for a in alts
-        ]
-        return alts, measures
-
-    def _rule_natural_gas(
-        self, ps: PrioritySource
-    ) -> tuple[list[SourceAlternative], list[ReductionMeasure]]:
-        base = ps.tCO2e
-        alts = [
-            SourceAlternative(
-                source_id=ps.source.id,
-                source_nombre=ps.source.nombre,
-                scope=ps.scope,
-                palanca=ReductionLever.EFFICIENCY,
-                medida="Mejora de eficiencia térmica (aislamiento + recuperación de calor)",
-                reduccion_estimada_tCO2e=round(base * 0.20, 1),
-                horizonte=TimeHorizon.SHORT,
-                prioridad=1,
-            ),
-            SourceAlternative(
-                source_id=ps.source.id,
-                source_nombre=ps.source.nombre,
-                scope=ps.scope,
-                palanca=ReductionLever.ELECTRIFICATION,
-                medida="Electrificación de calderas (bomba de calor industrial)",
-                reduccion_estimada_tCO2e=round(base * 0.50, 1),
-                horizonte=TimeHorizon.MEDIUM,
-                prioridad=2,
-            ),
-            SourceAlternative(
-                source_id=ps.source.id,
-                source_nombre=ps.source.nombre,
-                scope=ps.scope,
-                palanca=ReductionLever.FUEL_SWITCH,
-                medida="Sustitución por biogás o hidrógeno verde",
-                reduccion_estimada_tCO2e=round(base * 0.40, 1),
-                horizonte=TimeHorizon.LONG,
-                prioridad=3,
-            ),
-        ]
-        measures = [
-            ReductionMeasure(
-                id="", nombre=a.medida, descripcion=a.medida,
-                tipo=a.palanca, scope_aplicable=a.scope,
-                source_id=a.source_id,
-                reduccion_estimada_tCO2e=a.reduccion_estimada_tCO2e,
-                horizonte=a.horizonte,
-                vida_util_anios=15 if "bomba" in a.medida else 10,
-            )
-            for a in alts
-        ]
-        return alts, measures
-
-    def _rule_transport(
-        self, ps: PrioritySource
-    ) -> tuple[list[SourceAlternative], list[ReductionMeasure]]:
-        base = ps.tCO2e
-        alts = [
-            SourceAlternative(
+        plantillas = self.catalogo.plantillas
+        for n, (fila, pos, reduccion) in enumerate(
+            zip(tabla.fila.tolist(), tabla.plantilla.tolist(), tabla.reduccion_tCO2e.tolist()), 1,
+        ):
+            ps, t = fuentes[fila], plantillas[pos]
+            alts.append(SourceAlternative(
                 source_id=ps.source.id,
                 source_nombre=ps.source.nombre,
                 scope=ps.scope,
-                palanca=ReductionLever.ELECTRIFICATION,
-                medida="Electrificación de flota (vehículos eléctricos BEV)",
-                reduccion_estimada_tCO2e=round(base * 0.60, 1),
-                horizonte=TimeHorizon.MEDIUM,
-                prioridad=1,
-            ),
-            SourceAlternative(
-                source_id=ps.source.id,
-                source_nombre=ps.source.nombre,
-                scope=ps.scope,
-                palanca=ReductionLever.EFFICIENCY,
-                medida="Optimización de rutas y eco-driving",
-                reduccion_estimada_tCO2e=round(base * 0.10, 1),
-                horizonte=TimeHorizon.SHORT,
-                prioridad=2,
-            ),
-            SourceAlternative(
-                source_id=ps.source.id,
-                source_nombre=ps.source.nombre,
-                scope=ps.scope,
-                palanca=ReductionLever.FUEL_SWITCH,
-                medida="Combustibles alternativos (HVO / biocombustibles)",
-                reduccion_estimada_tCO2e=round(base * 0.30, 1),
-                horizonte=TimeHorizon.SHORT,
-                prioridad=3,
-            ),
-        ]
-        measures = [
-            ReductionMeasure(
-                id="", nombre=a.medida, descripcion=a.medida,
-                tipo=a.palanca, scope_aplicable=a.scope,
-                source_id=a.source_id,
-                reduccion_estimada_tCO2e=a.reduccion_estimada_tCO2e,
-                horizonte=a.horizonte, vida_util_anios=8,
-            )
-            for a in alts
-        ]
-        return alts, measures
-
-    def _rule_generic(
-        self, ps: PrioritySource
-    ) -> tuple[list[SourceAlternative], list[ReductionMeasure]]:
-        base = ps.tCO2e
-        alts = [
-            SourceAlternative(
-                source_id=ps.source.id,
-                source_nombre=ps.source.nombre,
-                scope=ps.scope,
-                palanca=ReductionLever.EFFICIENCY,
-                medida="Auditoría energética y plan de eficiencia",
-                reduccion_estimada_tCO2e=round(base * 0.15, 1),
-                horizonte=TimeHorizon.SHORT,
-                prioridad=1,
-            ),
-        ]
-        measures = [
-            ReductionMeasure(
-                id="", nombre=a.medida, descripcion=a.medida,
-                tipo=a.palanca, scope_aplicable=a.scope,
-                source_id=a.source_id,
-                reduccion_estimada_tCO2e=a.reduccion_estimada_tCO2e,
-                horizonte=a.horizonte, vida_util_anios=5,
-            )
-            for a in alts
-        ]
+                palanca=t.palanca,
+                medida=t.medida,
+                reduccion_estimada_tCO2e=reduccion,
+                horizonte=t.horizonte,
+                prioridad=t.prioridad,
+            ))
+            measure = self.catalogo.measure(pos, ps.source.id, ps.scope, reduccion)
+            measure.id = f"M-{n:03d}"
+            measures.append(measure)
         return alts, measures
 
     # ------------------------------------------------------------------
@@ -324,11 +168,17 @@ class PathwayAgent:
                 alt.prioridad = max(alt.prioridad, 3)
 
     def _generate_summary(
-        self, senda: dict[int, float], alternativas: list[SourceAlternative]
+        self,
+        senda: dict[int, float],
+        alternativas: list[SourceAlternative],
+        brecha: Optional[dict[int, float]] = None,
     ) -> str:
         lines = ["Senda de Descarbonización Preliminar (SBTi-aligned):"]
         for year in sorted(senda):
-            lines.append(f"  {year}: {senda[year]:,.1f} tCO2e")
+            line = f"  {year}: {senda[year]:,.1f} tCO2e"
+            if brecha and year in brecha:
+                line += f"  (brecha vs BAU: {brecha[year]:,.1f} tCO2e)"
+            lines.append(line)
 
         lines.append(f"\nAlternativas identificadas: {len(alternativas)}")
         by_horizon: dict[str, int] = {}
@@ -0,0 +1,129 @@
+"""
+Cartera de Diagnósticos
+=======================
+Runs ``DiagnosticAgent`` for many client organisations per reporting cycle.
+
+Bundles ``(DiagnosticInput, sources, results)`` are split into chunks and
+each chunk is one task on a ``ProcessPoolExecutor``, so the pickling and
+scheduling overhead is paid per chunk rather than per organisation. Outputs
+come back in input order with per-organisation timings; a failing
+organisation is recorded with its error and does not abort the batch.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from ..models.inventory import EmissionResult, EmissionSource
+from .diagnostic_agent import DiagnosticAgent, DiagnosticInput, DiagnosticOutput
+
+Bundle = tuple[DiagnosticInput, Sequence[EmissionSource], Sequence[EmissionResult]]
+
+
+@dataclass
+class PortfolioResult:
+    """Diagnostic of one organisation in the portfolio."""
+    organizacion: str
+    output: Optional[DiagnosticOutput]
+    segundos: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class PortfolioReport:
+    """Outcome of a portfolio batch, in input order."""
+    resultados: list[PortfolioResult] = field(default_factory=list)
+    segundos_total: float = 0.0
+    workers: int = 1
+
+    @property
+    def fallos(self) -> list[PortfolioResult]:
+        return [r for r in self.resultados if not r.ok]
+
+    @property
+    def outputs(self) -> list[Optional[DiagnosticOutput]]:
+        """Outputs in input order (``None`` for failed organisations)."""
+        return [r.output for r in self.resultados]
+
+    @property
+    def segundos_cpu(self) -> float:
+        """Sum of per-organisation run times."""
+        return sum(r.segundos for r in self.resultados)
+
+
+class PortfolioRunner:
+    """Batch ``DiagnosticAgent.run`` over a process pool.
+
+    Args:
+        max_workers: pool size (default ``os.cpu_count()``); ``1`` runs in
+            the calling process.
+        chunk_size: organisations per task; by default the batch is split in
+            about four chunks per worker to balance uneven inventories.
+        agent: agent instance to run (pickled to the workers).
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        agent: Optional[DiagnosticAgent] = None,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.agent = agent or DiagnosticAgent()
+
+    def run(self, bundles: Sequence[Bundle], nombres: Optional[Sequence[str]] = None) -> PortfolioReport:
+        nombres = list(nombres) if nombres is not None else [str(i) for i in range(len(bundles))]
+        if len(nombres) != len(bundles):
+            raise ValueError(f"{len(nombres)} nombres para {len(bundles)} organizaciones")
+
+        start = time.perf_counter()
+        workers = max(1, min(self.max_workers, len(bundles)))
+        size = self.chunk_size or max(1, math.ceil(len(bundles) / (workers * 4)))
+        chunks = [
+            (nombres[i:i + size], list(bundles[i:i + size]))
+            for i in range(0, len(bundles), size)
+        ]
+
+        resultados: list[PortfolioResult] = []
+        if workers == 1:
+            for names, chunk in chunks:
+                resultados.extend(_run_chunk(self.agent, names, chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_run_chunk, self.agent, names, chunk) for names, chunk in chunks]
+                for (names, _), future in zip(chunks, futures):
+                    try:
+                        resultados.extend(future.result())
+                    except Exception as exc:  # the whole chunk was lost (pickling, dead worker)
+                        error = f"{type(exc).__name__}: {exc}"
+                        resultados.extend(PortfolioResult(n, None, 0.0, error) for n in names)
+
+        return PortfolioReport(
+            resultados=resultados,
+            segundos_total=time.perf_counter() - start,
+            workers=workers,
+        )
+
+
+def _run_chunk(agent: DiagnosticAgent, nombres: Sequence[str], bundles: Sequence[Bundle]) -> list[PortfolioResult]:
+    out: list[PortfolioResult] = []
+    for nombre, (diagnostic_input, sources, results) in zip(nombres, bundles):
+        start = time.perf_counter()
+        try:
+            output = agent.run(diagnostic_input, sources, results)
+            out.append(PortfolioResult(nombre, output, time.perf_counter() - start))
+        except Exception as exc:
+            error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+            out.append(PortfolioResult(nombre, None, time.perf_counter() - start, error))
+    return out
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+ESW Decarbonization Agent System — Benchmarks
+==============================================
+Timing harness for the large-inventory code paths.
+
+Usage:
+    python -m agents.decarbonization.benchmarks [name ...]
+
+Without arguments every benchmark runs; otherwise only the named ones.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import heapq
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from .agents.category_classifier import CategoryClassifier
+from .agents.diagnostic_agent import DiagnosticAgent, DiagnosticInput
+from .agents.measure_catalog import DEFAULT_MEASURES
+from .agents.portfolio import PortfolioRunner
+from .models.allocation import AllocationEngine, DriverMatrix
+from .models.batch import EmissionResultTable
+from .models.consolidation import ConsolidationTree
+from .models.dcf import DCFAssumptions, DCFEngine
+from .models.dependencies import TrackingEmissionsEngine, recalculate_book
+from .models.factor_registry import FactorRegistry
+from .models.deployment import DeploymentSimulator
+from .models.footprint import BOMGraph
+from .models.forecast import BAUForecaster, BAUScenario
+from .models.gases import GasInventory
+from .models.hourly import HOURS_PER_YEAR, HourlyContracts, HourlyGridFactors, calculate_hourly_scope2
+from .models.inventory import (
+    ActivityData,
+    ConsolidationConfig,
+    ConsolidationType,
+    EmissionFactor,
+    EmissionResult,
+    EmissionSource,
+    EmissionSummary,
+    EmissionsEngine,
+    Facility,
+    ReductionLever,
+    ReductionMeasure,
+    Scope,
+    Scope2Method,
+    TimeHorizon,
+)
+from .models.logistics import FreightEngine, SiteRegistry
+from .models.spend import EEIOModel, SpendEngine
+from .models.stacking import StackingEngine
+from .models.trajectory import TrajectoryBuilder
+from .models.uncertainty import Distribution, MonteCarloEngine
+
+
+def _timed(label: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:48s} {elapsed:>8.3f} s")
+    return value
+
+
+def bench_calculate_batch(n_rows: int = 10_000_000) -> None:
+    """Columnar ``EmissionsEngine.calculate_batch`` over ``n_rows`` activity lines."""
+    print(f"calculate_batch — {n_rows:,} filas")
+    rng = np.random.default_rng(0)
+    cantidad = rng.uniform(0, 1e6, n_rows)
+    factor = rng.uniform(0.05, 3.0, n_rows)
+    gwp = np.ones(n_rows)
+    scope = rng.integers(1, 4, n_rows, dtype=np.int8)
+    anio = rng.integers(2019, 2024, n_rows, dtype=np.int16)
+    source_idx = rng.integers(0, 100_000, n_rows, dtype=np.int32)
+
+    engine = EmissionsEngine(ConsolidationConfig(ConsolidationType.OPERATIONAL_CONTROL))
+    table = _timed(
+        "calculate_batch", engine.calculate_batch,
+        cantidad, factor, gwp, scope, anio, source_idx, Scope2Method.LOCATION_BASED,
+    )
+    _timed("summarize(2023)", table.summarize, 2023)
+
+
+def bench_factor_registry(n_sources: int = 100_000, n_rows: int = 5_000) -> None:
+    """Resolve factors for ``n_sources`` sources against an ``n_rows`` table."""
+    print(f"factor_registry — {n_sources:,} fuentes, {n_rows:,} factores")
+    countries = [f"C{i:03d}" for i in range(200)]
+    categories = [f"cat_{i}" for i in range(n_rows // 25)]
+    registry = FactorRegistry(regiones={c: "R" + c[1] for c in countries})
+    rows = [
+        {"categoria": categories[i % len(categories)], "unidad": "kWh",
+         "pais": countries[i % len(countries)] if i % 5 else "GLOBAL",
+         "anio": 2015 + i % 9, "fuente": "DEFRA", "factor": 0.1 + i % 50 / 100}
+        for i in range(n_rows)
+    ]
+    _timed("load_rows", registry.load_rows, rows)
+
+    facilities = [Facility(id=f"F{i}", nombre="", ubicacion="", pais=c) for i, c in enumerate(countries)]
+    sources = [
+        EmissionSource(id=f"S{i}", nombre="", descripcion="", scope=Scope.SCOPE_1,
+                       facility_id=f"F{i % len(facilities)}", categoria=categories[i % len(categories)])
+        for i in range(n_sources)
+    ]
+    activities = [ActivityData(source_id=s.id, cantidad=1.0, unidad="kWh", anio=2023) for s in sources]
+    _timed("resolve_sources", registry.resolve_sources, sources, activities, facilities)
+
+
+def _bytes_per_row(build, n_rows: int) -> float:
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size / n_rows
+
+
+def bench_result_memory(n_rows: int = 1_000_000) -> None:
+    """Bytes per row: dict-backed vs slotted ``EmissionResult`` vs ``EmissionResultTable``."""
+    print(f"result_memory — {n_rows:,} filas")
+    DictResult = dataclasses.make_dataclass(
+        "DictResult", [(f.name, f.type) for f in dataclasses.fields(EmissionResult)],
+    )
+    ids = [f"S{i}" for i in range(10_000)]  # shared, as in a real inventory
+    rows = [(ids[i % 10_000], Scope.SCOPE_1, float(i), 2023, None) for i in range(n_rows)]
+
+    for label, build in (
+        ("dataclass con __dict__", lambda: [DictResult(*r) for r in rows]),
+        ("dataclass(slots=True)", lambda: [EmissionResult(*r) for r in rows]),
+        ("EmissionResultTable", lambda: EmissionResultTable.from_results(EmissionResult(*r) for r in rows)),
+    ):
+        print(f"  {label:48s} {_bytes_per_row(build, n_rows):>8.1f} B/fila")
+
+
+def bench_factor_revision(n_clients: int = 500, rows_per_client: int = 2_000) -> None:
+    """Revise one factor across a book of ``n_clients`` tracked engines."""
+    print(f"factor_revision — {n_clients:,} clientes x {rows_per_client:,} filas")
+    factors = [EmissionFactor(id=f"EF-{i}", nombre="", factor=0.1 + i / 100, unidad_actividad="kWh")
+               for i in range(50)]
+    source = EmissionSource(id="S", nombre="", descripcion="", scope=Scope.SCOPE_2,
+                            facility_id="F", categoria="electricidad")
+    engines = []
+    for c in range(n_clients):
+        engine = TrackingEmissionsEngine(ConsolidationConfig(ConsolidationType.OPERATIONAL_CONTROL),
+                                         organizacion=f"ORG-{c}")
+        for i in range(rows_per_client):
+            engine.build_result(ActivityData("S", 1000.0 + i, "kWh", 2023), factors[i % 50], source)
+        engines.append(engine)
+    reports = _timed("recalculate_book(EF-7)", recalculate_book, engines, "EF-7", 0.25)
+    print(f"  organizaciones afectadas: {len(reports):,}")
+
+
+def bench_hourly_scope2(n_meters: int = 5_000, n_regions: int = 20, n_contracts: int = 200) -> None:
+    """Hourly LBM / MBM / CFE matching for ``n_meters`` meters over 8760 h."""
+    print(f"hourly_scope2 — {n_meters:,} medidores x {HOURS_PER_YEAR} h")
+    rng = np.random.default_rng(0)
+    consumo = rng.uniform(0, 50, (n_meters, HOURS_PER_YEAR))
+    grid = HourlyGridFactors(
+        regiones=[f"R{i}" for i in range(n_regions)],
+        red=rng.uniform(0.05, 0.5, (HOURS_PER_YEAR, n_regions)),
+        cfe_red=rng.uniform(0, 0.6, (HOURS_PER_YEAR, n_regions)),
+    )
+    contratos = HourlyContracts(
+        region_idx=rng.integers(0, n_regions, n_contracts),
+        kwh=rng.uniform(0, 500, (n_contracts, HOURS_PER_YEAR)),
+    )
+    region_idx = rng.integers(0, n_regions, n_meters)
+    out = _timed("calculate_hourly_scope2", calculate_hourly_scope2, consumo, region_idx, grid, contratos)
+    print(f"  CFE score: {out.cfe_score:.3f}")
+
+
+def bench_monte_carlo(n_rows: int = 100_000, n_samples: int = 10_000) -> None:
+    """Monte Carlo bands for ``n_rows`` uncertain rows with ``n_samples`` draws."""
+    print(f"monte_carlo — {n_rows:,} filas x {n_samples:,} muestras")
+    rng = np.random.default_rng(0)
+    point = rng.uniform(0.1, 10.0, n_rows)
+    bucket = rng.integers(0, 4, n_rows)
+    kinds = [Distribution.normal(5.0), Distribution.lognormal(20.0), Distribution.triangular(0.9, 1.2)]
+    act_dists = [kinds[i % 3] for i in range(n_rows)]
+    factor_dists = [Distribution.lognormal(10.0)] * 50
+    factor_pos = rng.integers(0, 50, n_rows)
+    engine = MonteCarloEngine(EmissionsEngine(ConsolidationConfig(ConsolidationType.OPERATIONAL_CONTROL)),
+                              n_muestras=n_samples, seed=0)
+    tracemalloc.start()
+    out = _timed("summarize_columns", engine.summarize_columns, point, bucket, act_dists, factor_pos, factor_dists, 2023)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    lo, hi = out.banda()
+    print(f"  total P2.5-P97.5: {lo:,.0f} - {hi:,.0f} tCO2e   pico memoria: {peak / 2**20:.0f} MiB")
+
+
+def bench_consolidation(n_entities: int = 5_000) -> None:
+    """Roll up a group of ``n_entities`` under the three consolidation types."""
+    print(f"consolidation — {n_entities:,} entidades")
+    rng = np.random.default_rng(0)
+    tree = ConsolidationTree("HOLDING")
+    names = ["HOLDING"]
+    for i in range(1, n_entities):
+        name = f"E{i}"
+        tree.add_link(names[int(rng.integers(0, i))], name, float(rng.uniform(20, 100)), conjunto=i % 7 == 0)
+        names.append(name)
+    resumenes = {n: EmissionSummary(2023, *rng.uniform(0, 1_000, 4)) for n in names}
+    for tipo in ConsolidationType:
+        _timed(f"factores({tipo.value})", tree.factores, tipo)
+        out = _timed(f"rollup({tipo.value})", tree.rollup, resumenes, tipo, 2023)
+        print(f"  consolidado: {out.consolidado.total_tCO2e:,.0f} tCO2e")
+
+
+def bench_spend_scope3(n_lines: int = 1_000_000, n_sectors: int = 400, chunk_size: int = 100_000) -> None:
+    """Spend-based Scope 3 over a ledger of ``n_lines`` lines, streamed in chunks."""
+    print(f"spend_scope3 — {n_lines:,} líneas x {n_sectors} sectores EEIO")
+    rng = np.random.default_rng(0)
+    sectores = [f"S{i:03d}" for i in range(n_sectors)]
+    modelo = EEIOModel(
+        sectores=sectores,
+        gases=["CO2", "CH4", "N2O"],
+        matriz=rng.uniform(0, 0.5, (3, n_sectors)) * np.array([[1.0], [1e-3], [1e-4]]),
+        gwp=np.array([1.0, 27.9, 273.0]),
+        categorias={s: 2 for s in sectores[::10]},
+    )
+    engine = SpendEngine(modelo, tipos_cambio={"USD": 0.92, "GBP": 1.17})
+    monedas = ("EUR", "USD", "GBP")
+    codes = [f"{s}.{j}" for s in sectores for j in range(5)]
+
+    def ledger():
+        for i in range(n_lines):
+            yield {"proveedor": f"P{i % 5_000}", "commodity": codes[i % len(codes)],
+                   "moneda": monedas[i % 3], "importe": 100.0 + i % 997}
+
+    report = _timed("SpendEngine.calculate", engine.calculate, ledger(), chunk_size)
+    print(f"  Scope 3: {report.scope_3_tCO2e:,.0f} tCO2e en {len(report.tCO2e_por_categoria)} categorías")
+
+
+def bench_freight(n_shipments: int = 500_000, n_sites: int = 2_000) -> None:
+    """Distance-based freight emissions for ``n_shipments`` between ``n_sites`` sites."""
+    print(f"freight — {n_shipments:,} envíos entre {n_sites:,} ubicaciones")
+    rng = np.random.default_rng(0)
+    sitios = SiteRegistry()
+    for i in range(n_sites):
+        sitios.add(f"L{i}", float(rng.uniform(36, 60)), float(rng.uniform(-9, 25)))
+    engine = FreightEngine(sitios, {"carretera": 0.1, "ferrocarril": 0.03, "maritimo": 0.015, "aereo": 1.1},
+                           desvios={"carretera": 1.2, "ferrocarril": 1.1})
+    _timed("distance_matrix", lambda: sitios.distance_matrix)
+    report = _timed(
+        "calculate_columns",
+        engine.calculate_columns,
+        rng.integers(0, n_sites, n_shipments),
+        rng.integers(0, n_sites, n_shipments),
+        rng.uniform(1, 30, n_shipments),
+        rng.integers(0, 4, n_shipments),
+        rng.integers(0, 3, n_shipments),
+    )
+    print(f"  {report.tkm.sum() / 1e6:,.1f} Mt·km, {report.tCO2e.sum():,.0f} tCO2e")
+
+
+def bench_gwp_restatement(n_rows: int = 200_000) -> None:
+    """Restate a ``n_rows`` multi-gas inventory under AR4, AR5 and AR6."""
+    print(f"gwp_restatement — {n_rows:,} filas multi-gas")
+    engine = EmissionsEngine(ConsolidationConfig(ConsolidationType.OPERATIONAL_CONTROL))
+    gas = EmissionFactor("EF-GN", "Gas natural", 0.0, "m3", gases={"CO2": 2.0, "CH4": 0.001, "N2O": 0.0001})
+    r410a = EmissionFactor("EF-R410A", "R-410A", 0.0, "kg", gases={"R-410A": 1.0})
+    caldera = EmissionSource("S1", "", "", Scope.SCOPE_1, "F", "caldera")
+    frio = EmissionSource("S2", "", "", Scope.SCOPE_1, "F", "refrigeracion")
+    rows = [
+        (ActivityData("S1", 1000.0 + i, "m3", 2023), gas, caldera, None) if i % 10 else
+        (ActivityData("S2", 1.0 + i % 7, "kg", 2023), r410a, frio, None)
+        for i in range(n_rows)
+    ]
+    inventory = GasInventory(engine)
+    _timed("GasInventory.add_many", inventory.add_many, rows)
+    _timed("restate (primera vez)", inventory.restate, 2023)
+    restated = _timed("restate (en caché)", inventory.restate, 2023)
+    for informe, summary in restated.items():
+        print(f"  {informe}: {summary.total_tCO2e:,.0f} tCO2e")
+
+
+def bench_bau_forecast(n_orgs: int = 5_000, sources_per_org: int = 20) -> None:
+    """BAU projection to 2050 for ``n_orgs`` organisations under three scenarios."""
+    n = n_orgs * sources_per_org
+    print(f"bau_forecast — {n_orgs:,} organizaciones x {sources_per_org} fuentes x 3 escenarios")
+    rng = np.random.default_rng(0)
+    forecaster = BAUForecaster([
+        BAUScenario("bajo", produccion=0.5, factor_red=-6.0, precio_combustible=5.0, elasticidad_precio=-0.3),
+        BAUScenario("central", produccion=1.5, plantilla=1.0, factor_red=-4.0),
+        BAUScenario("alto", produccion=3.0, plantilla=2.0, factor_red=-2.0, precio_combustible=-2.0,
+                    elasticidad_precio=-0.3),
+    ], anio_base=2023)
+    bau = _timed(
+        "project",
+        forecaster.project,
+        rng.uniform(1, 1_000, n),
+        rng.integers(0, 3, n),
+        rng.integers(0, 3, n),
+    )
+    orgs = _timed("por_organizacion", bau.por_organizacion, np.repeat(np.arange(n_orgs), sources_per_org))
+    print(f"  matriz {bau.emisiones.shape}, 2050 central: {orgs[1, :, -1].sum():,.0f} tCO2e")
+
+
+def bench_allocation(n_skus: int = 50_000, n_centres: int = 200, n_facilities: int = 20) -> None:
+    """Allocate facility emissions to ``n_centres`` cost centres and ``n_skus`` products."""
+    print(f"allocation — {n_facilities} instalaciones -> {n_centres} centros de coste -> {n_skus:,} SKUs")
+    rng = np.random.default_rng(0)
+    centres = [f"CC{i:03d}" for i in range(n_centres)]
+    area = DriverMatrix.from_records("superficie_m2", (
+        (f"F{f}", centres[c], float(rng.uniform(50, 5_000)))
+        for f in range(n_facilities) for c in rng.choice(n_centres, 40, replace=False)
+    ))
+    units = DriverMatrix.from_records("unidades", (
+        (centres[c], f"SKU{s:05d}", float(rng.uniform(1, 1_000)))
+        for s in range(n_skus) for c in rng.choice(n_centres, 3, replace=False)
+    ))
+    sources = [EmissionSource(f"S{i}", "", "", Scope.SCOPE_1, f"F{i % n_facilities}", "caldera")
+               for i in range(n_facilities * 10)]
+    results = [EmissionResult(s.id, Scope.SCOPE_1, float(rng.uniform(10, 1_000)), 2023) for s in sources]
+    engine = AllocationEngine({"superficie_m2": area})
+    centres_out = _timed("allocate_results (centros de coste)", engine.allocate_results, sources, results, 2023)
+    products = _timed("chain (SKUs, primera vez)", AllocationEngine.chain, centres_out, units)
+    _timed("chain (SKUs, cuotas en caché)", AllocationEngine.chain, centres_out, units)
+    records = _timed("to_records", products.to_records)
+    print(f"  {len(records):,} InternalAllocation, {products.total_tCO2e:,.0f} tCO2e")
+
+
+def bench_bom_footprint(n_products: int = 20_000, n_components: int = 5_000, lines_per_node: int = 8) -> None:
+    """Footprints of ``n_products`` products over a shared ``n_components`` component DAG."""
+    print(f"bom_footprint — {n_products:,} productos, {n_components:,} componentes compartidos")
+    rng = np.random.default_rng(0)
+    bom = BOMGraph()
+    for c in range(n_components):
+        bom.set_own(f"C{c}", float(rng.uniform(0.01, 5)))
+        for child in rng.choice(c, min(c, 3), replace=False) if c else ():
+            bom.add_component(f"C{c}", f"C{child}", float(rng.uniform(0.1, 3)))
+    for p in range(n_products):
+        for child in rng.choice(n_components, lines_per_node, replace=False):
+            bom.add_component(f"P{p}", f"C{child}", float(rng.uniform(0.1, 10)))
+    _timed("footprints (primera vez)", bom.footprints)
+    print(f"  nodos calculados: {bom.calculados:,} de {len(bom):,}")
+    changed = f"C{n_components - 1}"
+    bom.reset_stats()
+    bom.set_own(changed, 10.0)
+    _timed("footprints tras cambiar un componente", bom.footprints)
+    print(f"  nodos recalculados: {bom.calculados:,} ({len(bom.ancestors(changed)) + 1:,} afectados)")
+
+
+def bench_priority_sources(
+    sizes: tuple[int, ...] = (10_000, 100_000, 1_000_000, 10_000_000),
+    max_full_run: int = 1_000_000,
+) -> None:
+    """Priority source ranking: full sort vs bounded heap, plus ``DiagnosticAgent.run``."""
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        print(f"priority_sources — {n:,} fuentes")
+        totals = dict(zip(range(n), rng.lognormal(3.0, 2.0, n).tolist()))
+        _timed("sorted (anterior)", sorted, totals.items(), key=lambda x: x[1], reverse=True)
+        _timed("heapq.nlargest(5)", heapq.nlargest, 5, totals.items(), key=lambda x: x[1])
+        if n <= max_full_run:
+            sources = [EmissionSource(f"S{i}", "", "", Scope.SCOPE_1, "F1", "caldera_gas_natural") for i in range(n)]
+            results = [EmissionResult(f"S{i}", Scope.SCOPE_1, v, 2023) for i, v in totals.items()]
+            di = DiagnosticInput(anio_base=2023, summary=EmissionsEngine.summarize(results, 2023))
+            _timed("DiagnosticAgent.run", DiagnosticAgent().run, di, sources, results)
+        del totals
+
+
+def bench_category_classifier(n_sources: int = 100_000, n_categories: int = 500) -> None:
+    """Classify ``n_sources`` source categories (``n_categories`` distinct)."""
+    print(f"category_classifier — {n_sources:,} fuentes, {n_categories} categorías distintas")
+    words = ["caldera", "gas", "natural", "electricidad", "comprada", "flota", "diesel", "horno", "planta", "linea"]
+    rng = np.random.default_rng(0)
+    distinct = ["_".join(rng.choice(words, 3)) + f"_{i}" for i in range(n_categories)]
+    categorias = [distinct[i] for i in rng.integers(0, n_categories, n_sources)]
+    classifier = CategoryClassifier()
+    _timed("classify (caché vacía)", lambda: [classifier.classify(c) for c in categorias])
+    _timed("classify (en caché)", lambda: [classifier.classify(c) for c in categorias])
+
+
+def bench_portfolio(n_orgs: int = 300, sources_per_org: int = 5_000) -> None:
+    """``DiagnosticAgent`` over ``n_orgs`` organisations, serial vs process pool."""
+    workers = os.cpu_count() or 1
+    print(f"portfolio — {n_orgs} organizaciones x {sources_per_org:,} fuentes, {workers} núcleos")
+    rng = np.random.default_rng(0)
+    sources = [EmissionSource(f"S{i}", f"Fuente {i}", "", Scope.SCOPE_1, "F1", "caldera_gas_natural")
+               for i in range(sources_per_org)]
+    bundles = []
+    for _ in range(n_orgs):
+        results = [EmissionResult(s.id, Scope.SCOPE_1, v, 2023)
+                   for s, v in zip(sources, rng.lognormal(3.0, 2.0, sources_per_org).tolist())]
+        bundles.append((DiagnosticInput(anio_base=2023, summary=EmissionsEngine.summarize(results, 2023)),
+                        sources, results))
+    PortfolioRunner(max_workers=1).run(bundles[:2])   # warm-up: imports and classifier cache
+    serial = _timed("serie (1 proceso)", PortfolioRunner(max_workers=1).run, bundles)
+    if workers < 2:
+        print(f"  fallos: {len(serial.fallos)}, aceleración: n/a (un solo núcleo)")
+        return
+    pooled = _timed(f"ProcessPoolExecutor ({workers} procesos)", PortfolioRunner(max_workers=workers).run, bundles)
+    print(f"  fallos: {len(pooled.fallos)}, aceleración: {serial.segundos_total / pooled.segundos_total:.2f}x")
+
+
+def bench_target_trajectories(n_orgs: int = 10_000, n_sectors: int = 12) -> None:
+    """ACA, net-zero and SDA pathways to 2050 for ``n_orgs`` organisations."""
+    print(f"target_trajectories — {n_orgs:,} organizaciones, años base 2018-2023")
+    rng = np.random.default_rng(0)
+    builder = TrajectoryBuilder(2018)
+    e0 = rng.uniform(100, 1e6, n_orgs)
+    base = rng.integers(2018, 2024, n_orgs)
+    _timed("absolute_contraction", builder.absolute_contraction, e0, base, 42.0, 2030)
+    _timed("net_zero", builder.net_zero, e0, base, 42.0, 2030, 90.0, 2050)
+    sector_path = np.linspace(rng.uniform(0.5, 2.0, n_sectors), rng.uniform(0.01, 0.2, n_sectors), len(builder.anios)).T
+    sda = _timed(
+        "sda", builder.sda,
+        rng.uniform(0.2, 3.0, n_orgs), e0, base, rng.integers(0, n_sectors, n_orgs), sector_path,
+        rng.uniform(-1, 4, n_orgs),
+    )
+    print(f"  matriz {sda.emisiones.shape}, 2050 SDA: {np.nansum(sda.en(2050)):,.0f} tCO2e")
+
+
+def bench_measure_catalog(n_sources: int = 100_000) -> None:
+    """Expand catalog alternatives for ``n_sources`` priority sources."""
+    print(f"measure_catalog — {n_sources:,} fuentes prioritarias, {len(DEFAULT_MEASURES)} plantillas")
+    rng = np.random.default_rng(0)
+    reglas = ["electricidad", "gas_natural", "transporte", None]
+    keys = [(reglas[r], None, None, s) for r, s in zip(rng.integers(0, 4, n_sources), rng.integers(1, 4, n_sources))]
+    blocks = _timed("block (tabla de despacho)", lambda: np.fromiter(
+        (DEFAULT_MEASURES.block(*k) for k in keys), dtype=np.int64, count=n_sources,
+    ))
+    table = _timed("expand", DEFAULT_MEASURES.expand, blocks, rng.uniform(1, 10_000, n_sources))
+    print(f"  {len(table):,} alternativas")
+
+
+def bench_measure_stacking(n_sources: int = 100_000, n_measures: int = 4) -> None:
+    """Stack ``n_measures`` overlapping measures on ``n_sources`` sources, in every order."""
+    print(f"measure_stacking — {n_sources:,} fuentes x {n_measures} medidas ({math.factorial(n_measures)} órdenes)")
+    rng = np.random.default_rng(0)
+    e = rng.uniform(10, 10_000, n_sources)
+    r = e[:, None] * rng.uniform(0.05, 0.8, (n_sources, n_measures))
+    for modo in ("multiplicativo", "secuencial"):
+        engine = StackingEngine(modo)
+        _timed(f"stack ({modo})", engine.stack, e, r)
+        perms, avoided = _timed(f"orderings ({modo})", engine.orderings, e, r)
+    spread = avoided.max(axis=0) - avoided.min(axis=0)
+    print(f"  atribución secuencial: rango medio por medida {spread.mean():,.1f} tCO2e entre órdenes")
+
+
+def bench_deployment_plans(n_plans: int = 5_000, n_sources: int = 12, n_measures: int = 30) -> None:
+    """Score ``n_plans`` deployment plans of one organisation against its pathway."""
+    print(f"deployment_plans — {n_plans:,} planes x {n_measures} medidas x {n_sources} fuentes, 2023-2050")
+    rng = np.random.default_rng(0)
+    fuentes = {f"S{i}": float(v) for i, v in enumerate(rng.uniform(100, 10_000, n_sources))}
+    horizontes = list(TimeHorizon)
+    medidas = [
+        ReductionMeasure(
+            f"M-{i:03d}", "", "", ReductionLever.EFFICIENCY, Scope.SCOPE_1, f"S{i % n_sources}",
+            fuentes[f"S{i % n_sources}"] * rng.uniform(0.05, 0.5), horizontes[i % 3], int(rng.integers(8, 25)),
+        )
+        for i in range(n_measures)
+    ]
+    total = sum(fuentes.values())
+    senda = {2023: total, 2025: total * 0.9, 2030: total * 0.58, 2035: total * 0.4, 2050: total * 0.1}
+    sim = DeploymentSimulator(medidas, fuentes, 2023)
+    planes = sim.sample_plans(n_plans, seed=0, prob_despliegue=0.8)
+    scores = _timed("score", sim.score, planes, senda)
+    print(f"  mejor plan: déficit {scores.min():,.0f} tCO2e (mediana {np.median(scores):,.0f})")
+
+
+def bench_dcf_macc(n_measures: int = 10_000) -> None:
+    """NPV, IRR and discounted payback for ``n_measures`` measures."""
+    print(f"dcf_macc — {n_measures:,} medidas, vida útil 5-30 años")
+    rng = np.random.default_rng(0)
+    capex = rng.uniform(1e4, 1e7, n_measures)
+    ahorro = capex * rng.uniform(-0.05, 0.4, n_measures)
+    vida = rng.integers(5, 31, n_measures)
+    tco2e = rng.uniform(1, 5_000, n_measures)
+    engine = DCFEngine(DCFAssumptions(tasa_descuento_pct=7.0, inflacion_pct=2.0, escalado_energia_pct=1.5))
+    result = _timed("evaluate (VAN + TIR + payback)", engine.evaluate, capex, ahorro, vida, tco2e)
+    print(f"  TIR calculada en {np.mean(~np.isnan(result.tir_pct)):.0%} de medidas, "
+          f"VAN > 0 en {np.mean(result.van_eur > 0):.0%}")
+
+
+BENCHMARKS = {
+    "calculate_batch": bench_calculate_batch,
+    "factor_registry": bench_factor_registry,
+    "result_memory": bench_result_memory,
+    "factor_revision": bench_factor_revision,
+    "hourly_scope2": bench_hourly_scope2,
+    "monte_carlo": bench_monte_carlo,
+    "consolidation": bench_consolidation,
+    "spend_scope3": bench_spend_scope3,
+    "freight": bench_freight,
+    "gwp_restatement": bench_gwp_restatement,
+    "bau_forecast": bench_bau_forecast,
+    "allocation": bench_allocation,
+    "bom_footprint": bench_bom_footprint,
+    "priority_sources": bench_priority_sources,
+    "category_classifier": bench_category_classifier,
+    "portfolio": bench_portfolio,
+    "target_trajectories": bench_target_trajectories,
+    "measure_catalog": bench_measure_catalog,
+    "measure_stacking": bench_measure_stacking,
+    "deployment_plans": bench_deployment_plans,
+    "dcf_macc": bench_dcf_macc,
+}
+
+
+def main(argv: list[str]) -> None:
+    names = argv or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -22,7 +22,6 @@ from .models.inventory import (
     ConsolidationConfig,
     ConsolidationType,
     DecarbonizationTarget,
-    EmissionFactor,
     EmissionSource,
     EmissionsEngine,
     Facility,
@@ -30,6 +29,9 @@ from .models.inventory import (
     Scope,
     Scope2Method,
 )
+from .models.aggregation import EmissionCube
+from .models.factor_registry import FactorRegistry
+from .models.forecast import BAUForecaster, BAUScenario
 
 # Phase 2 — Diagnostic Agent
 from .agents.diagnostic_agent import DiagnosticAgent, DiagnosticInput
@@ -76,7 +78,7 @@ def run_simulation() -> None:
         id="FAC-001",
         nombre="Planta Principal Sevilla",
         ubicacion="Sevilla",
-        pais="España",
+        pais="ES",
         superficie_m2=12_000,
         dias_operacion=250,
     )
@@ -84,7 +86,7 @@ def run_simulation() -> None:
         id="FAC-002",
         nombre="Oficina Central Madrid",
         ubicacion="Madrid",
-        pais="España",
+        pais="ES",
         superficie_m2=2_000,
         dias_operacion=260,
     )
@@ -148,33 +150,16 @@ def run_simulation() -> None:
     ]
 
     # G. Emission Factors (based on Spain / DEFRA 2023 / IPCC AR6)
-    factors = {
-        "SRC-001": EmissionFactor(
-            id="EF-001", nombre="Electricidad España 2023 (LBM)",
-            factor=0.150, unidad_actividad="kWh", gwp=1.0,
-            fuente="REE/MITECO 2023",
-        ),
-        "SRC-002": EmissionFactor(
-            id="EF-002", nombre="Gas natural combustión",
-            factor=2.0, unidad_actividad="m3", gwp=1.0,
-            fuente="DEFRA 2023",
-        ),
-        "SRC-003": EmissionFactor(
-            id="EF-003", nombre="Diésel (gasóleo A)",
-            factor=2.68, unidad_actividad="litros", gwp=1.0,
-            fuente="DEFRA 2023",
-        ),
-        "SRC-004": EmissionFactor(
-            id="EF-004", nombre="Electricidad España 2023 (LBM)",
-            factor=0.150, unidad_actividad="kWh", gwp=1.0,
-            fuente="REE/MITECO 2023",
-        ),
-        "SRC-005": EmissionFactor(
-            id="EF-005", nombre="R-410A (HFC)",
-            factor=1.0, unidad_actividad="kg", gwp=2088.0,
-            fuente="IPCC AR6",
-        ),
-    }
+    registry = FactorRegistry.from_defaults(regiones={"ES": "EU"})
+    factors = registry.resolve_sources(
+        sources, activities, [planta, oficina],
+        categorias={
+            "electricidad_comprada": "electricidad",
+            "caldera_gas_natural": "gas_natural",
+            "transporte_flota": "diesel",
+            "refrigeracion_fugitivas": "r410a",
+        },
+    )
 
     # --- Calculate emissions ---
     engine = EmissionsEngine(consolidation)
@@ -182,13 +167,15 @@ def run_simulation() -> None:
     source_map = {s.id: s for s in sources}
 
     for act in activities:
-        ef = factors.get(act.source_id)
+        ef = factors.get((act.source_id, act.anio))
         src = source_map.get(act.source_id)
         if ef and src:
             result = engine.build_result(act, ef, src, scope2_method=Scope2Method.LOCATION_BASED)
             results.append(result)
 
-    summary = engine.summarize(results, anio=2023)
+    # One cube feeds the inventory summary, the diagnostic and the breakdowns
+    cube = EmissionCube.from_results(results, sources)
+    summary = cube.summary(2023)
     summary.compute_intensities(org)
 
     print(f"Organización: {org.nombre} ({org.pais}, {org.sector})")
@@ -207,6 +194,11 @@ def run_simulation() -> None:
         src = source_map[r.source_id]
         print(f"  {src.nombre}: {r.tCO2e:,.1f} tCO2e (Scope {r.scope.value})")
 
+    print("\nDesglose por instalación:")
+    facility_names = {f.id: f.nombre for f in (planta, oficina)}
+    for (facility,), tCO2e in sorted(cube.rollup("facility", anio=2023).items()):
+        print(f"  {facility_names.get(facility, facility)}: {tCO2e:,.1f} tCO2e")
+
     # ==================================================================
     # PHASE 2 — Diagnostic Agent
     # ==================================================================
@@ -245,8 +237,13 @@ def run_simulation() -> None:
     # ==================================================================
     separator("FASE 3 — Agente de Senda de Descarbonización")
 
+    # Business-as-usual baseline: +2 %/año producción, red -4 %/año, plantilla +1 %/año
+    bau = BAUForecaster(
+        [BAUScenario("BAU", produccion=2.0, plantilla=1.0, factor_red=-4.0)], anio_base=2023,
+    ).project_sources(sources, results)
+
     pathway_agent = PathwayAgent()
-    pathway_output = pathway_agent.run(diagnostic_output)
+    pathway_output = pathway_agent.run(diagnostic_output, linea_base=bau.trayectoria("BAU"))
 
     print(pathway_output.resumen)
     print(f"\nAlternativas de reducción por fuente:")
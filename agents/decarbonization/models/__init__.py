@@ -1,5 +1,13 @@
-"""Phase 1 data models — GHG Protocol emissions inventory."""
+"""Phase 1 data models — GHG Protocol emissions inventory.
 
+The inventory, unit conversion and factor registry are pure Python. The
+vectorised engines need NumPy and are imported on first access, so the
+scalar ``EmissionsEngine`` path works without it.
+"""
+
+from importlib import import_module
+
+from .factor_registry import FactorRegistry
 from .inventory import (
     ActivityData,
     BaselineTrajectory,
@@ -21,25 +29,131 @@ from .inventory import (
     Scope2Method,
     TimeHorizon,
 )
+from .units import DEFAULT_UNITS, UNKNOWN_UNIT, UnitMismatchError, UnitRegistry
+
+# NumPy-backed names -> defining submodule.
+_LAZY = {
+    name: module
+    for module, names in {
+        "aggregation": ("EmissionCube", "IncrementalSummary", "RunningSummary"),
+        "allocation": ("AllocationEngine", "AllocationResult", "DriverMatrix"),
+        "batch": ("EmissionResultRow", "EmissionResultTable"),
+        "consolidation": ("ConsolidatedSummary", "ConsolidationTree", "OwnershipLink"),
+        "dcf": ("OPEX_TIMINGS", "DCFAssumptions", "DCFEngine", "DCFResult"),
+        "dependencies": ("FactorChangeReport", "TrackingEmissionsEngine", "recalculate_book"),
+        "deployment": ("HORIZON_WINDOWS", "NO_DESPLEGADA", "DeploymentResult", "DeploymentSimulator"),
+        "footprint": ("BOMCycleError", "BOMGraph"),
+        "forecast": ("BAUForecaster", "BAUProjection", "BAUScenario", "SourceDrivers"),
+        "gases": ("DEFAULT_GWP", "GWP_TABLES", "GasInventory", "GWPRegistry"),
+        "hourly": (
+            "HourlyContracts",
+            "HourlyGridFactors",
+            "HourlyScope2Output",
+            "calculate_hourly_scope2",
+            "load_hourly",
+            "save_hourly",
+        ),
+        "logistics": ("FreightEngine", "FreightLeg", "FreightReport", "Shipment", "SiteRegistry"),
+        "spend": ("SCOPE3_CATEGORIES", "EEIOModel", "SpendEngine", "SpendReport"),
+        "stacking": ("STACKING_MODES", "StackingEngine"),
+        "trajectory": ("TargetTrajectory", "TrajectoryBuilder"),
+        "uncertainty": ("Distribution", "DistributionType", "MonteCarloEngine", "UncertaintySummary"),
+    }.items()
+    for name in names
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY))
+
 
 __all__ = [
+    "DEFAULT_GWP",
+    "DEFAULT_UNITS",
+    "GWP_TABLES",
+    "HORIZON_WINDOWS",
+    "NO_DESPLEGADA",
+    "OPEX_TIMINGS",
+    "SCOPE3_CATEGORIES",
+    "STACKING_MODES",
+    "UNKNOWN_UNIT",
     "ActivityData",
+    "AllocationEngine",
+    "AllocationResult",
+    "BAUForecaster",
+    "BAUProjection",
+    "BAUScenario",
+    "BOMCycleError",
+    "BOMGraph",
     "BaselineTrajectory",
+    "ConsolidatedSummary",
     "ConsolidationConfig",
+    "ConsolidationTree",
     "ConsolidationType",
+    "DCFAssumptions",
+    "DCFEngine",
+    "DCFResult",
     "DecarbonizationTarget",
+    "DeploymentResult",
+    "DeploymentSimulator",
+    "Distribution",
+    "DistributionType",
+    "DriverMatrix",
+    "EEIOModel",
     "EconomicVariables",
+    "EmissionCube",
     "EmissionFactor",
     "EmissionResult",
+    "EmissionResultRow",
+    "EmissionResultTable",
     "EmissionSource",
     "EmissionSummary",
     "EmissionsEngine",
     "Facility",
+    "FactorChangeReport",
+    "FactorRegistry",
+    "FreightEngine",
+    "FreightLeg",
+    "FreightReport",
+    "GWPRegistry",
+    "GasInventory",
+    "HourlyContracts",
+    "HourlyGridFactors",
+    "HourlyScope2Output",
+    "IncrementalSummary",
     "InternalAllocation",
+    "MonteCarloEngine",
     "Organization",
+    "OwnershipLink",
     "ReductionLever",
     "ReductionMeasure",
+    "RunningSummary",
     "Scope",
     "Scope2Method",
+    "Shipment",
+    "SiteRegistry",
+    "SourceDrivers",
+    "SpendEngine",
+    "SpendReport",
+    "StackingEngine",
+    "TargetTrajectory",
     "TimeHorizon",
+    "TrackingEmissionsEngine",
+    "TrajectoryBuilder",
+    "UncertaintySummary",
+    "UnitMismatchError",
+    "UnitRegistry",
+    "calculate_hourly_scope2",
+    "load_hourly",
+    "recalculate_book",
+    "save_hourly",
 ]
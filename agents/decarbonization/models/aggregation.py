@@ -0,0 +1,342 @@
+"""
+Phase 1 — Agregación de Resultados
+==================================
+Summary structures that fold emission results without keeping them.
+
+``RunningSummary`` accumulates tCO2e per (año, scope, método Scope 2,
+instalación) chunk by chunk, so inventories streamed from disk can be
+summarised in memory proportional to the number of distinct keys rather
+than the number of activity rows.
+
+``IncrementalSummary`` keeps per-year scope totals current while activity
+records are inserted, corrected or deleted, applying one signed delta per
+change instead of re-summarising the whole inventory.
+
+``EmissionCube`` groups results once by año × scope × método Scope 2 ×
+instalación × categoría; every roll-up or drill-down (per year, facility,
+category...) is then answered from the cube cells instead of rescanning
+the results.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from .batch import SCOPE2_METHOD_CODES, EmissionResultTable
+from .inventory import (
+    EmissionResult,
+    EmissionSource,
+    EmissionSummary,
+    Organization,
+    Scope,
+    Scope2Method,
+)
+
+_MBM = SCOPE2_METHOD_CODES[Scope2Method.MARKET_BASED]
+
+# Bucket positions of the summary totals (scope 1, scope 2 LBM / MBM, scope 3)
+BUCKET_S1, BUCKET_S2_LBM, BUCKET_S2_MBM, BUCKET_S3 = range(4)
+N_BUCKETS = 4
+
+
+def scope_bucket(scope: Scope, scope2_method: Optional[Scope2Method] = None) -> int:
+    """Summary bucket of an emission of ``scope`` (scope 2 split by method)."""
+    return _code_bucket(scope.value, SCOPE2_METHOD_CODES[scope2_method])
+
+
+def _code_bucket(scope: int, method: int) -> int:
+    """``scope_bucket`` for a scope value and a Scope 2 method code."""
+    if scope == 1:
+        return BUCKET_S1
+    if scope == 2:
+        return BUCKET_S2_MBM if method == _MBM else BUCKET_S2_LBM
+    return BUCKET_S3
+
+
+def _bucket_summary(anio: int, values: Sequence[float]) -> EmissionSummary:
+    return EmissionSummary(
+        anio=anio,
+        scope_1_tCO2e=values[BUCKET_S1],
+        scope_2_lbm_tCO2e=values[BUCKET_S2_LBM],
+        scope_2_mbm_tCO2e=values[BUCKET_S2_MBM],
+        scope_3_tCO2e=values[BUCKET_S3],
+    )
+
+
+def _group_table(
+    table: EmissionResultTable,
+    label_idx: np.ndarray,
+    n_labels: int,
+) -> Iterable[tuple[int, int, int, int, float]]:
+    """Sum a columnar table per (año, scope, método, label) in one reduction.
+
+    Yields ``(anio, scope, scope2_method_code, label, tCO2e)`` per group.
+    """
+    key = table.anio.astype(np.int64)
+    key = key * 4 + table.scope
+    key = key * 3 + table.scope2_method
+    key = key * n_labels + label_idx
+    groups, inverse = np.unique(key, return_inverse=True)
+    sums = np.bincount(inverse, weights=table.tCO2e, minlength=groups.size)
+    for code, value in zip(groups.tolist(), sums.tolist()):
+        code, label = divmod(code, n_labels)
+        code, method = divmod(code, 3)
+        anio, scope = divmod(code, 4)
+        yield anio, scope, method, label, value
+
+
+class RunningSummary:
+    """H. Resumen de emisiones acumulado de forma incremental.
+
+    Keys are ``(anio, scope, scope2_method_code, facility_id)``.
+    """
+
+    def __init__(self) -> None:
+        self.totales: dict[tuple[int, int, int, str], float] = {}
+        self.filas = 0
+
+    def add_result(self, result: EmissionResult, facility_id: str = "") -> None:
+        key = (
+            result.anio,
+            result.scope.value,
+            SCOPE2_METHOD_CODES[result.scope2_method],
+            facility_id,
+        )
+        self.totales[key] = self.totales.get(key, 0.0) + result.tCO2e
+        self.filas += 1
+
+    def add_results(self, results: Iterable[EmissionResult], facility_of: Optional[dict[str, str]] = None) -> None:
+        """Fold scalar results; ``facility_of`` maps source_id -> facility_id."""
+        facility_of = facility_of or {}
+        for r in results:
+            self.add_result(r, facility_of.get(r.source_id, ""))
+
+    def add_table(
+        self,
+        table: EmissionResultTable,
+        facility_idx: Optional[np.ndarray] = None,
+        facility_ids: Sequence[str] = ("",),
+    ) -> None:
+        """Fold a columnar chunk in one grouped reduction.
+
+        ``facility_idx`` gives, per row, an index into ``facility_ids``.
+        """
+        n = len(table)
+        if n == 0:
+            return
+        if facility_idx is None:
+            facility_idx = np.zeros(n, dtype=np.int64)
+
+        for anio, scope, method, fac, value in _group_table(table, facility_idx, len(facility_ids)):
+            k = (anio, scope, method, facility_ids[fac])
+            self.totales[k] = self.totales.get(k, 0.0) + value
+        self.filas += n
+
+    @property
+    def anios(self) -> list[int]:
+        return sorted({k[0] for k in self.totales})
+
+    def summary(self, anio: int) -> EmissionSummary:
+        """``EmissionSummary`` for ``anio``, same buckets as ``EmissionsEngine.summarize``."""
+        values = [0.0] * N_BUCKETS
+        for (y, scope, method, _), value in self.totales.items():
+            if y == anio:
+                values[_code_bucket(scope, method)] += value
+        return _bucket_summary(anio, values)
+
+    def summaries(self) -> dict[int, EmissionSummary]:
+        return {anio: self.summary(anio) for anio in self.anios}
+
+    def by_facility(self, anio: int) -> dict[str, float]:
+        """Total tCO2e (Scope 1 + Scope 2 LBM + Scope 3) per facility for ``anio``."""
+        totals: dict[str, float] = {}
+        for (y, scope, method, fac), value in self.totales.items():
+            if y == anio and not (scope == 2 and method == _MBM):
+                totals[fac] = totals.get(fac, 0.0) + value
+        return totals
+
+
+class IncrementalSummary:
+    """H. Resumen de emisiones mantenido por deltas.
+
+    Each activity record is tracked under a caller-supplied key (e.g. the
+    activity row ID). ``upsert`` and ``remove`` cost O(1) and ``summary``
+    reads the totals without touching the records. Totals use compensated
+    (Neumaier) summation so they stay within rounding of a full
+    ``EmissionsEngine.summarize`` however many corrections are applied, and a
+    bucket whose last record is removed returns to exactly zero.
+    """
+
+    def __init__(self, org: Optional[Organization] = None):
+        self.org = org
+        self._records: dict[object, tuple[int, int, float]] = {}  # key -> (anio, bucket, tCO2e)
+        # anio -> [sum, compensation, count] per bucket
+        self._totals: dict[int, list[list[float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @classmethod
+    def from_results(
+        cls,
+        results: Iterable[tuple[object, EmissionResult]],
+        org: Optional[Organization] = None,
+    ) -> IncrementalSummary:
+        inc = cls(org)
+        for key, result in results:
+            inc.upsert(key, result)
+        return inc
+
+    def upsert(self, key: object, result: EmissionResult) -> None:
+        """Insert a record or replace the one stored under ``key``."""
+        previous = self._records.get(key)
+        if previous is not None:
+            self._apply(previous[0], previous[1], -previous[2], -1)
+        record = (result.anio, scope_bucket(result.scope, result.scope2_method), result.tCO2e)
+        self._records[key] = record
+        self._apply(record[0], record[1], record[2], 1)
+
+    def remove(self, key: object) -> None:
+        """Delete the record stored under ``key``.
+
+        Raises:
+            KeyError: if ``key`` is not tracked.
+        """
+        anio, bucket, value = self._records.pop(key)
+        self._apply(anio, bucket, -value, -1)
+
+    @property
+    def anios(self) -> list[int]:
+        return sorted(self._totals)
+
+    def summary(self, anio: int) -> EmissionSummary:
+        """Current ``EmissionSummary`` for ``anio`` (with intensities if ``org`` is set)."""
+        totals = self._totals.get(anio)
+        values = [t[0] + t[1] for t in totals] if totals else [0.0] * N_BUCKETS
+        summary = _bucket_summary(anio, values)
+        if self.org is not None:
+            summary.compute_intensities(self.org)
+        return summary
+
+    # --- Private helpers ---
+
+    def _apply(self, anio: int, bucket: int, delta: float, count: int) -> None:
+        totals = self._totals.get(anio)
+        if totals is None:
+            totals = self._totals[anio] = [[0.0, 0.0, 0] for _ in range(N_BUCKETS)]
+        cell = totals[bucket]
+        cell[2] += count
+        if cell[2] == 0:
+            cell[0] = cell[1] = 0.0
+            return
+        s = cell[0]
+        t = s + delta
+        if abs(s) >= abs(delta):
+            cell[1] += (s - t) + delta
+        else:
+            cell[1] += (delta - t) + s
+        cell[0] = t
+
+
+class EmissionCube:
+    """H. Cubo de agregación multi-año y multi-dimensión.
+
+    Cells are keyed by ``(anio, scope, scope2_method_code, facility_id,
+    categoria)``. The cube is additive: several result lists or columnar
+    chunks can be folded into the same cube.
+    """
+
+    DIMENSIONS = ("anio", "scope", "scope2_method", "facility", "categoria")
+
+    def __init__(self) -> None:
+        self.celdas: dict[tuple[int, int, int, str, str], float] = {}
+
+    def __len__(self) -> int:
+        return len(self.celdas)
+
+    @classmethod
+    def from_results(cls, results: Iterable[EmissionResult], sources: Iterable[EmissionSource]) -> EmissionCube:
+        cube = cls()
+        cube.add_results(results, sources)
+        return cube
+
+    def add_results(self, results: Iterable[EmissionResult], sources: Iterable[EmissionSource]) -> None:
+        """Fold results in a single pass; unknown sources land in facility/category ``""``."""
+        labels = {s.id: (s.facility_id, s.categoria) for s in sources}
+        celdas = self.celdas
+        for r in results:
+            facility, categoria = labels.get(r.source_id, ("", ""))
+            key = (r.anio, r.scope.value, SCOPE2_METHOD_CODES[r.scope2_method], facility, categoria)
+            celdas[key] = celdas.get(key, 0.0) + r.tCO2e
+
+    def add_table(self, table: EmissionResultTable, sources: Sequence[EmissionSource]) -> None:
+        """Fold a columnar table whose ``source_idx`` indexes ``sources``."""
+        if len(table) == 0:
+            return
+        label_ids: dict[tuple[str, str], int] = {}
+        source_label = np.array(
+            [label_ids.setdefault((s.facility_id, s.categoria), len(label_ids)) for s in sources],
+            dtype=np.int64,
+        )
+        labels = list(label_ids)
+
+        celdas = self.celdas
+        for anio, scope, method, label, value in _group_table(table, source_label[table.source_idx], len(labels)):
+            k = (anio, scope, method, *labels[label])
+            celdas[k] = celdas.get(k, 0.0) + value
+
+    @property
+    def anios(self) -> list[int]:
+        return sorted({k[0] for k in self.celdas})
+
+    def rollup(
+        self,
+        *dims: str,
+        metodo_scope2: Optional[Scope2Method] = Scope2Method.LOCATION_BASED,
+        **filtros,
+    ) -> dict[tuple, float]:
+        """Aggregate the cube onto ``dims``, keeping only cells matching ``filtros``.
+
+        Scope 2 cells of the other accounting method are excluded so that
+        totals are not double counted (``metodo_scope2=None`` keeps both).
+
+        Example::
+
+            cube.rollup("facility", anio=2023)           # {("F1",): 120.5, ...}
+            cube.rollup("anio", "categoria", scope=1)
+        """
+        positions = [self.DIMENSIONS.index(d) for d in dims]
+        filters = [(self.DIMENSIONS.index(d), v) for d, v in filtros.items()]
+        excluded = None
+        if metodo_scope2 is not None:
+            excluded = _MBM if metodo_scope2 == Scope2Method.LOCATION_BASED else SCOPE2_METHOD_CODES[Scope2Method.LOCATION_BASED]
+
+        out: dict[tuple, float] = {}
+        for key, value in self.celdas.items():
+            if excluded is not None and key[1] == 2 and key[2] == excluded:
+                continue
+            if any(key[pos] != v for pos, v in filters):
+                continue
+            group = tuple(key[p] for p in positions)
+            out[group] = out.get(group, 0.0) + value
+        return out
+
+    def summary(self, anio: int) -> EmissionSummary:
+        """``EmissionSummary`` for ``anio``, same buckets as ``EmissionsEngine.summarize``."""
+        values = [0.0] * N_BUCKETS
+        for (anio_celda, scope, method, _, _), value in self.celdas.items():
+            if anio_celda == anio:
+                values[_code_bucket(scope, method)] += value
+        return _bucket_summary(anio, values)
+
+    def summaries(self) -> dict[int, EmissionSummary]:
+        """One ``EmissionSummary`` per year, from a single pass over the cells."""
+        values: dict[int, list[float]] = {}
+        for (anio, scope, method, _, _), value in self.celdas.items():
+            year = values.get(anio)
+            if year is None:
+                year = values[anio] = [0.0] * N_BUCKETS
+            year[_code_bucket(scope, method)] += value
+        return {anio: _bucket_summary(anio, values[anio]) for anio in sorted(values)}
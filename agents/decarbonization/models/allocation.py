@@ -0,0 +1,232 @@
+"""
+Phase 1 — Asignación Interna por Drivers
+========================================
+Spreads facility- and source-level emissions to departments (cost centres)
+and products to populate ``InternalAllocation``.
+
+Each allocation driver (floor area, machine hours, revenue, units
+produced...) is a sparse ``origen × destino`` matrix stored as COO triplets,
+e.g. m² of each department in each facility, or units of each SKU made by
+each cost centre. Rows are normalised to shares, and allocating a vector of
+emissions is one sparse matrix-vector product (``np.bincount`` over the
+non-zero entries):
+
+    destino[j] = Σ_i emisiones[i] * valor[i, j] / Σ_j' valor[i, j']
+
+Sources are pooled per (driver, facility) first, so the cost is linear in
+the number of non-zero driver entries. Allocations can be chained, e.g.
+facilities → departments → products.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from .inventory import EmissionResult, EmissionSource, InternalAllocation, Scope2Method
+
+
+class DriverMatrix:
+    """Sparse allocation driver between two sets of entities."""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.origenes: list[str] = []
+        self.destinos: list[str] = []
+        self._origen_pos: dict[str, int] = {}
+        self._destino_pos: dict[str, int] = {}
+        self._rows: list[int] = []
+        self._cols: list[int] = []
+        self._values: list[float] = []
+        self._shares: Optional[tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def from_records(cls, nombre: str, registros: Iterable[tuple[str, str, float]]) -> DriverMatrix:
+        """Build from ``(origen, destino, valor)`` records."""
+        matrix = cls(nombre)
+        for origen, destino, valor in registros:
+            matrix.add(origen, destino, valor)
+        return matrix
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, origen: str) -> bool:
+        return origen in self._origen_pos
+
+    def add(self, origen: str, destino: str, valor: float) -> None:
+        if valor < 0:
+            raise ValueError(f"Valor de driver negativo para {origen} -> {destino}: {valor}")
+        self._rows.append(self._intern(self._origen_pos, self.origenes, origen))
+        self._cols.append(self._intern(self._destino_pos, self.destinos, destino))
+        self._values.append(valor)
+        self._shares = None
+
+    def origen_index(self, origenes: Sequence[str]) -> np.ndarray:
+        """Positions of ``origenes``; entities without driver data map to -1."""
+        return np.fromiter((self._origen_pos.get(o, -1) for o in origenes), dtype=np.int64, count=len(origenes))
+
+    def shares(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Row-normalised COO triplets ``(fila, columna, cuota)`` (cached)."""
+        if self._shares is None:
+            rows = np.asarray(self._rows, dtype=np.int64)
+            cols = np.asarray(self._cols, dtype=np.int64)
+            values = np.asarray(self._values, dtype=np.float64)
+            totals = np.bincount(rows, weights=values, minlength=len(self.origenes))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                share = np.where(totals[rows] > 0, values / totals[rows], 0.0)
+            self._shares = (rows, cols, share)
+        return self._shares
+
+    def allocable(self) -> np.ndarray:
+        """Per origin: ``True`` if it has a positive driver total."""
+        rows, _, share = self.shares()
+        return np.bincount(rows, weights=share, minlength=len(self.origenes)) > 0
+
+    def apply(self, valores: np.ndarray) -> np.ndarray:
+        """Allocate a vector aligned with ``origenes`` onto ``destinos``."""
+        rows, cols, share = self.shares()
+        return np.bincount(cols, weights=np.asarray(valores, dtype=np.float64)[rows] * share,
+                           minlength=len(self.destinos))
+
+    @staticmethod
+    def _intern(pos: dict[str, int], names: list[str], name: str) -> int:
+        idx = pos.get(name)
+        if idx is None:
+            idx = pos[name] = len(names)
+            names.append(name)
+        return idx
+
+
+@dataclass
+class AllocationResult:
+    """Allocated emissions per target entity."""
+    tipo: str
+    destinos: list[str]
+    tCO2e: np.ndarray
+    sin_asignar_tCO2e: float = 0.0
+    sin_asignar: dict[str, float] = field(default_factory=dict)   # origin -> tCO2e without driver data
+
+    @property
+    def total_tCO2e(self) -> float:
+        return float(self.tCO2e.sum())
+
+    def to_records(self) -> list[InternalAllocation]:
+        """``InternalAllocation`` records for every target with emissions."""
+        total = self.total_tCO2e + self.sin_asignar_tCO2e
+        scale = 100.0 / total if total else 0.0
+        tipo = self.tipo
+        return [
+            InternalAllocation(entidad=self.destinos[i], tipo=tipo, tCO2e_asignado=float(v), porcentaje=float(v) * scale)
+            for i, v in zip(np.flatnonzero(self.tCO2e).tolist(), self.tCO2e[self.tCO2e != 0].tolist())
+        ]
+
+
+class AllocationEngine:
+    """Driver-based allocation of inventory results.
+
+    Args:
+        drivers: driver matrices by name, with facilities (or sources) as
+            origins.
+        driver_por_categoria: source category → driver name; sources whose
+            category is not listed use ``driver_por_defecto``.
+        driver_por_defecto: default driver name.
+    """
+
+    def __init__(
+        self,
+        drivers: dict[str, DriverMatrix],
+        driver_por_categoria: Optional[dict[str, str]] = None,
+        driver_por_defecto: Optional[str] = None,
+    ):
+        self.drivers = drivers
+        self.driver_por_categoria = driver_por_categoria or {}
+        self.driver_por_defecto = driver_por_defecto or next(iter(drivers), None)
+
+    def allocate_results(
+        self,
+        sources: Sequence[EmissionSource],
+        results: Iterable[EmissionResult],
+        anio: int,
+        tipo: str = "departamento",
+    ) -> AllocationResult:
+        """Allocate ``anio``'s results of each source via its facility's driver.
+
+        Scope 2 is allocated from location-based results, as in
+        ``EmissionSummary.total_tCO2e``. A driver may also list a source ID as
+        origin, which then takes precedence over its facility.
+        """
+        by_source: dict[str, float] = {}
+        for r in results:
+            if r.anio == anio and r.scope2_method != Scope2Method.MARKET_BASED:
+                by_source[r.source_id] = by_source.get(r.source_id, 0.0) + r.tCO2e
+
+        pooled: dict[str, dict[str, float]] = {}  # driver -> origin -> tCO2e
+        for s in sources:
+            tCO2e = by_source.get(s.id, 0.0)
+            if not tCO2e:
+                continue
+            driver = self.driver_por_categoria.get(s.categoria, self.driver_por_defecto)
+            if driver not in self.drivers:
+                raise KeyError(f"Driver de asignación no definido: {driver}")
+            origen = s.id if s.id in self.drivers[driver] else s.facility_id
+            pool = pooled.setdefault(driver, {})
+            pool[origen] = pool.get(origen, 0.0) + tCO2e
+
+        destinos: dict[str, int] = {}
+        parts: list[tuple[np.ndarray, np.ndarray]] = []
+        sin_asignar: dict[str, float] = {}
+        for driver, pool in pooled.items():
+            matrix = self.drivers[driver]
+            aligned = _align(matrix, list(pool), np.fromiter(pool.values(), dtype=np.float64, count=len(pool)),
+                             sin_asignar)
+            col_map = np.fromiter(
+                (destinos.setdefault(d, len(destinos)) for d in matrix.destinos),
+                dtype=np.int64, count=len(matrix.destinos),
+            )
+            parts.append((col_map, matrix.apply(aligned)))
+
+        allocated = np.zeros(len(destinos))
+        for col_map, values in parts:
+            allocated[col_map] += values  # destinos are unique within a driver
+        return AllocationResult(
+            tipo=tipo,
+            destinos=list(destinos),
+            tCO2e=allocated,
+            sin_asignar_tCO2e=sum(sin_asignar.values()),
+            sin_asignar=sin_asignar,
+        )
+
+    @staticmethod
+    def chain(previo: AllocationResult, driver: DriverMatrix, tipo: str = "producto") -> AllocationResult:
+        """Re-allocate a previous result (e.g. departments) with ``driver``
+        (e.g. cost centre → SKU units)."""
+        sin_asignar = dict(previo.sin_asignar)
+        aligned = _align(driver, previo.destinos, previo.tCO2e, sin_asignar)
+        return AllocationResult(
+            tipo=tipo,
+            destinos=list(driver.destinos),
+            tCO2e=driver.apply(aligned),
+            sin_asignar_tCO2e=sum(sin_asignar.values()),
+            sin_asignar=sin_asignar,
+        )
+
+
+def _align(
+    matrix: DriverMatrix,
+    origenes: Sequence[str],
+    valores: np.ndarray,
+    sin_asignar: dict[str, float],
+) -> np.ndarray:
+    """Scatter ``valores`` onto ``matrix.origenes``; origins without a positive
+    driver total are added to ``sin_asignar`` instead."""
+    pos = matrix.origen_index(origenes)
+    ok = pos >= 0
+    ok[ok] = matrix.allocable()[pos[ok]]
+    for i in np.flatnonzero(~ok & (valores != 0)):
+        sin_asignar[origenes[i]] = sin_asignar.get(origenes[i], 0.0) + float(valores[i])
+    aligned = np.zeros(len(matrix.origenes))
+    np.add.at(aligned, pos[ok], valores[ok])
+    return aligned
@@ -0,0 +1,222 @@
+"""
+Phase 1 — Motor de Cálculo Columnar
+===================================
+Vectorised counterpart of ``EmissionsEngine.calculate`` / ``build_result``
+for inventories with millions of activity lines.
+
+Activity rows are passed as column arrays and evaluated in a single NumPy
+pass with the same operation order as the scalar formula, so every row
+yields exactly the same tCO2e as ``EmissionsEngine.calculate``:
+
+    Emisiones (tCO2e) = Dato_de_Actividad * Factor_de_Emision * GWP * Factor_de_Consolidacion / 1000
+
+Results are returned as an ``EmissionResultTable`` (one typed array per
+attribute, 16 bytes per row) instead of one ``EmissionResult`` per row.
+Indexing or iterating the table yields ``EmissionResultRow`` views exposing
+the ``EmissionResult`` attribute names, so consumers such as
+``DiagnosticAgent`` and the reporting utilities accept either form.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from .inventory import EmissionResult, EmissionSummary, Scope, Scope2Method
+
+
+# ---------------------------------------------------------------------------
+# Small-int codes for the categorical columns
+# ---------------------------------------------------------------------------
+
+SCOPE2_METHOD_NONE = 0
+SCOPE2_METHOD_CODES: dict[Optional[Scope2Method], int] = {
+    None: SCOPE2_METHOD_NONE,
+    Scope2Method.LOCATION_BASED: 1,
+    Scope2Method.MARKET_BASED: 2,
+}
+SCOPE2_METHOD_BY_CODE: dict[int, Optional[Scope2Method]] = {
+    code: method for method, code in SCOPE2_METHOD_CODES.items()
+}
+SCOPE_BY_CODE: dict[int, Scope] = {s.value: s for s in Scope}
+
+
+class EmissionResultRow:
+    """Read-only view of one ``EmissionResultTable`` row.
+
+    Exposes the same attributes as ``EmissionResult`` without copying the row.
+    """
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table: EmissionResultTable, i: int):
+        self._table = table
+        self._i = i
+
+    @property
+    def source_id(self) -> str:
+        idx = int(self._table.source_idx[self._i])
+        return self._table.source_ids[idx] if self._table.source_ids else str(idx)
+
+    @property
+    def scope(self) -> Scope:
+        return SCOPE_BY_CODE[int(self._table.scope[self._i])]
+
+    @property
+    def tCO2e(self) -> float:
+        return float(self._table.tCO2e[self._i])
+
+    @property
+    def anio(self) -> int:
+        return int(self._table.anio[self._i])
+
+    @property
+    def scope2_method(self) -> Optional[Scope2Method]:
+        return SCOPE2_METHOD_BY_CODE[int(self._table.scope2_method[self._i])]
+
+    def __repr__(self) -> str:
+        return (
+            f"EmissionResultRow(source_id={self.source_id!r}, scope={self.scope}, "
+            f"tCO2e={self.tCO2e!r}, anio={self.anio}, scope2_method={self.scope2_method})"
+        )
+
+
+@dataclass
+class EmissionResultTable:
+    """H. Output columnar del motor de cálculo.
+
+    Row ``i`` is equivalent to an ``EmissionResult`` whose ``source_id`` is
+    ``source_ids[source_idx[i]]``.
+    """
+    source_idx: np.ndarray      # int32 index into ``source_ids``
+    scope: np.ndarray           # int8: 1, 2, 3
+    scope2_method: np.ndarray   # int8: 0 = n/a, 1 = LBM, 2 = MBM
+    anio: np.ndarray            # int16
+    tCO2e: np.ndarray           # float64
+    source_ids: list[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return int(self.tCO2e.shape[0])
+
+    def __getitem__(self, i: int) -> EmissionResultRow:
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return EmissionResultRow(self, i % len(self))
+
+    def __iter__(self) -> Iterator[EmissionResultRow]:
+        return (EmissionResultRow(self, i) for i in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays (excluding the shared ``source_ids``)."""
+        return sum(a.nbytes for a in (self.source_idx, self.scope, self.scope2_method, self.anio, self.tCO2e))
+
+    @classmethod
+    def from_results(cls, results: Iterable[EmissionResult]) -> EmissionResultTable:
+        """Pack ``EmissionResult`` objects into columns, interning source IDs."""
+        positions: dict[str, int] = {}
+        idx, scope, method, anio, tco2e = [], [], [], [], []
+        for r in results:
+            idx.append(positions.setdefault(r.source_id, len(positions)))
+            scope.append(r.scope.value)
+            method.append(SCOPE2_METHOD_CODES[r.scope2_method])
+            anio.append(r.anio)
+            tco2e.append(r.tCO2e)
+        return cls(
+            source_idx=np.array(idx, dtype=np.int32),
+            scope=np.array(scope, dtype=np.int8),
+            scope2_method=np.array(method, dtype=np.int8),
+            anio=np.array(anio, dtype=np.int16),
+            tCO2e=np.array(tco2e, dtype=np.float64),
+            source_ids=list(positions),
+        )
+
+    def summarize(self, anio: int) -> EmissionSummary:
+        """Columnar equivalent of ``EmissionsEngine.summarize``."""
+        mask = self.anio == anio
+        scope = self.scope[mask]
+        method = self.scope2_method[mask]
+        values = self.tCO2e[mask]
+        mbm = method == SCOPE2_METHOD_CODES[Scope2Method.MARKET_BASED]
+        return EmissionSummary(
+            anio=anio,
+            scope_1_tCO2e=float(values[scope == 1].sum()),
+            scope_2_lbm_tCO2e=float(values[(scope == 2) & ~mbm].sum()),
+            scope_2_mbm_tCO2e=float(values[(scope == 2) & mbm].sum()),
+            scope_3_tCO2e=float(values[scope == 3].sum()),
+        )
+
+    def to_results(self) -> list[EmissionResult]:
+        """Materialise the table as ``EmissionResult`` objects."""
+        return [
+            EmissionResult(
+                source_id=self.source_ids[idx] if self.source_ids else str(idx),
+                scope=SCOPE_BY_CODE[scope],
+                tCO2e=tco2e,
+                anio=anio,
+                scope2_method=SCOPE2_METHOD_BY_CODE[method],
+            )
+            for idx, scope, method, anio, tco2e in zip(
+                self.source_idx.tolist(),
+                self.scope.tolist(),
+                self.scope2_method.tolist(),
+                self.anio.tolist(),
+                self.tCO2e.tolist(),
+            )
+        ]
+
+
+def calculate_columns(
+    cantidad: np.ndarray,
+    factor: np.ndarray,
+    gwp: np.ndarray,
+    factor_consolidacion: float,
+    conversion: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Apply the core GHG formula to whole columns and return tCO2e.
+
+    The multiplications run in the same order as ``EmissionsEngine.calculate``
+    and in place on a single output buffer, so results are bit-identical to
+    the scalar path and peak memory stays at one extra float64 column.
+    ``conversion`` holds per-row unit conversion factors into the factor unit.
+    """
+    out = np.array(cantidad, dtype=np.float64)
+    if conversion is not None:
+        out *= conversion
+    out *= np.asarray(factor, dtype=np.float64)
+    out *= np.asarray(gwp, dtype=np.float64)
+    out *= factor_consolidacion
+    out /= 1000.0  # kg -> tonnes
+    return out
+
+
+def build_table(
+    tCO2e: np.ndarray,
+    scope: np.ndarray,
+    anio: np.ndarray,
+    source_idx: np.ndarray,
+    scope2_method: Scope2Method | np.ndarray | None = None,
+    source_ids: Optional[Sequence[str]] = None,
+) -> EmissionResultTable:
+    """Pack calculated emissions and their labels into an ``EmissionResultTable``.
+
+    ``scope2_method`` follows ``EmissionsEngine.build_result``: a single
+    method (or per-row code array) that only applies to Scope 2 rows.
+    """
+    scope = np.asarray(scope, dtype=np.int8)
+    if scope2_method is None or isinstance(scope2_method, Scope2Method):
+        method = np.full(scope.shape, SCOPE2_METHOD_CODES[scope2_method], dtype=np.int8)
+    else:
+        method = np.array(scope2_method, dtype=np.int8)
+    method[scope != Scope.SCOPE_2.value] = SCOPE2_METHOD_NONE
+
+    return EmissionResultTable(
+        source_idx=np.asarray(source_idx, dtype=np.int32),
+        scope=scope,
+        scope2_method=method,
+        anio=np.asarray(anio, dtype=np.int16),
+        tCO2e=tCO2e,
+        source_ids=list(source_ids) if source_ids is not None else [],
+    )
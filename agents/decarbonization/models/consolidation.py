@@ -0,0 +1,178 @@
+"""
+Phase 1 — Consolidación Multi-Entidad
+=====================================
+Corporate groups as a tree of parent → subsidiary / JV links.
+
+Each link carries the parent's equity share in the child and whether the
+parent has financial and operational control over it. The effective
+consolidation factor of an entity is derived along its path to the root
+(GHG Protocol, chapter 3):
+
+    equity_share          product of the equity shares on the path
+    financial_control     100 % while every link is controlled; a jointly
+                          controlled JV (``conjunto``) is taken at its equity
+                          share; uncontrolled links drop to 0 %
+    operational_control   100 % while every link is operationally controlled
+
+Factors are computed for every node in one top-down pass per consolidation
+type and cached. ``rollup`` then scales each entity's 100 % summary and sums
+the group bottom-up in a single O(n) pass.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from .inventory import ConsolidationConfig, ConsolidationType, EmissionSummary
+
+
+@dataclass
+class OwnershipLink:
+    """Participación de ``padre`` en ``hijo``."""
+    padre: str
+    hijo: str
+    participacion_porcentaje: float
+    control_financiero: bool = False
+    control_operacional: bool = False
+    conjunto: bool = False  # joint financial control (JV)
+
+
+@dataclass
+class ConsolidatedSummary:
+    """Group roll-up under one consolidation type."""
+    tipo: ConsolidationType
+    consolidado: EmissionSummary
+    por_entidad: dict[str, EmissionSummary] = field(default_factory=dict)   # entity's share in the group
+    por_subgrupo: dict[str, EmissionSummary] = field(default_factory=dict)  # entity + its subsidiaries
+
+
+_FIELDS = ("scope_1_tCO2e", "scope_2_lbm_tCO2e", "scope_2_mbm_tCO2e", "scope_3_tCO2e")
+
+
+class ConsolidationTree:
+    """Ownership tree of a corporate group.
+
+    Every entity has at most one parent; the entity without a parent is the
+    reporting company.
+    """
+
+    def __init__(self, raiz: str):
+        self.raiz = raiz
+        self._links: dict[str, OwnershipLink] = {}       # child -> link from its parent
+        self._children: dict[str, list[str]] = {raiz: []}
+        self._order: Optional[list[str]] = None          # top-down (parents first)
+        self._factors: dict[ConsolidationType, dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._children)
+
+    def __contains__(self, entidad: str) -> bool:
+        return entidad in self._children
+
+    def add_link(
+        self,
+        padre: str,
+        hijo: str,
+        participacion_porcentaje: float,
+        control_financiero: Optional[bool] = None,
+        control_operacional: Optional[bool] = None,
+        conjunto: bool = False,
+    ) -> OwnershipLink:
+        """Attach ``hijo`` under ``padre``.
+
+        Control defaults to a majority stake; operational control defaults
+        to financial control.
+        """
+        if padre not in self._children:
+            raise KeyError(f"Entidad desconocida: {padre}")
+        if hijo == self.raiz or hijo in self._links:
+            raise ValueError(f"{hijo} ya tiene matriz en el árbol")
+        if control_financiero is None:
+            control_financiero = participacion_porcentaje > 50.0
+        if control_operacional is None:
+            control_operacional = control_financiero
+        link = OwnershipLink(padre, hijo, participacion_porcentaje, control_financiero, control_operacional, conjunto)
+        self._links[hijo] = link
+        self._children.setdefault(hijo, [])
+        self._children[padre].append(hijo)
+        self._order = None
+        self._factors.clear()
+        return link
+
+    def entidades(self) -> list[str]:
+        """Entities top-down: every parent precedes its subsidiaries."""
+        if self._order is None:
+            order = [self.raiz]
+            for entidad in order:  # grows while iterating: breadth-first
+                order.extend(self._children[entidad])
+            self._order = order
+        return self._order
+
+    def padre(self, entidad: str) -> Optional[str]:
+        link = self._links.get(entidad)
+        return link.padre if link else None
+
+    def factores(self, tipo: ConsolidationType) -> dict[str, float]:
+        """Effective consolidation factor (0-1) of every entity under ``tipo``."""
+        cached = self._factors.get(tipo)
+        if cached is not None:
+            return cached
+        factors = {self.raiz: 1.0}
+        for entidad in self.entidades()[1:]:
+            link = self._links[entidad]
+            share = link.participacion_porcentaje / 100.0
+            if tipo == ConsolidationType.EQUITY_SHARE:
+                own = share
+            elif tipo == ConsolidationType.FINANCIAL_CONTROL:
+                own = 1.0 if link.control_financiero else share if link.conjunto else 0.0
+            else:
+                own = 1.0 if link.control_operacional else 0.0
+            factors[entidad] = factors[link.padre] * own
+        self._factors[tipo] = factors
+        return factors
+
+    def factor(self, entidad: str, tipo: ConsolidationType) -> float:
+        return self.factores(tipo)[entidad]
+
+    def config(self, entidad: str, tipo: ConsolidationType) -> ConsolidationConfig:
+        """``ConsolidationConfig`` for running an ``EmissionsEngine`` on one entity."""
+        return ConsolidationConfig(tipo=tipo, participacion_porcentaje=self.factor(entidad, tipo) * 100.0)
+
+    def rollup(
+        self,
+        resumenes: dict[str, EmissionSummary],
+        tipo: ConsolidationType,
+        anio: int,
+    ) -> ConsolidatedSummary:
+        """Consolidate per-entity 100 % summaries into the group inventory.
+
+        ``resumenes`` maps entity → its own emissions at 100 %; entities
+        without a summary contribute nothing.
+        """
+        order = self.entidades()
+        pos = {e: i for i, e in enumerate(order)}
+        factors = self.factores(tipo)
+
+        raw = np.zeros((len(order), len(_FIELDS)))
+        for entidad, s in resumenes.items():
+            raw[pos[entidad]] = (s.scope_1_tCO2e, s.scope_2_lbm_tCO2e, s.scope_2_mbm_tCO2e, s.scope_3_tCO2e)
+        share = raw * np.fromiter((factors[e] for e in order), dtype=np.float64, count=len(order))[:, None]
+
+        # Bottom-up: children appear after their parent, so walk in reverse.
+        subtree = share.copy()
+        parent_pos = [pos[self._links[e].padre] for e in order[1:]]
+        for i in range(len(order) - 1, 0, -1):
+            subtree[parent_pos[i - 1]] += subtree[i]
+
+        def summary(values: np.ndarray) -> EmissionSummary:
+            return EmissionSummary(anio, *(float(v) for v in values))
+
+        return ConsolidatedSummary(
+            tipo=tipo,
+            consolidado=summary(subtree[0]),
+            por_entidad={e: summary(share[i]) for i, e in enumerate(order)},
+            por_subgrupo={e: summary(subtree[i]) for i, e in enumerate(order)},
+        )
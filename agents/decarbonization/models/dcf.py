@@ -0,0 +1,154 @@
+"""
+Phase 4 — Flujo de Caja Descontado de Medidas
+=============================================
+Discounted cash flows of reduction measures, for a whole portfolio as one
+``medidas × años`` matrix (column 0 = CAPEX, then one column per year of
+useful life, zero past each measure's life):
+
+    F[m, 0] = -CAPEX_m
+    F[m, t] = ahorro_m * ((1 + inflación) * (1 + escalado_energía)) ** (t - 1),   1 <= t <= vida_m
+    VAN_m   = Σ_t F[m, t] / (1 + r) ** τ_t
+
+``τ_t`` places each year's savings at its end (``t``), middle (``t - 0.5``)
+or start (``t - 1``); CAPEX is always at ``τ = 0``. The discounted MACC is
+the negative NPV per tonne avoided over the measure's life (optionally with
+the tonnes discounted too). The IRR is found for every measure at once by
+bisection of the NPV, and the discounted payback interpolates within the
+year the cumulative discounted flow turns positive, shifted by the same
+savings timing as ``τ``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+OPEX_TIMINGS = {"final": 0.0, "medio": 0.5, "inicio": 1.0}
+
+_IRR_BOUNDS = (-0.99, 10.0)
+_IRR_ITERATIONS = 64
+
+
+@dataclass(frozen=True)
+class DCFAssumptions:
+    """Financial assumptions of the discounted cash-flow mode."""
+    tasa_descuento_pct: float = 7.0       # nominal
+    inflacion_pct: float = 2.0            # escalates the operating savings
+    escalado_energia_pct: float = 0.0     # energy price escalation on top of inflation
+    momento_opex: str = "final"           # "final" | "medio" | "inicio" of each year
+    descontar_emisiones: bool = False     # discount tCO2e in the MACC denominator
+
+    def __post_init__(self):
+        if self.momento_opex not in OPEX_TIMINGS:
+            raise ValueError(f"momento_opex desconocido: {self.momento_opex} (use {', '.join(OPEX_TIMINGS)})")
+        if self.tasa_descuento_pct <= -100.0:
+            raise ValueError("La tasa de descuento debe ser mayor que -100 %")
+
+
+@dataclass
+class DCFResult:
+    """Per-measure DCF metrics (arrays aligned with the input measures)."""
+    flujos: np.ndarray                 # medidas × años nominal cash flows (€)
+    van_eur: np.ndarray
+    macc_eur_per_tCO2e: np.ndarray     # -VAN / tCO2e (inf without reductions)
+    tir_pct: np.ndarray                # NaN without a sign change
+    payback_anios: np.ndarray          # undiscounted, with escalation
+    payback_descontado_anios: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.van_eur)
+
+
+class DCFEngine:
+    """Vectorised NPV, IRR and discounted payback of a set of measures."""
+
+    def __init__(self, supuestos: Optional[DCFAssumptions] = None):
+        self.supuestos = supuestos or DCFAssumptions()
+
+    def cash_flows(self, capex: np.ndarray, ahorro_anual: np.ndarray, vida_util: np.ndarray) -> np.ndarray:
+        """``medidas × (max vida + 1)`` nominal cash flows."""
+        capex, ahorro, vida = self._broadcast(capex, ahorro_anual, vida_util)
+        vida = vida.astype(np.int64)
+        s = self.supuestos
+        t = np.arange(int(vida.max(initial=0)) + 1)
+        growth = ((1.0 + s.inflacion_pct / 100.0) * (1.0 + s.escalado_energia_pct / 100.0)) ** np.maximum(t - 1, 0)
+        flujos = np.where((t >= 1) & (t <= vida[:, None]), ahorro[:, None] * growth, 0.0)
+        flujos[:, 0] = -capex
+        return flujos
+
+    def evaluate(
+        self,
+        capex: np.ndarray,
+        ahorro_anual: np.ndarray,
+        vida_util: np.ndarray,
+        tCO2e_anual: np.ndarray,
+    ) -> DCFResult:
+        capex, ahorro, vida, tco2e = self._broadcast(capex, ahorro_anual, vida_util, tCO2e_anual)
+        vida = vida.astype(np.int64)
+        s = self.supuestos
+        flujos = self.cash_flows(capex, ahorro, vida)
+        tau = self._timing(flujos.shape[1])
+        descuento = (1.0 + s.tasa_descuento_pct / 100.0) ** -tau
+        descontados = flujos * descuento
+        van = descontados.sum(axis=1)
+
+        activo = (np.arange(flujos.shape[1]) >= 1) & (np.arange(flujos.shape[1]) <= vida[:, None])
+        toneladas = tco2e * (activo * descuento).sum(axis=1) if s.descontar_emisiones else tco2e * vida
+        with np.errstate(divide="ignore", invalid="ignore"):
+            macc = np.where(toneladas > 0, -van / toneladas, np.inf)
+
+        return DCFResult(
+            flujos=flujos,
+            van_eur=van,
+            macc_eur_per_tCO2e=macc,
+            tir_pct=self.irr(flujos) * 100.0,
+            payback_anios=self._payback(flujos),
+            payback_descontado_anios=self._payback(descontados),
+        )
+
+    def irr(self, flujos: np.ndarray) -> np.ndarray:
+        """Rate with zero NPV for each row, by bisection (NaN if none in bounds)."""
+        flujos = np.atleast_2d(np.asarray(flujos, dtype=np.float64))
+        tau = self._timing(flujos.shape[1])
+
+        def npv(rate: np.ndarray) -> np.ndarray:
+            return (flujos * (1.0 + rate[:, None]) ** -tau).sum(axis=1)
+
+        lo = np.full(len(flujos), _IRR_BOUNDS[0])
+        hi = np.full(len(flujos), _IRR_BOUNDS[1])
+        f_lo = npv(lo)
+        valid = np.sign(f_lo) * np.sign(npv(hi)) < 0
+        for _ in range(_IRR_ITERATIONS):
+            mid = 0.5 * (lo + hi)
+            f_mid = npv(mid)
+            same = np.sign(f_mid) == np.sign(f_lo)
+            lo = np.where(same, mid, lo)
+            f_lo = np.where(same, f_mid, f_lo)
+            hi = np.where(same, hi, mid)
+        return np.where(valid, 0.5 * (lo + hi), np.nan)
+
+    # --- Private helpers ---
+
+    def _timing(self, n_cols: int) -> np.ndarray:
+        t = np.arange(n_cols, dtype=np.float64)
+        return np.where(t >= 1, t - OPEX_TIMINGS[self.supuestos.momento_opex], 0.0)
+
+    def _payback(self, flujos: np.ndarray) -> np.ndarray:
+        """Years until the cumulative flow turns non-negative (inf if never)."""
+        acumulado = np.cumsum(flujos, axis=1)
+        recuperado = acumulado >= 0
+        k = np.argmax(recuperado, axis=1)
+        rows = np.arange(len(flujos))
+        previo = acumulado[rows, np.maximum(k - 1, 0)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraccion = np.where(k > 0, -previo / flujos[rows, k], 0.0)
+        shift = OPEX_TIMINGS[self.supuestos.momento_opex]
+        payback = np.where(k > 0, np.maximum(k - 1 + fraccion - shift, 0.0), 0.0)
+        return np.where(recuperado.any(axis=1), payback, np.inf)
+
+    @staticmethod
+    def _broadcast(*arrays) -> tuple[np.ndarray, ...]:
+        arrays = (np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in arrays)
+        return tuple(a.copy() for a in np.broadcast_arrays(*arrays))
@@ -0,0 +1,257 @@
+"""
+Phase 1 — Recálculo Dirigido por Factor
+=======================================
+When a publisher (DEFRA, REE, IPCC...) revises an emission factor, only the
+results calculated with that factor need recomputing.
+
+``TrackingEmissionsEngine`` keeps a reverse index from factor ID to the
+results it built, plus an ``IncrementalSummary`` of those results. Both
+per-row results (``build_result``) and columnar tables (``calculate_batch``
+with a factor ID column) are indexed. A factor revision recomputes the
+affected rows, patches the summary with one delta per row (per year and
+scope group for tables) and reports which sources moved.
+``recalculate_book`` applies the same revision across every client engine
+of a portfolio.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from .aggregation import IncrementalSummary
+from .batch import SCOPE2_METHOD_BY_CODE, SCOPE_BY_CODE, EmissionResultTable, calculate_columns
+from .inventory import (
+    ActivityData,
+    ConsolidationConfig,
+    EmissionFactor,
+    EmissionResult,
+    EmissionSource,
+    EmissionsEngine,
+    Scope2Method,
+)
+from .units import UnitRegistry
+
+
+@dataclass
+class FactorChangeReport:
+    """Effect of one factor revision on one organisation."""
+    factor_id: str
+    organizacion: str
+    valor_nuevo: float
+    filas_recalculadas: int = 0
+    fuentes_afectadas: list[str] = field(default_factory=list)
+    delta_por_anio: dict[int, float] = field(default_factory=dict)  # year -> Δ tCO2e
+
+    @property
+    def delta_total_tCO2e(self) -> float:
+        return sum(self.delta_por_anio.values())
+
+
+@dataclass
+class _TrackedTable:
+    """Inputs kept to recompute the rows of one ``calculate_batch`` table."""
+    tabla: EmissionResultTable
+    cantidad: np.ndarray
+    gwp: np.ndarray
+    factor_idx: np.ndarray                 # per row, index into ``factor_ids``
+    factor_ids: list[str]
+    unidad: Optional[np.ndarray]
+    unidad_factor: Optional[np.ndarray]
+    grupos: dict[int, float]               # (año, scope, método) code -> tCO2e
+
+
+class TrackingEmissionsEngine(EmissionsEngine):
+    """``EmissionsEngine`` that remembers which factor produced each result.
+
+    Results returned by ``build_result`` and tables returned by
+    ``calculate_batch`` (when given ``factor_idx`` / ``factor_ids``) are
+    also folded into ``resumen``, an ``IncrementalSummary`` that stays
+    current across factor revisions. Tables are updated in place.
+    """
+
+    def __init__(
+        self,
+        consolidation: ConsolidationConfig,
+        units: Optional[UnitRegistry] = None,
+        organizacion: str = "",
+    ):
+        super().__init__(consolidation, units)
+        self.organizacion = organizacion
+        self.resumen = IncrementalSummary()
+        self._rows: list[tuple[EmissionResult, ActivityData, EmissionFactor]] = []
+        self._by_factor: dict[str, list[int]] = {}
+        self._tables: list[_TrackedTable] = []
+        self._tables_by_factor: dict[str, list[int]] = {}
+
+    @property
+    def results(self) -> list[EmissionResult]:
+        return [row[0] for row in self._rows]
+
+    @property
+    def tables(self) -> list[EmissionResultTable]:
+        return [t.tabla for t in self._tables]
+
+    def build_result(
+        self,
+        activity: ActivityData,
+        factor: EmissionFactor,
+        source: EmissionSource,
+        scope2_method: Optional[Scope2Method] = None,
+    ) -> EmissionResult:
+        result = super().build_result(activity, factor, source, scope2_method)
+        key = len(self._rows)
+        self._rows.append((result, activity, factor))
+        self._by_factor.setdefault(factor.id, []).append(key)
+        self.resumen.upsert(key, result)
+        return result
+
+    def calculate_batch(
+        self,
+        cantidad,
+        factor,
+        gwp,
+        scope,
+        anio,
+        source_idx,
+        scope2_method=None,
+        source_ids=None,
+        unidad=None,
+        unidad_factor=None,
+        factor_idx: Optional[np.ndarray] = None,
+        factor_ids: Optional[Sequence[str]] = None,
+    ) -> EmissionResultTable:
+        """``EmissionsEngine.calculate_batch`` that indexes the table by factor.
+
+        ``factor_idx`` gives, per row, an index into ``factor_ids``. Tables
+        calculated without them are returned untracked.
+        """
+        table = super().calculate_batch(
+            cantidad, factor, gwp, scope, anio, source_idx, scope2_method, source_ids, unidad, unidad_factor,
+        )
+        if factor_idx is None or factor_ids is None:
+            return table
+
+        factor_idx = np.asarray(factor_idx, dtype=np.int32)
+        codes, sums = self._group_sums(table, np.arange(len(table)), table.tCO2e)
+        tracked = _TrackedTable(
+            tabla=table,
+            cantidad=np.asarray(cantidad, dtype=np.float64),
+            gwp=np.broadcast_to(np.asarray(gwp, dtype=np.float64), table.tCO2e.shape),
+            factor_idx=factor_idx,
+            factor_ids=list(factor_ids),
+            unidad=None if unidad is None else np.asarray(unidad),
+            unidad_factor=None if unidad_factor is None else np.asarray(unidad_factor),
+            grupos=dict(zip(codes.tolist(), sums.tolist())),
+        )
+        n = len(self._tables)
+        self._tables.append(tracked)
+        for code in np.unique(factor_idx).tolist():
+            self._tables_by_factor.setdefault(tracked.factor_ids[code], []).append(n)
+        for code, value in tracked.grupos.items():
+            self._upsert_group(n, code, value)
+        return table
+
+    def recalculate_for_factor_change(self, factor_id: str, new_value: float) -> FactorChangeReport:
+        """Recompute only the results that used ``factor_id`` with ``new_value``.
+
+        Affected ``EmissionResult`` objects are updated in place and the
+        revised factor replaces the old one for future revisions; the original
+        ``EmissionFactor`` objects (possibly shared with a registry) are not
+        mutated.
+        """
+        report = FactorChangeReport(factor_id=factor_id, organizacion=self.organizacion, valor_nuevo=new_value)
+        revised: dict[int, EmissionFactor] = {}  # id(old factor) -> revised copy
+        moved: dict[str, None] = {}
+
+        for key in self._by_factor.get(factor_id, ()):
+            result, activity, factor = self._rows[key]
+            new_factor = revised.get(id(factor))
+            if new_factor is None:
+                new_factor = revised[id(factor)] = replace(factor, factor=new_value)
+            self._rows[key] = (result, activity, new_factor)
+
+            tCO2e = self.calculate(activity, new_factor)
+            delta = tCO2e - result.tCO2e
+            report.filas_recalculadas += 1
+            if delta == 0.0:
+                continue
+            result.tCO2e = tCO2e
+            self.resumen.upsert(key, result)
+            moved[result.source_id] = None
+            report.delta_por_anio[result.anio] = report.delta_por_anio.get(result.anio, 0.0) + delta
+
+        for n in self._tables_by_factor.get(factor_id, ()):
+            self._recalculate_table(n, factor_id, new_value, report, moved)
+
+        report.fuentes_afectadas = list(moved)
+        return report
+
+    # --- Private helpers ---
+
+    def _recalculate_table(
+        self,
+        n: int,
+        factor_id: str,
+        new_value: float,
+        report: FactorChangeReport,
+        moved: dict[str, None],
+    ) -> None:
+        tracked = self._tables[n]
+        table = tracked.tabla
+        rows = np.flatnonzero(tracked.factor_idx == tracked.factor_ids.index(factor_id))
+        conversion = None
+        if tracked.unidad is not None and tracked.unidad_factor is not None:
+            conversion = self.units.conversion_column(tracked.unidad[rows], tracked.unidad_factor[rows])
+        tCO2e = calculate_columns(
+            tracked.cantidad[rows], new_value, tracked.gwp[rows], self.consolidation.factor_consolidacion, conversion,
+        )
+        delta = tCO2e - table.tCO2e[rows]
+        report.filas_recalculadas += len(rows)
+        changed = delta != 0.0
+        if not changed.any():
+            return
+        rows, delta = rows[changed], delta[changed]
+        table.tCO2e[rows] = tCO2e[changed]
+
+        for code, value in zip(*(a.tolist() for a in self._group_sums(table, rows, delta))):
+            tracked.grupos[code] += value
+            self._upsert_group(n, code, tracked.grupos[code])
+            anio = code // 12   # code = (año * 4 + scope) * 3 + método
+            report.delta_por_anio[anio] = report.delta_por_anio.get(anio, 0.0) + value
+        for idx in np.unique(table.source_idx[rows]).tolist():
+            moved[table.source_ids[idx] if table.source_ids else str(idx)] = None
+
+    @staticmethod
+    def _group_sums(table: EmissionResultTable, rows: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Sum ``values`` of ``rows`` per (año, scope, método) code."""
+        key = (table.anio[rows].astype(np.int64) * 4 + table.scope[rows]) * 3 + table.scope2_method[rows]
+        codes, inverse = np.unique(key, return_inverse=True)
+        return codes, np.bincount(inverse, weights=values, minlength=codes.size)
+
+    def _upsert_group(self, n: int, code: int, value: float) -> None:
+        rest, method = divmod(code, 3)
+        anio, scope = divmod(rest, 4)
+        self.resumen.upsert(
+            ("tabla", n, code),
+            EmissionResult("", SCOPE_BY_CODE[scope], value, anio, SCOPE2_METHOD_BY_CODE[method]),
+        )
+
+
+def recalculate_book(
+    engines: Iterable[TrackingEmissionsEngine],
+    factor_id: str,
+    new_value: float,
+) -> list[FactorChangeReport]:
+    """Apply a factor revision across a portfolio of client engines.
+
+    Returns one report per organisation whose results moved.
+    """
+    reports = []
+    for engine in engines:
+        report = engine.recalculate_for_factor_change(factor_id, new_value)
+        if report.fuentes_afectadas:
+            reports.append(report)
+    return reports
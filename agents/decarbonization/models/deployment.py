@@ -0,0 +1,219 @@
+"""
+Phase 3 — Simulación de Despliegue de Medidas
+=============================================
+Reconciles the reduction measures with the pathway: each measure is
+deployed in a start year inside its horizon window and its effect is
+followed year by year until ``anio_final``.
+
+    edad      a = t - inicio                      (not active before inicio)
+    rampa     min((a + 1) / rampa_anios, 1)       (first deployment only)
+    vida      a_v = a mod vida_util  (reposición)  or  0 after vida_util
+    efecto    f * rampa * (1 - degradación) ** a_v,   f = reducción / E0_fuente
+
+Measures on the same source stack multiplicatively on the source's
+baseline (constant base-year emissions, or a BAU ``fuentes × años`` array):
+
+    residual[fuente, t] = base[fuente, t] * Π_m (1 - efecto_m(t))
+
+A plan is one start year per measure (``NO_DESPLEGADA`` skips it), so
+thousands of alternative plans are a ``planes × medidas`` array scored with
+one ``planes × medidas × años`` effect tensor and a product per source.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .forecast import ANIO_FINAL
+from .inventory import ReductionMeasure, TimeHorizon
+
+NO_DESPLEGADA = -1
+
+# Start-year offsets after the base year in which each horizon may deploy.
+HORIZON_WINDOWS = {
+    TimeHorizon.SHORT: (1, 2),
+    TimeHorizon.MEDIUM: (3, 5),
+    TimeHorizon.LONG: (6, 10),
+}
+
+
+@dataclass
+class DeploymentResult:
+    """``planes × fuentes × años`` residual emissions (tCO2e)."""
+    anios: np.ndarray
+    source_ids: list[str]
+    residual: np.ndarray
+    linea_base: np.ndarray = field(default_factory=lambda: np.zeros((0, 0)))   # fuentes × años
+
+    @property
+    def totales(self) -> np.ndarray:
+        """``planes × años`` residual over every source."""
+        return self.residual.sum(axis=1)
+
+    def trayectoria(self, plan: int = 0) -> dict[int, float]:
+        """Year → residual tCO2e of one plan."""
+        return {int(a): float(v) for a, v in zip(self.anios, self.totales[plan])}
+
+    def brecha(self, senda: dict[int, float]) -> tuple[np.ndarray, np.ndarray]:
+        """Gap to the target in each milestone year covered by the simulation.
+
+        Returns:
+            ``(hitos, brecha)``: milestone years and ``planes × hitos``
+            residual minus target (positive = target missed).
+        """
+        hitos = np.array(sorted(y for y in senda if self.anios[0] <= y <= self.anios[-1]), dtype=np.int64)
+        objetivo = np.array([senda[int(y)] for y in hitos], dtype=np.float64)
+        return hitos, self.totales[:, hitos - self.anios[0]] - objetivo
+
+    def deficit(self, senda: dict[int, float]) -> np.ndarray:
+        """Per plan, the tCO2e by which the milestones are missed in total."""
+        _, gap = self.brecha(senda)
+        return np.clip(gap, 0.0, None).sum(axis=1)
+
+
+class DeploymentSimulator:
+    """Vectorised year-by-year deployment of a set of measures.
+
+    Args:
+        medidas: measures to deploy (``source_id`` links each to a source).
+        emisiones_fuente: base-year tCO2e per source id.
+        anio_base: inventory base year; deployment starts afterwards.
+        rampa_anios: years to reach the full effect (scalar or per measure).
+        degradacion_pct: annual loss of effect over the measure's life.
+        reposicion: replace measures at the end of their useful life;
+            otherwise their effect stops.
+    """
+
+    def __init__(
+        self,
+        medidas: Sequence[ReductionMeasure],
+        emisiones_fuente: dict[str, float],
+        anio_base: int,
+        anio_final: int = ANIO_FINAL,
+        rampa_anios: int | Sequence[int] = 2,
+        degradacion_pct: float | Sequence[float] = 0.5,
+        reposicion: bool = True,
+    ):
+        if anio_final <= anio_base:
+            raise ValueError(f"anio_final ({anio_final}) debe ser posterior a anio_base ({anio_base})")
+        unknown = sorted({m.source_id for m in medidas} - set(emisiones_fuente))
+        if unknown:
+            raise KeyError(f"Fuentes sin emisiones base: {', '.join(unknown)}")
+
+        self.medidas = list(medidas)
+        self.anio_base = anio_base
+        self.anios = np.arange(anio_base, anio_final + 1)
+        self.source_ids = list(emisiones_fuente)
+        self.reposicion = reposicion
+        self._base = np.array([emisiones_fuente[s] for s in self.source_ids], dtype=np.float64)
+
+        n = len(self.medidas)
+        pos = {s: i for i, s in enumerate(self.source_ids)}
+        fuente = np.array([pos[m.source_id] for m in self.medidas], dtype=np.int64)
+        reduccion = np.array([m.reduccion_estimada_tCO2e for m in self.medidas], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._fraccion = np.clip(np.where(self._base[fuente] > 0, reduccion / self._base[fuente], 0.0), 0.0, 1.0)
+        self._vida = np.array([max(m.vida_util_anios, 1) for m in self.medidas], dtype=np.int64)
+        self._rampa = np.maximum(np.broadcast_to(np.asarray(rampa_anios, dtype=np.float64), (n,)), 1.0)
+        self._retencion = 1.0 - np.broadcast_to(np.asarray(degradacion_pct, dtype=np.float64), (n,)) / 100.0
+        windows = np.array([HORIZON_WINDOWS[m.horizonte] for m in self.medidas], dtype=np.int64).reshape(n, 2)
+        self.ventana = anio_base + windows   # medidas × (primer, último) start year
+
+        # Measures grouped by source for one multiplicative reduceat per plan.
+        self._orden = np.argsort(fuente, kind="stable")
+        fuente_ordenada = fuente[self._orden]
+        self._starts = np.flatnonzero(np.r_[True, fuente_ordenada[1:] != fuente_ordenada[:-1]]) if n else fuente
+        self._fuentes_con_medidas = fuente_ordenada[self._starts]
+
+    @classmethod
+    def from_pathway(cls, pathway, anio_base: Optional[int] = None, **kwargs) -> DeploymentSimulator:
+        """Simulator for a ``PathwayOutput``; the base year defaults to the
+        first year of its ``senda_preliminar``."""
+        if anio_base is None:
+            if not pathway.senda_preliminar:
+                raise ValueError("La senda está vacía: indique anio_base")
+            anio_base = min(pathway.senda_preliminar)
+        return cls(pathway.medidas, pathway.emisiones_fuente, anio_base, **kwargs)
+
+    # --- Plans ---
+
+    def default_plan(self) -> np.ndarray:
+        """Every measure deployed at the start of its horizon window."""
+        return self.ventana[:, 0].copy()
+
+    def sample_plans(self, n: int, seed: Optional[int] = None, prob_despliegue: float = 1.0) -> np.ndarray:
+        """``n × medidas`` random start years inside each window; measures
+        are left out with probability ``1 - prob_despliegue``."""
+        rng = np.random.default_rng(seed)
+        lo, hi = self.ventana[:, 0], self.ventana[:, 1]
+        planes = lo + rng.integers(0, hi - lo + 1, size=(n, len(self.medidas)))
+        if prob_despliegue < 1.0:
+            planes[rng.random(planes.shape) >= prob_despliegue] = NO_DESPLEGADA
+        return planes
+
+    # --- Simulation ---
+
+    def effects(self, planes: np.ndarray) -> np.ndarray:
+        """``planes × medidas × años`` fraction of its source each measure avoids."""
+        planes = self._check_plans(planes)
+        edad = self.anios[None, None, :] - planes[:, :, None]
+        activa = (edad >= 0) & (planes[:, :, None] != NO_DESPLEGADA)
+        edad = np.maximum(edad, 0)
+        rampa = np.minimum((edad + 1) / self._rampa[:, None], 1.0)
+        vida = self._vida[:, None]
+        if self.reposicion:
+            edad_vida = edad % vida
+        else:
+            activa &= edad < vida
+            edad_vida = edad
+        efecto = self._fraccion[:, None] * rampa * self._retencion[:, None] ** edad_vida
+        return np.where(activa, efecto, 0.0)
+
+    def simulate(self, planes: np.ndarray, linea_base: Optional[np.ndarray] = None) -> DeploymentResult:
+        """Residual emissions of every plan.
+
+        Args:
+            planes: ``planes × medidas`` start years (or one plan).
+            linea_base: optional ``fuentes × años`` baseline over
+                ``self.anios`` in ``self.source_ids`` order (e.g. a BAU
+                scenario); constant base-year emissions by default.
+        """
+        if linea_base is None:
+            base = np.broadcast_to(self._base[:, None], (len(self.source_ids), len(self.anios)))
+        else:
+            base = np.asarray(linea_base, dtype=np.float64)
+            if base.shape != (len(self.source_ids), len(self.anios)):
+                raise ValueError(f"linea_base debe ser {len(self.source_ids)} × {len(self.anios)}, no {base.shape}")
+
+        restante = 1.0 - self.effects(planes)
+        factor = np.ones((restante.shape[0], len(self.source_ids), len(self.anios)))
+        if len(self.medidas):
+            factor[:, self._fuentes_con_medidas] = np.multiply.reduceat(restante[:, self._orden], self._starts, axis=1)
+        return DeploymentResult(self.anios, self.source_ids, base[None] * factor, linea_base=np.asarray(base))
+
+    def score(
+        self,
+        planes: np.ndarray,
+        senda: dict[int, float],
+        linea_base: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Total milestone shortfall (tCO2e) of every plan; lower is better."""
+        return self.simulate(planes, linea_base).deficit(senda)
+
+    def _check_plans(self, planes: np.ndarray) -> np.ndarray:
+        planes = np.atleast_2d(np.asarray(planes, dtype=np.int64))
+        if planes.shape[1] != len(self.medidas):
+            raise ValueError(f"Cada plan necesita {len(self.medidas)} años de inicio, no {planes.shape[1]}")
+        deployed = planes != NO_DESPLEGADA
+        outside = deployed & ((planes < self.ventana[:, 0]) | (planes > self.ventana[:, 1]))
+        if outside.any():
+            m = self.medidas[int(np.flatnonzero(outside.any(axis=0))[0])]
+            lo, hi = HORIZON_WINDOWS[m.horizonte]
+            raise ValueError(
+                f"Medida {m.id} ({m.horizonte.value}) debe iniciarse entre "
+                f"{self.anio_base + lo} y {self.anio_base + hi}"
+            )
+        return planes
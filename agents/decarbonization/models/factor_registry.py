@@ -0,0 +1,287 @@
+"""
+Phase 1 — Registro de Factores de Emisión
+=========================================
+Indexed store for published emission factor tables (DEFRA, IPCC,
+national grid operators) with thousands of rows.
+
+Factors are indexed by (categoría, unidad, geografía, fuente, año) and
+resolved for each emission source through a fallback chain:
+
+    país de la instalación → región → GLOBAL
+
+Within a geography the most recent year not after the reporting year is
+used. Resolutions are memoised, so resolving factors for 100k sources costs
+one dictionary hit per source plus one index walk per distinct
+(categoría, unidad, país, año, fuente) combination. Rows with identical
+content share a single interned ``EmissionFactor`` instance.
+"""
+
+from __future__ import annotations
+
+import csv
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from .inventory import ActivityData, EmissionFactor, EmissionSource, Facility
+from .units import DEFAULT_UNITS, UnitRegistry
+
+GLOBAL = "GLOBAL"
+
+DEFAULT_TABLE = Path(__file__).with_name("data") / "emission_factors.csv"
+
+
+class _YearSeries:
+    """Factors of one (categoría, unidad, geografía, fuente) ordered by year."""
+
+    __slots__ = ("years", "factors")
+
+    def __init__(self) -> None:
+        self.years: list[int] = []
+        self.factors: list[EmissionFactor] = []
+
+    def insert(self, anio: int, factor: EmissionFactor) -> None:
+        pos = bisect_right(self.years, anio)
+        if pos and self.years[pos - 1] == anio:
+            self.factors[pos - 1] = factor  # later rows supersede earlier ones
+            return
+        self.years.insert(pos, anio)
+        self.factors.insert(pos, factor)
+
+    def at(self, anio: int) -> EmissionFactor:
+        """Most recent factor published up to ``anio`` (earliest if all are later)."""
+        pos = bisect_right(self.years, anio)
+        return self.factors[pos - 1] if pos else self.factors[0]
+
+
+class FactorRegistry:
+    """G. Registro indexado de factores de emisión con resolución por fallback.
+
+    Args:
+        regiones: country code -> region code (e.g. ``{"ES": "EU"}``) used as
+            the second step of the fallback chain.
+        preferencia_fuentes: publisher order used when a lookup does not pin a
+            publisher. Publishers not listed rank after the listed ones, in
+            load order.
+    """
+
+    def __init__(
+        self,
+        regiones: Optional[dict[str, str]] = None,
+        preferencia_fuentes: Sequence[str] = (),
+    ):
+        self.regiones = dict(regiones or {})
+        self.preferencia_fuentes = list(preferencia_fuentes)
+        # (categoria, unidad, geografia) -> {fuente: _YearSeries}
+        self._index: dict[tuple[str, str, str], dict[str, _YearSeries]] = {}
+        self._unidades: dict[str, list[str]] = {}  # categoria -> factor units, load order
+        self._interned: dict[tuple, EmissionFactor] = {}
+        self._cache: dict[tuple, Optional[EmissionFactor]] = {}
+
+    def __len__(self) -> int:
+        return sum(
+            len(series.years)
+            for by_fuente in self._index.values()
+            for series in by_fuente.values()
+        )
+
+    @property
+    def interned_count(self) -> int:
+        """Number of distinct ``EmissionFactor`` instances held."""
+        return len(self._interned)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_defaults(cls, **kwargs) -> FactorRegistry:
+        """Registry preloaded with the bundled default factor table."""
+        registry = cls(**kwargs)
+        registry.load_csv(DEFAULT_TABLE)
+        return registry
+
+    def add(
+        self,
+        categoria: str,
+        unidad: str,
+        pais: str,
+        anio: int,
+        fuente: str,
+        factor: float,
+        gwp: float = 1.0,
+        nombre: str = "",
+        id: str = "",
+    ) -> EmissionFactor:
+        """Register one factor row and return its interned ``EmissionFactor``.
+
+        ``pais`` may be a country code, a region code or ``GLOBAL``. Without
+        an explicit ``id`` one is derived from the row's key (fuente,
+        categoría, geografía, año, unidad), so a revised value keeps its id.
+        """
+        factor_id = id or f"{fuente}:{categoria}:{pais}:{int(anio)}:{unidad}"
+        content = (factor_id, nombre or categoria, float(factor), unidad, float(gwp), fuente)
+        ef = self._interned.get(content)
+        if ef is None:
+            ef = EmissionFactor(
+                id=factor_id,
+                nombre=nombre or categoria,
+                factor=float(factor),
+                unidad_actividad=unidad,
+                gwp=float(gwp),
+                fuente=fuente,
+            )
+            self._interned[content] = ef
+
+        unidades = self._unidades.setdefault(categoria, [])
+        if unidad not in unidades:
+            unidades.append(unidad)
+        by_fuente = self._index.setdefault((categoria, unidad, pais), {})
+        series = by_fuente.get(fuente)
+        if series is None:
+            series = by_fuente[fuente] = _YearSeries()
+        series.insert(int(anio), ef)
+        self._cache.clear()
+        return ef
+
+    def load_rows(self, rows: Iterable[dict]) -> int:
+        """Load factor rows (CSV/JSON-style dicts) and return how many were read.
+
+        Required keys: categoria, unidad, pais, anio, fuente, factor.
+        Optional keys: gwp, nombre, id.
+        """
+        count = 0
+        for row in rows:
+            self.add(
+                categoria=row["categoria"],
+                unidad=row["unidad"],
+                pais=row["pais"] or GLOBAL,
+                anio=int(row["anio"]),
+                fuente=row["fuente"],
+                factor=float(row["factor"]),
+                gwp=float(row.get("gwp") or 1.0),
+                nombre=row.get("nombre") or "",
+                id=row.get("id") or "",
+            )
+            count += 1
+        return count
+
+    def load_csv(self, path: str | Path) -> int:
+        with open(path, newline="", encoding="utf-8") as fh:
+            return self.load_rows(csv.DictReader(fh))
+
+    # ------------------------------------------------------------------
+    # Resolution
+    # ------------------------------------------------------------------
+
+    def resolve(
+        self,
+        categoria: str,
+        unidad: str,
+        pais: str,
+        anio: int,
+        fuente: Optional[str] = None,
+    ) -> Optional[EmissionFactor]:
+        """Resolve a factor through país → región → GLOBAL. Memoised."""
+        key = (categoria, unidad, pais, anio, fuente)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        found: Optional[EmissionFactor] = None
+        for geo in self._fallback_chain(pais):
+            by_fuente = self._index.get((categoria, unidad, geo))
+            if not by_fuente:
+                continue
+            series = by_fuente.get(fuente) if fuente else self._preferred(by_fuente)
+            if series is not None:
+                found = series.at(anio)
+                break
+
+        self._cache[key] = found
+        return found
+
+    def unidades(self, categoria: str) -> list[str]:
+        """Activity units for which ``categoria`` has factors."""
+        return list(self._unidades.get(categoria, ()))
+
+    def resolve_convertible(
+        self,
+        categoria: str,
+        unidad: str,
+        pais: str,
+        anio: int,
+        units: UnitRegistry,
+        fuente: Optional[str] = None,
+    ) -> Optional[EmissionFactor]:
+        """Like ``resolve``, but falls back to factors in any unit ``unidad`` converts to.
+
+        The exact unit is tried first; other units follow in load order.
+        """
+        ef = self.resolve(categoria, unidad, pais, anio, fuente)
+        if ef is not None:
+            return ef
+        for candidate in self._unidades.get(categoria, ()):
+            if candidate != unidad and units.convertible(unidad, candidate):
+                ef = self.resolve(categoria, candidate, pais, anio, fuente)
+                if ef is not None:
+                    return ef
+        return None
+
+    def resolve_sources(
+        self,
+        sources: Iterable[EmissionSource],
+        activities: Iterable[ActivityData],
+        facilities: Iterable[Facility],
+        categorias: Optional[dict[str, str]] = None,
+        fuente: Optional[str] = None,
+        units: Optional[UnitRegistry] = None,
+    ) -> dict[tuple[str, int], EmissionFactor]:
+        """Build the ``{(source_id, anio): EmissionFactor}`` map used by the engine.
+
+        Each activity is resolved with its unit and year and the country of
+        the facility hosting its source, falling back to factors in any unit
+        the activity converts to (``resolve_convertible``). ``categorias``
+        maps source categories (e.g. ``"caldera_gas_natural"``) to factor
+        table categories (``"gas_natural"``); unmapped categories are used
+        as-is. Activities without a resolvable factor are omitted.
+        """
+        categorias = categorias or {}
+        units = units or DEFAULT_UNITS
+        source_map = {s.id: s for s in sources}
+        pais_map = {f.id: f.pais for f in facilities}
+
+        factors: dict[tuple[str, int], EmissionFactor] = {}
+        for act in activities:
+            src = source_map.get(act.source_id)
+            if src is None:
+                continue
+            ef = self.resolve_convertible(
+                categorias.get(src.categoria, src.categoria),
+                act.unidad,
+                pais_map.get(src.facility_id, GLOBAL),
+                act.anio,
+                units,
+                fuente,
+            )
+            if ef is not None:
+                factors[(src.id, act.anio)] = ef
+        return factors
+
+    # --- Private helpers ---
+
+    def _fallback_chain(self, pais: str) -> list[str]:
+        chain = [pais]
+        region = self.regiones.get(pais)
+        if region and region not in chain:
+            chain.append(region)
+        if GLOBAL not in chain:
+            chain.append(GLOBAL)
+        return chain
+
+    def _preferred(self, by_fuente: dict[str, _YearSeries]) -> _YearSeries:
+        for fuente in self.preferencia_fuentes:
+            if fuente in by_fuente:
+                return by_fuente[fuente]
+        return next(iter(by_fuente.values()))
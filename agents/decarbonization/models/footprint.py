@@ -0,0 +1,145 @@
+"""
+Phase 1 — Huella de Producto sobre Listas de Materiales (BOM)
+=============================================================
+Cradle-to-gate product footprints over bill-of-materials graphs.
+
+    huella[n] = propia[n] + Σ_hijos cantidad[n, h] * huella[h]     (kgCO2e / unidad)
+
+``propia`` is a node's own footprint per unit (manufacturing allocated with
+``AllocationEngine`` to ``tipo="producto"``, purchased material factors...).
+The BOM is a DAG: shared components and sub-assemblies are memoised, so
+each node is computed once per run however many products use it, with an
+iterative post-order walk (no recursion limit on deep BOMs).
+
+Changing a node's own footprint or one of its BOM lines only invalidates
+the node and its ancestors (found through the reverse edges); the next
+query recomputes that subgraph and reuses every other cached value.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from .allocation import AllocationResult
+
+
+class BOMCycleError(ValueError):
+    """The bill of materials contains a cycle."""
+
+
+class BOMGraph:
+    """Bill-of-materials DAG with memoised footprints."""
+
+    def __init__(self):
+        self._own: dict[str, float] = {}
+        self._children: dict[str, dict[str, float]] = {}   # parent -> child -> quantity per unit
+        self._parents: dict[str, set[str]] = {}
+        self._cache: dict[str, float] = {}
+        self.calculados = 0  # nodes computed since the last reset_stats()
+
+    def __len__(self) -> int:
+        return len(self._own)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._own
+
+    def add_node(self, node: str, propia_kgCO2e: float = 0.0) -> None:
+        self._own.setdefault(node, 0.0)
+        self._children.setdefault(node, {})
+        self._parents.setdefault(node, set())
+        self.set_own(node, propia_kgCO2e)
+
+    def add_component(self, padre: str, hijo: str, cantidad: float) -> None:
+        """``padre`` uses ``cantidad`` units of ``hijo`` per unit (adds up if repeated)."""
+        if cantidad < 0:
+            raise ValueError(f"Cantidad negativa en BOM {padre} -> {hijo}: {cantidad}")
+        for node in (padre, hijo):
+            if node not in self._own:
+                self.add_node(node)
+        lines = self._children[padre]
+        lines[hijo] = lines.get(hijo, 0.0) + cantidad
+        self._parents[hijo].add(padre)
+        self._invalidate(padre)
+
+    def add_lines(self, lineas: Iterable[tuple[str, str, float]]) -> None:
+        """Add ``(padre, hijo, cantidad)`` BOM lines."""
+        for padre, hijo, cantidad in lineas:
+            self.add_component(padre, hijo, cantidad)
+
+    def remove_component(self, padre: str, hijo: str) -> None:
+        del self._children[padre][hijo]
+        self._parents[hijo].discard(padre)
+        self._invalidate(padre)
+
+    def set_own(self, node: str, propia_kgCO2e: float) -> None:
+        """Change a node's own footprint; only its ancestors are recomputed."""
+        if node not in self._own:
+            self.add_node(node, propia_kgCO2e)
+            return
+        if self._own[node] != propia_kgCO2e:
+            self._own[node] = propia_kgCO2e
+            self._invalidate(node)
+
+    def set_own_from_allocation(self, asignacion: AllocationResult, unidades: dict[str, float]) -> None:
+        """Own footprints from allocated product emissions and units produced."""
+        for producto, tCO2e in zip(asignacion.destinos, asignacion.tCO2e.tolist()):
+            n = unidades.get(producto)
+            if n:
+                self.set_own(producto, tCO2e * 1000.0 / n)
+
+    def footprint(self, node: str) -> float:
+        """kgCO2e per unit of ``node``, including its whole sub-BOM."""
+        cached = self._cache.get(node)
+        if cached is not None:
+            return cached
+        if node not in self._own:
+            raise KeyError(f"Nodo BOM desconocido: {node}")
+
+        cache, children, own = self._cache, self._children, self._own
+        on_path: set[str] = {node}
+        stack: list[tuple[str, Iterable[str]]] = [(node, iter(children[node]))]
+        while stack:
+            current, pending = stack[-1]
+            for child in pending:
+                if child in cache:
+                    continue
+                if child in on_path:
+                    raise BOMCycleError(f"Ciclo en la lista de materiales: {child} -> ... -> {current} -> {child}")
+                on_path.add(child)
+                stack.append((child, iter(children[child])))
+                break
+            else:
+                stack.pop()
+                on_path.discard(current)
+                cache[current] = own[current] + sum(q * cache[c] for c, q in children[current].items())
+                self.calculados += 1
+        return cache[node]
+
+    def footprints(self, nodes: Optional[Iterable[str]] = None) -> dict[str, float]:
+        """kgCO2e per unit of ``nodes`` (every node by default)."""
+        return {n: self.footprint(n) for n in (self._own if nodes is None else nodes)}
+
+    def ancestors(self, node: str) -> set[str]:
+        """Every node whose BOM contains ``node`` (directly or not)."""
+        seen: set[str] = set()
+        stack = list(self._parents.get(node, ()))
+        while stack:
+            parent = stack.pop()
+            if parent not in seen:
+                seen.add(parent)
+                stack.extend(self._parents[parent])
+        return seen
+
+    def reset_stats(self) -> None:
+        self.calculados = 0
+
+    # --- Private helpers ---
+
+    def _invalidate(self, node: str) -> None:
+        """Drop ``node`` and its cached ancestors; uncached ones have no cached ancestors."""
+        cache, parents = self._cache, self._parents
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if cache.pop(current, None) is not None or current == node:
+                stack.extend(p for p in parents[current] if p in cache)
@@ -0,0 +1,178 @@
+"""
+Phase 3 — Proyección BAU (Business-as-Usual) a 2050
+===================================================
+Projects each source's emissions year by year without new measures, as
+the baseline that the pathway's measures reduce from.
+
+    E[esc, fuente, año] = E0[fuente]
+                          * actividad[esc, driver_actividad(fuente), año]
+                          * intensidad[esc, driver_intensidad(fuente), año]
+
+Activity drivers: constant, production volume, headcount. Intensity drivers:
+none, grid decarbonisation (electricity factor index) and fuel price (demand
+response ``(precio_t / precio_0) ** elasticidad``). Every driver is a
+``escenarios × drivers × años`` index equal to 1 in the base year, so the
+projection of all sources — across thousands of organisations — is one
+gather-and-multiply producing a ``escenarios × fuentes × años`` array.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from .inventory import EmissionResult, EmissionSource, Scope, Scope2Method
+
+ANIO_FINAL = 2050
+
+ACTIVITY_DRIVERS = ("constante", "produccion", "plantilla")
+INTENSITY_DRIVERS = ("ninguna", "red", "combustible")
+
+Curve = Union[float, dict[int, float]]  # annual % change, or index by year (base year = 1)
+
+
+@dataclass
+class BAUScenario:
+    """Growth drivers of one business-as-usual scenario.
+
+    Each driver is either an annual % change or an explicit index by year,
+    interpolated linearly between the given years.
+    """
+    nombre: str
+    produccion: Curve = 0.0
+    plantilla: Curve = 0.0
+    factor_red: Curve = 0.0            # grid emission factor (e.g. -5.0 %/año)
+    precio_combustible: Curve = 0.0
+    elasticidad_precio: float = 0.0    # fuel demand elasticity to price (typically < 0)
+
+
+@dataclass(frozen=True)
+class SourceDrivers:
+    actividad: str = "produccion"
+    intensidad: str = "ninguna"
+
+
+def default_drivers(source: EmissionSource) -> SourceDrivers:
+    """Drivers inferred from the source scope and category (``CategoryClassifier``)."""
+    from ..agents.category_classifier import classify
+
+    if source.scope == Scope.SCOPE_2:
+        return SourceDrivers("produccion", "red")
+    return SourceDrivers(*classify(source.categoria).drivers_bau)
+
+
+def _curve(value: Curve, anios: np.ndarray, anio_base: int) -> np.ndarray:
+    if isinstance(value, dict):
+        points = {anio_base: 1.0, **value}
+        years = np.array(sorted(points), dtype=np.float64)
+        return np.interp(anios, years, [points[int(y)] for y in years])
+    return (1.0 + value / 100.0) ** (anios - anio_base)
+
+
+@dataclass
+class BAUProjection:
+    """``escenarios × fuentes × años`` BAU emissions (tCO2e)."""
+    escenarios: list[str]
+    anios: np.ndarray
+    emisiones: np.ndarray
+    source_ids: list[str] = field(default_factory=list)
+
+    @property
+    def totales(self) -> np.ndarray:
+        """``escenarios × años`` total over every source."""
+        return self.emisiones.sum(axis=1)
+
+    def trayectoria(self, escenario: Optional[str] = None) -> dict[int, float]:
+        """Year → total tCO2e of one scenario (the first by default)."""
+        pos = self.escenarios.index(escenario) if escenario else 0
+        return {int(a): float(v) for a, v in zip(self.anios, self.totales[pos])}
+
+    def por_organizacion(self, org_idx: np.ndarray, n_orgs: Optional[int] = None) -> np.ndarray:
+        """``escenarios × organizaciones × años`` totals for sources tagged with ``org_idx``."""
+        org_idx = np.asarray(org_idx, dtype=np.int64)
+        n_orgs = int(org_idx.max()) + 1 if n_orgs is None else n_orgs
+        order = np.argsort(org_idx, kind="stable")
+        sorted_orgs = org_idx[order]
+        starts = np.flatnonzero(np.r_[True, sorted_orgs[1:] != sorted_orgs[:-1]])
+        out = np.zeros((len(self.escenarios), n_orgs, len(self.anios)))
+        out[:, sorted_orgs[starts]] = np.add.reduceat(self.emisiones[:, order], starts, axis=1)
+        return out
+
+
+class BAUForecaster:
+    """Vectorised BAU projection for a set of scenarios."""
+
+    def __init__(self, escenarios: Sequence[BAUScenario], anio_base: int, anio_final: int = ANIO_FINAL):
+        if anio_final < anio_base:
+            raise ValueError(f"anio_final ({anio_final}) anterior a anio_base ({anio_base})")
+        self.escenarios = list(escenarios)
+        self.anio_base = anio_base
+        self.anios = np.arange(anio_base, anio_final + 1)
+        self._activity = np.stack([self._driver_rows(e, ACTIVITY_DRIVERS) for e in self.escenarios])
+        self._intensity = np.stack([self._driver_rows(e, INTENSITY_DRIVERS) for e in self.escenarios])
+
+    def _driver_rows(self, esc: BAUScenario, drivers: Sequence[str]) -> np.ndarray:
+        ones = np.ones(len(self.anios))
+        curves = {
+            "constante": ones,
+            "ninguna": ones,
+            "produccion": _curve(esc.produccion, self.anios, self.anio_base),
+            "plantilla": _curve(esc.plantilla, self.anios, self.anio_base),
+            "red": _curve(esc.factor_red, self.anios, self.anio_base),
+            "combustible": _curve(esc.precio_combustible, self.anios, self.anio_base) ** esc.elasticidad_precio,
+        }
+        return np.stack([curves[d] for d in drivers])
+
+    def project(
+        self,
+        emisiones_base: np.ndarray,
+        actividad: np.ndarray,
+        intensidad: np.ndarray,
+        source_ids: Sequence[str] = (),
+    ) -> BAUProjection:
+        """Columnar projection.
+
+        Args:
+            emisiones_base: base-year tCO2e per source.
+            actividad: position in ``ACTIVITY_DRIVERS`` per source.
+            intensidad: position in ``INTENSITY_DRIVERS`` per source.
+        """
+        e0 = np.asarray(emisiones_base, dtype=np.float64)
+        emisiones = self._activity[:, np.asarray(actividad, dtype=np.int64)]
+        emisiones *= self._intensity[:, np.asarray(intensidad, dtype=np.int64)]
+        emisiones *= e0[None, :, None]
+        return BAUProjection(
+            escenarios=[e.nombre for e in self.escenarios],
+            anios=self.anios,
+            emisiones=emisiones,
+            source_ids=list(source_ids),
+        )
+
+    def project_sources(
+        self,
+        sources: Sequence[EmissionSource],
+        results: Sequence[EmissionResult],
+        drivers: Optional[dict[str, SourceDrivers]] = None,
+    ) -> BAUProjection:
+        """Project an inventory from its base-year results.
+
+        Scope 2 is projected from location-based results only, matching
+        ``EmissionSummary.total_tCO2e``.
+        """
+        drivers = drivers or {}
+        base: dict[str, float] = {s.id: 0.0 for s in sources}
+        for r in results:
+            if r.anio != self.anio_base or r.source_id not in base:
+                continue
+            if r.scope2_method == Scope2Method.MARKET_BASED:
+                continue
+            base[r.source_id] += r.tCO2e
+        assigned = [drivers.get(s.id) or default_drivers(s) for s in sources]
+        return self.project(
+            np.fromiter(base.values(), dtype=np.float64, count=len(base)),
+            np.array([ACTIVITY_DRIVERS.index(d.actividad) for d in assigned], dtype=np.int64),
+            np.array([INTENSITY_DRIVERS.index(d.intensidad) for d in assigned], dtype=np.int64),
+            source_ids=[s.id for s in sources],
+        )
@@ -0,0 +1,256 @@
+"""
+Phase 1 — Inventario Multi-Gas y Tablas GWP
+===========================================
+Activity emissions kept per gas, separate from the GWP values used to
+express them as CO2e.
+
+``GWPRegistry`` holds 100-year GWP tables for the IPCC assessment reports
+(AR4, AR5, AR6); refrigerant blends are derived from their components.
+``GasInventory`` stores kg of each gas per inventory row as a
+``gases × filas`` matrix. For a reporting year the rows are first reduced to
+a ``gases × buckets`` matrix (S1, S2 LBM, S2 MBM, S3); restating the
+inventory under any number of reports is then one product
+
+    tCO2e[informe, bucket] = GWP[informe, gas] · M[gas, bucket] / 1000
+
+instead of a recalculation of every row.
+
+Factors without a per-gas breakdown (``EmissionFactor.gases`` is ``None``)
+enter as the pseudo-gas ``CO2e`` with GWP 1 in every table, so their
+``factor * gwp`` is carried over unchanged.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from .aggregation import BUCKET_S1, BUCKET_S2_LBM, BUCKET_S2_MBM, BUCKET_S3, N_BUCKETS, scope_bucket
+from .batch import SCOPE2_METHOD_CODES, EmissionResultTable, build_table
+from .inventory import (
+    ActivityData,
+    EmissionFactor,
+    EmissionSource,
+    EmissionsEngine,
+    EmissionSummary,
+    Scope2Method,
+)
+
+CO2E = "CO2e"
+
+# IPCC 100-year GWPs: AR4 (2007), AR5 (2013, without carbon feedbacks), AR6 (2021).
+GWP_TABLES: dict[str, dict[str, float]] = {
+    "AR4": {"CO2": 1, "CH4": 25, "CH4_fosil": 25, "N2O": 298, "SF6": 22_800, "NF3": 17_200, "CF4": 7_390,
+            "HFC-23": 14_800, "HFC-32": 675, "HFC-125": 3_500, "HFC-134a": 1_430, "HFC-143a": 4_470},
+    "AR5": {"CO2": 1, "CH4": 28, "CH4_fosil": 30, "N2O": 265, "SF6": 23_500, "NF3": 16_100, "CF4": 6_630,
+            "HFC-23": 12_400, "HFC-32": 677, "HFC-125": 3_170, "HFC-134a": 1_300, "HFC-143a": 4_800},
+    "AR6": {"CO2": 1, "CH4": 27.9, "CH4_fosil": 29.8, "N2O": 273, "SF6": 25_200, "NF3": 17_400, "CF4": 7_380,
+            "HFC-23": 14_600, "HFC-32": 771, "HFC-125": 3_740, "HFC-134a": 1_530, "HFC-143a": 5_810},
+}
+
+# Refrigerant blends by mass fraction of their components.
+BLENDS: dict[str, dict[str, float]] = {
+    "R-410A": {"HFC-32": 0.50, "HFC-125": 0.50},
+    "R-404A": {"HFC-125": 0.44, "HFC-143a": 0.52, "HFC-134a": 0.04},
+    "R-407C": {"HFC-32": 0.23, "HFC-125": 0.25, "HFC-134a": 0.52},
+}
+
+
+class GWPRegistry:
+    """Named GWP tables as a dense ``informes × gases`` matrix."""
+
+    def __init__(
+        self,
+        tablas: Optional[dict[str, dict[str, float]]] = None,
+        mezclas: Optional[dict[str, dict[str, float]]] = None,
+    ):
+        self._tables: dict[str, dict[str, float]] = {}
+        self._gases: list[str] = [CO2E]
+        self._gas_pos: dict[str, int] = {CO2E: 0}
+        self._matrix: Optional[np.ndarray] = None
+        self.mezclas = dict(BLENDS if mezclas is None else mezclas)
+        for informe, tabla in (GWP_TABLES if tablas is None else tablas).items():
+            self.add_table(informe, tabla)
+
+    @property
+    def informes(self) -> list[str]:
+        return list(self._tables)
+
+    @property
+    def gases(self) -> list[str]:
+        return list(self._gases)
+
+    def add_table(self, informe: str, tabla: dict[str, float]) -> None:
+        table = dict(tabla)
+        for blend, parts in self.mezclas.items():
+            if blend not in table and all(g in table for g in parts):
+                table[blend] = sum(table[g] * share for g, share in parts.items())
+        table[CO2E] = 1.0
+        self._tables[informe] = table
+        for gas in table:
+            if gas not in self._gas_pos:
+                self._gas_pos[gas] = len(self._gases)
+                self._gases.append(gas)
+        self._matrix = None
+
+    def gwp(self, gas: str, informe: str) -> float:
+        return self._tables[informe][gas]
+
+    def co2e_factor(self, gases: dict[str, float], informe: str) -> float:
+        """kgCO2e per unit for a per-gas factor (kg gas per unit)."""
+        table = self._tables[informe]
+        return sum(kg * table[gas] for gas, kg in gases.items())
+
+    def gas_index(self, gas: str) -> int:
+        pos = self._gas_pos.get(gas)
+        if pos is None:
+            raise KeyError(f"Gas sin GWP registrado: {gas}")
+        return pos
+
+    def matrix(self, informes: Optional[Sequence[str]] = None) -> np.ndarray:
+        """``informes × gases`` GWP matrix (NaN where a report lacks a gas)."""
+        if self._matrix is None:
+            self._matrix = np.array(
+                [[table.get(g, np.nan) for g in self._gases] for table in self._tables.values()],
+                dtype=np.float64,
+            )
+        if informes is None:
+            return self._matrix
+        pos = {name: i for i, name in enumerate(self._tables)}
+        return self._matrix[[pos[i] for i in informes]]
+
+
+DEFAULT_GWP = GWPRegistry()
+
+
+class GasInventory:
+    """Per-gas emissions of an inventory (kg of each gas per row).
+
+    Rows are appended with ``add`` (same arguments as
+    ``EmissionsEngine.build_result``); units and consolidation come from the
+    engine, so ``summarize(anio, informe)`` reproduces
+    ``EmissionsEngine.summarize`` whenever the factors' ``gwp`` match that
+    report.
+    """
+
+    def __init__(self, engine: EmissionsEngine, tablas_gwp: GWPRegistry = DEFAULT_GWP):
+        self.engine = engine
+        self.tablas_gwp = tablas_gwp
+        self.source_ids: list[str] = []
+        self._anio: list[int] = []
+        self._scope: list[int] = []
+        self._method: list[int] = []    # Scope 2 method code as given to ``add``
+        self._bucket: list[int] = []
+        self._cells: tuple[list[int], list[int], list[float]] = ([], [], [])  # gas, row, kg
+        self._reduced: dict[int, np.ndarray] = {}  # anio -> gases × buckets kg
+
+    def __len__(self) -> int:
+        return len(self._anio)
+
+    def add(
+        self,
+        activity: ActivityData,
+        factor: EmissionFactor,
+        source: EmissionSource,
+        scope2_method: Optional[Scope2Method] = None,
+    ) -> None:
+        cantidad = activity.cantidad * self.engine.consolidation.factor_consolidacion
+        if activity.unidad != factor.unidad_actividad:
+            cantidad *= self.engine.units.factor(activity.unidad, factor.unidad_actividad)
+        per_gas = factor.gases or {CO2E: factor.factor * factor.gwp}
+        positions = [self.tablas_gwp.gas_index(gas) for gas in per_gas]  # raises before any state changes
+
+        row = len(self._anio)
+        gases, rows, kg = self._cells
+        for pos, per_unit in zip(positions, per_gas.values()):
+            gases.append(pos)
+            rows.append(row)
+            kg.append(cantidad * per_unit)
+        self.source_ids.append(source.id)
+        self._anio.append(activity.anio)
+        self._scope.append(source.scope.value)
+        self._method.append(SCOPE2_METHOD_CODES[scope2_method])
+        self._bucket.append(scope_bucket(source.scope, scope2_method))
+        self._reduced.clear()
+
+    def add_many(
+        self,
+        rows: Iterable[tuple[ActivityData, EmissionFactor, EmissionSource, Optional[Scope2Method]]],
+    ) -> None:
+        for activity, factor, source, method in rows:
+            self.add(activity, factor, source, method)
+
+    def masses(self) -> np.ndarray:
+        """Dense ``gases × filas`` matrix of kg of each gas."""
+        gases, rows, kg = self._cells
+        out = np.zeros((len(self.tablas_gwp.gases), len(self)))
+        np.add.at(out, (np.asarray(gases, dtype=np.int64), np.asarray(rows, dtype=np.int64)), kg)
+        return out
+
+    def by_bucket(self, anio: int) -> np.ndarray:
+        """``gases × 4`` kg per summary bucket for ``anio`` (cached)."""
+        reduced = self._reduced.get(anio)
+        if reduced is None:
+            gases, rows, kg = (np.asarray(c) for c in self._cells)
+            rows = rows.astype(np.int64)
+            year_ok = np.asarray(self._anio)[rows] == anio
+            bucket = np.asarray(self._bucket, dtype=np.int64)[rows[year_ok]]
+            n_gases = len(self.tablas_gwp.gases)
+            reduced = np.bincount(
+                bucket * n_gases + gases[year_ok].astype(np.int64),
+                weights=kg[year_ok].astype(np.float64),
+                minlength=N_BUCKETS * n_gases,
+            ).reshape(N_BUCKETS, n_gases).T
+            self._reduced[anio] = reduced
+        return reduced
+
+    def restate(self, anio: int, informes: Optional[Sequence[str]] = None) -> dict[str, EmissionSummary]:
+        """Side-by-side ``EmissionSummary`` of ``anio`` under each report."""
+        informes = list(informes or self.tablas_gwp.informes)
+        reduced = self.by_bucket(anio)
+        used = reduced.any(axis=1)
+        tCO2e = self._weights(informes, used) @ reduced[used] / 1000.0  # kg -> tonnes
+        return {
+            informe: EmissionSummary(
+                anio=anio,
+                scope_1_tCO2e=float(values[BUCKET_S1]),
+                scope_2_lbm_tCO2e=float(values[BUCKET_S2_LBM]),
+                scope_2_mbm_tCO2e=float(values[BUCKET_S2_MBM]),
+                scope_3_tCO2e=float(values[BUCKET_S3]),
+            )
+            for informe, values in zip(informes, tCO2e)
+        }
+
+    def summarize(self, anio: int, informe: str = "AR6") -> EmissionSummary:
+        return self.restate(anio, [informe])[informe]
+
+    def by_gas(self, anio: int) -> dict[str, float]:
+        """Total kg of each gas emitted in ``anio``."""
+        totals = self.by_bucket(anio).sum(axis=1)
+        return {gas: float(kg) for gas, kg in zip(self.tablas_gwp.gases, totals) if kg}
+
+    def to_table(self, informe: str = "AR6") -> EmissionResultTable:
+        """Row-level results under ``informe`` as an ``EmissionResultTable``."""
+        masses = self.masses()
+        used = masses.any(axis=1)
+        weights = self._weights([informe], used)[0]
+        return build_table(
+            weights @ masses[used] / 1000.0,
+            np.asarray(self._scope, dtype=np.int8),
+            np.asarray(self._anio, dtype=np.int16),
+            np.arange(len(self), dtype=np.int32),
+            np.asarray(self._method, dtype=np.int8),
+            self.source_ids,
+        )
+
+    # --- Private helpers ---
+
+    def _weights(self, informes: Sequence[str], used: np.ndarray) -> np.ndarray:
+        """GWP rows of ``informes`` for the gases in ``used``; every one must be defined."""
+        weights = self.tablas_gwp.matrix(informes)[:, used]
+        missing = np.argwhere(np.isnan(weights))
+        if missing.size:
+            report, gas = missing[0]
+            raise KeyError(f"{informes[report]} no tiene GWP para {np.asarray(self.tablas_gwp.gases)[used][gas]}")
+        return weights
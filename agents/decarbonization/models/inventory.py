@@ -11,7 +11,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+from .units import DEFAULT_UNITS, UnitRegistry
+
+if TYPE_CHECKING:
+    from .uncertainty import Distribution
 
 
 # ---------------------------------------------------------------------------
@@ -96,13 +101,15 @@ class Facility:
     arrendamiento: bool = False
     superficie_m2: float = 0.0
     dias_operacion: int = 365
+    latitud: Optional[float] = None    # decimal degrees, for distance-based logistics
+    longitud: Optional[float] = None
 
 
 # ---------------------------------------------------------------------------
 # E. Fuentes de Emisión
 # ---------------------------------------------------------------------------
 
-@dataclass
+@dataclass(slots=True)
 class EmissionSource:
     """E. Punto generador de emisiones."""
     id: str
@@ -117,7 +124,7 @@ class EmissionSource:
 # F. Datos de Actividad
 # ---------------------------------------------------------------------------
 
-@dataclass
+@dataclass(slots=True)
 class ActivityData:
     """F. Consumo real asociado a una fuente de emisión."""
     source_id: str
@@ -125,6 +132,7 @@ class ActivityData:
     unidad: str  # e.g. "litros", "kWh", "km"
     anio: int
     descripcion: str = ""
+    incertidumbre: Optional[Distribution] = None  # Monte Carlo mode only
 
 
 # ---------------------------------------------------------------------------
@@ -140,13 +148,15 @@ class EmissionFactor:
     unidad_actividad: str   # matching ActivityData.unidad
     gwp: float = 1.0       # Global Warming Potential multiplier (default CO2=1)
     fuente: str = ""        # e.g. "IPCC AR6", "DEFRA 2023"
+    gases: Optional[dict[str, float]] = None      # kg of each gas per unit (see models.gases)
+    incertidumbre: Optional[Distribution] = None  # Monte Carlo mode only
 
 
 # ---------------------------------------------------------------------------
 # H. Cálculo y Resultados
 # ---------------------------------------------------------------------------
 
-@dataclass
+@dataclass(slots=True)
 class EmissionResult:
     """H. Output del motor de cálculo."""
     source_id: str
@@ -164,6 +174,7 @@ class EmissionSummary:
     scope_2_lbm_tCO2e: float = 0.0
     scope_2_mbm_tCO2e: float = 0.0
     scope_3_tCO2e: float = 0.0
+    scope_3_por_categoria: dict[int, float] = field(default_factory=dict)  # GHG Protocol category 1-15
 
     @property
     def total_tCO2e(self) -> float:
@@ -264,6 +275,7 @@ class EconomicVariables:
     opex_diferencial_eur: float  # annual savings (negative = cost)
     payback_anios: float = 0.0
     macc_eur_per_tCO2e: float = 0.0  # will be computed in Phase 4
+    payback_descontado_anios: Optional[float] = None  # Phase 4 DCF mode
 
     def compute_payback(self) -> None:
         if self.opex_diferencial_eur > 0:
@@ -280,10 +292,14 @@ class EmissionsEngine:
     """Motor de cálculo GHG Protocol.
 
     Emisiones (tCO2e) = Dato_de_Actividad * Factor_de_Emision * GWP * Factor_de_Consolidacion
+
+    The activity quantity is first converted into the factor's unit
+    (``units``); incompatible units raise ``UnitMismatchError``.
     """
 
-    def __init__(self, consolidation: ConsolidationConfig):
+    def __init__(self, consolidation: ConsolidationConfig, units: Optional[UnitRegistry] = None):
         self.consolidation = consolidation
+        self.units = units or DEFAULT_UNITS
 
     def calculate(
         self,
@@ -291,8 +307,11 @@ class EmissionsEngine:
         factor: EmissionFactor,
     ) -> float:
         """Apply the core GHG formula and return tCO2e."""
+        cantidad = activity.cantidad
+        if activity.unidad != factor.unidad_actividad:
+            cantidad *= self.units.factor(activity.unidad, factor.unidad_actividad)
         emisiones_kg = (
-            activity.cantidad
+            cantidad
             * factor.factor
             * factor.gwp
             * self.consolidation.factor_consolidacion
@@ -315,6 +334,38 @@ class EmissionsEngine:
             scope2_method=scope2_method if source.scope == Scope.SCOPE_2 else None,
         )
 
+    def calculate_batch(
+        self,
+        cantidad,
+        factor,
+        gwp,
+        scope,
+        anio,
+        source_idx,
+        scope2_method=None,
+        source_ids=None,
+        unidad=None,
+        unidad_factor=None,
+    ):
+        """Columnar ``build_result`` over whole activity columns.
+
+        Takes NumPy-compatible arrays (one entry per activity row) and returns
+        an ``EmissionResultTable`` with the same tCO2e the scalar path yields.
+        ``unidad`` / ``unidad_factor`` are optional unit-ID columns (see
+        ``UnitRegistry.parse_many``); when given, quantities are converted into
+        the factor units and every non-convertible row is reported in a single
+        ``UnitMismatchError``.
+        """
+        from .batch import build_table, calculate_columns
+
+        conversion = None
+        if unidad is not None and unidad_factor is not None:
+            conversion = self.units.conversion_column(unidad, unidad_factor)
+        tCO2e = calculate_columns(
+            cantidad, factor, gwp, self.consolidation.factor_consolidacion, conversion,
+        )
+        return build_table(tCO2e, scope, anio, source_idx, scope2_method, source_ids)
+
     @staticmethod
     def summarize(results: list[EmissionResult], anio: int) -> EmissionSummary:
         summary = EmissionSummary(anio=anio)
@@ -0,0 +1,267 @@
+"""
+Phase 1 — Scope 3 por Gasto (EEIO)
+==================================
+Spend-based Scope 3 for procurement ledgers, using an environmentally
+extended input-output (EEIO) model.
+
+    F   gases × sectores   kg of each gas per currency unit of sector output
+    gwp gases              GWP of each gas
+    f = gwp · F            kgCO2e per currency unit of each sector
+
+Ledger lines (proveedor, commodity, moneda, importe) are converted to the
+model currency and mapped to an EEIO sector and a GHG Protocol Scope 3
+category. The line → (categoría, sector) mapping is a sparse one-hot
+matrix, applied chunk by chunk with ``np.bincount`` to accumulate a
+``categorías × sectores`` spend matrix ``S``; emissions per category are
+then one matrix-vector product ``S · f``. Suppliers with their
+own intensity (hybrid method) bypass the EEIO vector.
+
+Commodity codes are mapped to sectors by longest prefix ("C20.14" → "C20")
+and each distinct code or currency is resolved only once.
+
+With a price index, spend of line year ``t`` is deflated to the model's
+price year before applying the intensities:
+
+    importe_modelo = importe * tipo_cambio * indice[anio_precios] / indice[t]
+"""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from .inventory import EmissionSummary
+
+SCOPE3_CATEGORIES: dict[int, str] = {
+    1: "Bienes y servicios adquiridos",
+    2: "Bienes de capital",
+    3: "Actividades relacionadas con combustibles y energía",
+    4: "Transporte y distribución aguas arriba",
+    5: "Residuos generados en operaciones",
+    6: "Viajes de negocios",
+    7: "Desplazamiento de empleados",
+    8: "Activos arrendados aguas arriba",
+    9: "Transporte y distribución aguas abajo",
+    10: "Procesamiento de productos vendidos",
+    11: "Uso de productos vendidos",
+    12: "Tratamiento al final de la vida útil",
+    13: "Activos arrendados aguas abajo",
+    14: "Franquicias",
+    15: "Inversiones",
+}
+
+_N_CATEGORIES = 16  # row 0 unused so the category number is the row index
+
+
+@dataclass
+class EEIOModel:
+    """EEIO emission intensities (prices in ``moneda`` of ``anio_precios``)."""
+    sectores: list[str]
+    gases: list[str]
+    matriz: np.ndarray                  # gases × sectores, kg gas / currency unit
+    gwp: np.ndarray                     # per gas
+    categorias: dict[str, int] = field(default_factory=dict)  # sector -> Scope 3 category (default 1)
+    moneda: str = "EUR"
+    anio_precios: int = 0
+
+    @property
+    def intensidades(self) -> np.ndarray:
+        """kgCO2e per currency unit of each sector (``gwp · F``)."""
+        return np.asarray(self.gwp, dtype=np.float64) @ np.asarray(self.matriz, dtype=np.float64)
+
+    @classmethod
+    def load_csv(cls, path: str | Path, gwp: dict[str, float], **kw) -> EEIOModel:
+        """Load a table with a ``sector`` column, an optional ``categoria``
+        column and one kg-per-currency column per gas in ``gwp``."""
+        sectores, categorias, columns = [], {}, []
+        gases = list(gwp)
+        with open(path, newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                sectores.append(row["sector"])
+                if row.get("categoria"):
+                    categorias[row["sector"]] = int(row["categoria"])
+                columns.append([float(row.get(g) or 0.0) for g in gases])
+        return cls(
+            sectores=sectores,
+            gases=gases,
+            matriz=np.array(columns, dtype=np.float64).reshape(len(sectores), len(gases)).T,
+            gwp=np.array([gwp[g] for g in gases], dtype=np.float64),
+            categorias=categorias,
+            **kw,
+        )
+
+
+@dataclass
+class SpendReport:
+    """Accumulated outcome of a spend-based Scope 3 run."""
+    tCO2e_por_categoria: dict[int, float] = field(default_factory=dict)
+    gasto_por_categoria: dict[int, float] = field(default_factory=dict)
+    lineas_leidas: int = 0
+    lineas_invalidas: int = 0   # missing or malformed field, category outside 1-15
+    lineas_sin_sector: dict[str, int] = field(default_factory=dict)      # commodity -> lines
+    monedas_desconocidas: dict[str, int] = field(default_factory=dict)   # currency -> lines
+    anios_sin_indice: dict[int, int] = field(default_factory=dict)       # price year -> lines
+
+    @property
+    def scope_3_tCO2e(self) -> float:
+        return sum(self.tCO2e_por_categoria.values())
+
+    def apply_to(self, summary: EmissionSummary) -> EmissionSummary:
+        """Add the spend-based results to ``summary``'s Scope 3 figures."""
+        for categoria, tCO2e in self.tCO2e_por_categoria.items():
+            summary.scope_3_por_categoria[categoria] = summary.scope_3_por_categoria.get(categoria, 0.0) + tCO2e
+        summary.scope_3_tCO2e += self.scope_3_tCO2e
+        return summary
+
+
+class SpendEngine:
+    """Spend-based Scope 3 calculator over an ``EEIOModel``.
+
+    Args:
+        modelo: EEIO intensities.
+        tipos_cambio: units of ``modelo.moneda`` per unit of each currency;
+            the model currency is always 1.
+        mapa_commodity: commodity code (or prefix) → EEIO sector; codes that
+            already are sectors need no entry.
+        proveedores: supplier-specific intensities in kgCO2e per unit of
+            ``modelo.moneda``, used instead of the sector intensity.
+        factor_consolidacion: ``ConsolidationConfig.factor_consolidacion``.
+        indice_precios: price index of ``modelo.moneda`` by year (any base).
+            Lines with an ``anio`` are deflated to ``modelo.anio_precios``;
+            without an index, or when the model has no price year, amounts
+            are used as they are.
+    """
+
+    def __init__(
+        self,
+        modelo: EEIOModel,
+        tipos_cambio: Optional[dict[str, float]] = None,
+        mapa_commodity: Optional[dict[str, str]] = None,
+        proveedores: Optional[dict[str, float]] = None,
+        factor_consolidacion: float = 1.0,
+        indice_precios: Optional[dict[int, float]] = None,
+    ):
+        self.modelo = modelo
+        self.tipos_cambio = {modelo.moneda: 1.0, **(tipos_cambio or {})}
+        self.mapa_commodity = {**{s: s for s in modelo.sectores}, **(mapa_commodity or {})}
+        self.proveedores = proveedores or {}
+        self.factor_consolidacion = factor_consolidacion
+        self.indice_precios = indice_precios or {}
+        if self.indice_precios and modelo.anio_precios and modelo.anio_precios not in self.indice_precios:
+            raise ValueError(f"El índice de precios no incluye el año de precios del modelo ({modelo.anio_precios})")
+
+        self._sector_pos = {s: i for i, s in enumerate(modelo.sectores)}
+        self._intensidades = modelo.intensidades
+        invalid = {c for c in modelo.categorias.values() if c not in SCOPE3_CATEGORIES}
+        if invalid:
+            raise ValueError(f"Categorías Scope 3 inválidas: {sorted(invalid)}")
+        self._sector_categoria = np.array(
+            [modelo.categorias.get(s, 1) for s in modelo.sectores], dtype=np.int64,
+        )
+        self._commodity_cache: dict[str, int] = {}   # commodity -> sector position, -1 if unmapped
+        self._spend = np.zeros((_N_CATEGORIES, len(modelo.sectores)))
+        self._supplier_kg = np.zeros(_N_CATEGORIES)
+        self._supplier_spend = np.zeros(_N_CATEGORIES)
+        self.report = SpendReport()
+
+    def sector_of(self, commodity: str) -> int:
+        """EEIO sector position of ``commodity`` by longest prefix, -1 if none."""
+        pos = self._commodity_cache.get(commodity)
+        if pos is None:
+            pos = -1
+            code = commodity.strip()
+            while code:
+                sector = self.mapa_commodity.get(code)
+                if sector is not None:
+                    pos = self._sector_pos[sector]
+                    break
+                code = code[:-1].rstrip(".-_ ")
+            self._commodity_cache[commodity] = pos
+        return pos
+
+    def add_lines(self, lines: Sequence[dict]) -> None:
+        """Accumulate one chunk of ledger lines.
+
+        Each line needs ``proveedor``, ``commodity``, ``moneda`` and
+        ``importe``; an optional ``categoria`` (1-15) overrides the sector's
+        default Scope 3 category and an optional ``anio`` is the price year
+        of the amount. Lines with a missing or malformed field or a category
+        outside 1-15 are skipped and counted in ``lineas_invalidas``, like
+        unknown currencies and commodities.
+        """
+        report = self.report
+        report.lineas_leidas += len(lines)
+        sector_col, amount_col, supplier_col, category_col = [], [], [], []
+        for line in lines:
+            try:
+                moneda = line["moneda"]
+                commodity = str(line["commodity"])
+                importe = float(line["importe"])
+                categoria = int(line.get("categoria") or 0)
+                anio = int(line["anio"]) if line.get("anio") else None
+                proveedor = line.get("proveedor")
+            except (KeyError, TypeError, ValueError):
+                report.lineas_invalidas += 1
+                continue
+            if not 0 <= categoria < _N_CATEGORIES:
+                report.lineas_invalidas += 1
+                continue
+            rate = self.tipos_cambio.get(moneda)
+            if rate is None:
+                report.monedas_desconocidas[moneda] = report.monedas_desconocidas.get(moneda, 0) + 1
+                continue
+            sector = self.sector_of(commodity)
+            if sector < 0:
+                report.lineas_sin_sector[commodity] = report.lineas_sin_sector.get(commodity, 0) + 1
+                continue
+            if self.indice_precios and self.modelo.anio_precios and anio is not None:
+                indice = self.indice_precios.get(anio)
+                if indice is None:
+                    report.anios_sin_indice[anio] = report.anios_sin_indice.get(anio, 0) + 1
+                    continue
+                rate = rate * self.indice_precios[self.modelo.anio_precios] / indice
+            sector_col.append(sector)
+            amount_col.append(importe * rate)
+            supplier_col.append(self.proveedores.get(proveedor, np.nan))
+            category_col.append(categoria)
+        if not sector_col:
+            return
+
+        sector = np.array(sector_col, dtype=np.int64)
+        amount = np.array(amount_col)
+        supplier = np.array(supplier_col)
+        categoria = np.array(category_col, dtype=np.int64)
+        categoria = np.where(categoria > 0, categoria, self._sector_categoria[sector])
+
+        own = ~np.isnan(supplier)
+        if own.any():
+            self._supplier_kg += np.bincount(categoria[own], weights=amount[own] * supplier[own], minlength=_N_CATEGORIES)
+            self._supplier_spend += np.bincount(categoria[own], weights=amount[own], minlength=_N_CATEGORIES)
+        eeio = ~own
+        n_sectors = len(self.modelo.sectores)
+        cell = categoria[eeio] * n_sectors + sector[eeio]
+        self._spend += np.bincount(cell, weights=amount[eeio], minlength=_N_CATEGORIES * n_sectors).reshape(
+            _N_CATEGORIES, n_sectors,
+        )
+
+    def finish(self) -> SpendReport:
+        """Apply the intensities (``S · f``) and return the report."""
+        kg = self._spend @ self._intensidades + self._supplier_kg
+        tCO2e = kg * self.factor_consolidacion / 1000.0  # kg -> tonnes
+        spend = self._spend.sum(axis=1) + self._supplier_spend
+        report = self.report
+        report.tCO2e_por_categoria = {c: float(tCO2e[c]) for c in range(1, _N_CATEGORIES) if spend[c]}
+        report.gasto_por_categoria = {c: float(spend[c]) for c in range(1, _N_CATEGORIES) if spend[c]}
+        return report
+
+    def calculate(self, lines: Iterable[dict], chunk_size: int = 100_000) -> SpendReport:
+        """Run the whole ledger in chunks of ``chunk_size`` lines."""
+        it = iter(lines)
+        while chunk := list(islice(it, chunk_size)):
+            self.add_lines(chunk)
+        return self.finish()
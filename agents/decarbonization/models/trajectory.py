@@ -0,0 +1,195 @@
+"""
+Phase 3 — Sendas de Objetivos (SBTi)
+====================================
+Annual target pathways from each organisation's base year to 2050, for
+whole portfolios at once as ``organizaciones × años`` arrays.
+
+Absolute contraction (ACA) — a constant linear annual reduction of
+base-year emissions, continued past the target year until zero:
+
+    E(t) = E0 * max(1 - r * (t - base), 0),   r = reducción / (objetivo - base)
+
+Net zero — near-term target, then long-term target (typically -90 %) at the
+net-zero year, linear between milestones and flat residual afterwards.
+
+Sectoral Decarbonization Approach (SDA) — the company intensity converges to
+its sector's intensity in the final year:
+
+    d    = I_c(base) - I_s(fin)
+    p(t) = (I_s(t) - I_s(fin)) / (I_s(base) - I_s(fin))
+    m(t) = (A_c(base) / A_s(base)) / (A_c(t) / A_s(t))     (market share, 1 without sector activity)
+    I_c(t) = d * p(t) * m(t) + I_s(fin),   E(t) = I_c(t) * A_c(t)
+
+Years before an organisation's base year are NaN.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .forecast import ANIO_FINAL
+
+
+@dataclass
+class TargetTrajectory:
+    """``organizaciones × años`` target emissions (tCO2e)."""
+    anios: np.ndarray
+    emisiones: np.ndarray
+    intensidad: Optional[np.ndarray] = None   # SDA only, tCO2e per unit of activity
+
+    def trayectoria(self, org: int) -> dict[int, float]:
+        """Year → target tCO2e of one organisation (from its base year)."""
+        row = self.emisiones[org]
+        return {int(a): float(v) for a, v in zip(self.anios, row) if not np.isnan(v)}
+
+    def en(self, anio: int) -> np.ndarray:
+        """Target tCO2e of every organisation in ``anio``."""
+        return self.emisiones[:, self._column(anio)]
+
+    def reduccion_pct(self, anio: int, anio_base: np.ndarray | int) -> np.ndarray:
+        """% reduction in ``anio`` versus each organisation's base year."""
+        base_col = self._column(np.asarray(anio_base, dtype=np.int64))
+        base = self.emisiones[np.arange(len(self.emisiones)), base_col]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(base > 0, (1.0 - self.en(anio) / base) * 100.0, 0.0)
+
+    def _column(self, anio: np.ndarray | int) -> np.ndarray | int:
+        anio = np.asarray(anio)
+        if anio.size and (anio.min() < self.anios[0] or anio.max() > self.anios[-1]):
+            raise ValueError(f"Año fuera de {self.anios[0]}-{self.anios[-1]}")
+        return anio - int(self.anios[0])
+
+
+class TrajectoryBuilder:
+    """Vectorised target pathways over the years ``anio_inicial``..``anio_final``.
+
+    Per-organisation arguments accept arrays or scalars (broadcast).
+    """
+
+    def __init__(self, anio_inicial: int, anio_final: int = ANIO_FINAL):
+        if anio_final < anio_inicial:
+            raise ValueError(f"anio_final ({anio_final}) anterior a anio_inicial ({anio_inicial})")
+        self.anios = np.arange(anio_inicial, anio_final + 1)
+
+    def absolute_contraction(
+        self,
+        emisiones_base: np.ndarray,
+        anio_base: np.ndarray | int,
+        reduccion_pct: np.ndarray | float,
+        anio_objetivo: np.ndarray | int,
+    ) -> TargetTrajectory:
+        e0, base, pct, target = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in (emisiones_base, anio_base, reduccion_pct, anio_objetivo))
+        )
+        self._check_base(base)
+        horizon = target - base
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(horizon > 0, pct / 100.0 / horizon, 0.0)
+        elapsed = self.anios[None, :] - base[:, None]
+        factor = np.clip(1.0 - rate[:, None] * elapsed, 0.0, None)
+        return TargetTrajectory(self.anios, self._mask(e0[:, None] * factor, elapsed))
+
+    def net_zero(
+        self,
+        emisiones_base: np.ndarray,
+        anio_base: np.ndarray | int,
+        reduccion_corto_pct: np.ndarray | float,
+        anio_corto: np.ndarray | int,
+        reduccion_largo_pct: np.ndarray | float = 90.0,
+        anio_neto_cero: np.ndarray | int = ANIO_FINAL,
+    ) -> TargetTrajectory:
+        e0, base, short_pct, short_year, long_pct, nz_year = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in (
+                emisiones_base, anio_base, reduccion_corto_pct, anio_corto, reduccion_largo_pct, anio_neto_cero,
+            ))
+        )
+        self._check_base(base)
+        if np.any(short_year > nz_year):
+            raise ValueError("El objetivo a corto plazo debe ser anterior al año de cero neto")
+        if np.any(short_year < base):
+            raise ValueError("El objetivo a corto plazo no puede ser anterior al año base")
+        knots_year = np.stack([base, short_year, nz_year], axis=1)
+        knots_factor = np.stack([np.ones_like(base), 1.0 - short_pct / 100.0, 1.0 - long_pct / 100.0], axis=1)
+        factor = self._piecewise(knots_year, knots_factor)
+        elapsed = self.anios[None, :] - base[:, None]
+        return TargetTrajectory(self.anios, self._mask(e0[:, None] * factor, elapsed))
+
+    def sda(
+        self,
+        intensidad_base: np.ndarray,
+        actividad_base: np.ndarray,
+        anio_base: np.ndarray | int,
+        sector_idx: np.ndarray | int,
+        intensidad_sector: np.ndarray,
+        crecimiento_actividad_pct: np.ndarray | float = 0.0,
+        actividad_sector: Optional[np.ndarray] = None,
+    ) -> TargetTrajectory:
+        """SDA intensity convergence.
+
+        Args:
+            intensidad_base: company tCO2e per unit of activity in its base year.
+            actividad_base: company activity in its base year.
+            sector_idx: row of each organisation in the sector arrays.
+            intensidad_sector: ``sectores × años`` sector intensity pathway
+                over ``self.anios``; convergence is to the last year.
+            crecimiento_actividad_pct: annual company activity growth.
+            actividad_sector: optional ``sectores × años`` sector activity for
+                the market-share term.
+        """
+        i0, a0, base, sector, growth = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in (
+                intensidad_base, actividad_base, anio_base, sector_idx, crecimiento_actividad_pct,
+            ))
+        )
+        self._check_base(base)
+        sector = sector.astype(np.int64)
+        rows = np.arange(len(base))
+        base_col = base.astype(np.int64) - int(self.anios[0])
+
+        sector_path = np.asarray(intensidad_sector, dtype=np.float64)[sector]   # orgs × años
+        final = sector_path[:, -1]
+        span = sector_path[rows, base_col] - final
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p = np.where(span[:, None] != 0, (sector_path - final[:, None]) / span[:, None], 1.0)
+
+        elapsed = self.anios[None, :] - base[:, None]
+        activity = a0[:, None] * (1.0 + growth[:, None] / 100.0) ** elapsed
+        if actividad_sector is None:
+            m = 1.0
+        else:
+            sector_activity = np.asarray(actividad_sector, dtype=np.float64)[sector]
+            share_base = a0 / sector_activity[rows, base_col]
+            m = share_base[:, None] / (activity / sector_activity)
+
+        intensity = (i0 - final)[:, None] * p * m + final[:, None]
+        return TargetTrajectory(
+            self.anios,
+            self._mask(intensity * activity, elapsed),
+            intensidad=self._mask(intensity, elapsed),
+        )
+
+    # --- Private helpers ---
+
+    def _check_base(self, base: np.ndarray) -> None:
+        if base.size and (base.min() < self.anios[0] or base.max() > self.anios[-1]):
+            raise ValueError(f"Año base fuera de {self.anios[0]}-{self.anios[-1]}")
+
+    def _piecewise(self, knots_year: np.ndarray, knots_factor: np.ndarray) -> np.ndarray:
+        """Per-row linear interpolation through ``orgs × k`` knots, flat outside."""
+        years = np.broadcast_to(self.anios.astype(np.float64), (len(knots_year), len(self.anios)))
+        out = np.broadcast_to(knots_factor[:, :1], years.shape).copy()
+        for k in range(knots_year.shape[1] - 1):
+            y0, y1 = knots_year[:, k:k + 1], knots_year[:, k + 1:k + 2]
+            f0, f1 = knots_factor[:, k:k + 1], knots_factor[:, k + 1:k + 2]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                frac = np.where(y1 > y0, (years - y0) / (y1 - y0), 1.0)
+            segment = years > y0
+            out = np.where(segment, f0 + (f1 - f0) * np.clip(frac, 0.0, 1.0), out)
+        return out
+
+    @staticmethod
+    def _mask(values: np.ndarray, elapsed: np.ndarray) -> np.ndarray:
+        return np.where(elapsed >= 0, values, np.nan)
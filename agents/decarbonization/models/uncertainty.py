@@ -0,0 +1,293 @@
+"""
+Phase 1 — Incertidumbre (Monte Carlo)
+=====================================
+Propagates the uncertainty of activity data and emission factors into
+percentile bands for every scope total of an ``EmissionSummary``.
+
+Each uncertain input carries a ``Distribution`` describing a multiplier
+around its point value (mean 1 for normal / lognormal, mode 1 for
+triangular). For every row the engine draws ``n_muestras`` multipliers as a
+dense NumPy matrix (stored rows × samples):
+
+    tCO2e_s = tCO2e_puntual * mult_actividad_s * mult_factor_s
+
+Factor multipliers are drawn once per distinct factor (same ``id`` and
+distribution) and shared by every row that uses it (a revised factor moves
+all of them together); activity multipliers are independent per row, and
+rows without any distribution are never sampled. Samples are processed in
+blocks of columns sized from ``max_bytes`` and each block is reduced to the
+bucket totals before the next is drawn, so working memory stays within
+``max_bytes`` (plus the ``buckets × samples`` totals) however many rows and
+distinct factors there are.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from .aggregation import BUCKET_S1, BUCKET_S2_LBM, BUCKET_S2_MBM, BUCKET_S3, N_BUCKETS, scope_bucket
+from .inventory import (
+    ActivityData,
+    EmissionFactor,
+    EmissionSource,
+    EmissionsEngine,
+    EmissionSummary,
+    Scope2Method,
+)
+
+Z_95 = 1.959963984540054  # two-sided 95 % normal quantile
+
+
+class DistributionType(Enum):
+    NORMAL = "normal"
+    LOGNORMAL = "lognormal"
+    TRIANGULAR = "triangular"
+
+
+_TYPE_CODES = {DistributionType.NORMAL: 1, DistributionType.LOGNORMAL: 2, DistributionType.TRIANGULAR: 3}
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """Relative uncertainty of a point value.
+
+    ``incertidumbre_pct`` is the half-width of the 95 % interval as a
+    percentage of the value (IPCC convention) for normal and lognormal
+    inputs. Triangular inputs use ``minimo`` / ``maximo`` as multipliers of
+    the value, which is the mode (e.g. 0.9 and 1.25).
+    """
+    tipo: DistributionType
+    incertidumbre_pct: float = 0.0
+    minimo: float = 1.0
+    maximo: float = 1.0
+
+    @classmethod
+    def normal(cls, incertidumbre_pct: float) -> Distribution:
+        return cls(DistributionType.NORMAL, incertidumbre_pct=incertidumbre_pct)
+
+    @classmethod
+    def lognormal(cls, incertidumbre_pct: float) -> Distribution:
+        return cls(DistributionType.LOGNORMAL, incertidumbre_pct=incertidumbre_pct)
+
+    @classmethod
+    def triangular(cls, minimo: float, maximo: float) -> Distribution:
+        return cls(DistributionType.TRIANGULAR, minimo=minimo, maximo=maximo)
+
+
+@dataclass
+class UncertaintySummary:
+    """Point summary plus Monte Carlo percentile bands per scope total."""
+    central: EmissionSummary
+    n_muestras: int
+    percentiles: tuple[float, ...]
+    bandas: dict[str, tuple[float, ...]] = field(default_factory=dict)  # summary field -> percentile values
+    media: dict[str, float] = field(default_factory=dict)
+
+    def banda(self, campo: str = "total_tCO2e") -> tuple[float, float]:
+        """Lowest and highest requested percentile of ``campo``."""
+        values = self.bandas[campo]
+        return values[0], values[-1]
+
+
+def _parameter_columns(dists: Sequence[Optional[Distribution]]) -> tuple[np.ndarray, ...]:
+    """Type code, relative σ, triangular min / max for each distribution."""
+    n = len(dists)
+    code = np.zeros(n, dtype=np.int8)
+    sigma = np.zeros(n)
+    lo = np.ones(n)
+    hi = np.ones(n)
+    for i, d in enumerate(dists):
+        if d is None:
+            continue
+        code[i] = _TYPE_CODES[d.tipo]
+        sigma[i] = d.incertidumbre_pct / 100.0 / Z_95
+        lo[i], hi[i] = d.minimo, d.maximo
+    # Lognormal: 95 % half-width p means ln(1 + p) = 1.96 σ_ln; μ keeps the mean at 1.
+    lognormal = code == 2
+    sigma[lognormal] = np.log1p(sigma[lognormal] * Z_95) / Z_95
+    return code, sigma, lo, hi
+
+
+def sample_multipliers(
+    rng: np.random.Generator,
+    n_muestras: int,
+    code: np.ndarray,
+    sigma: np.ndarray,
+    lo: np.ndarray,
+    hi: np.ndarray,
+) -> np.ndarray:
+    """``columns × samples`` multipliers for columns of mixed distributions.
+
+    Each column's samples are contiguous, so per-column scaling and grouped
+    sums stay cache-friendly.
+    """
+    out = np.ones((len(code), n_muestras))
+    for tipo in (1, 2):
+        cols = np.flatnonzero(code == tipo)
+        if cols.size:
+            block = rng.standard_normal((cols.size, n_muestras))
+            s = sigma[cols][:, None]
+            block *= s
+            if tipo == 1:
+                block += 1.0
+            else:
+                block -= 0.5 * s * s
+                np.exp(block, out=block)
+            out[cols] = block
+    cols = np.flatnonzero(code == 3)
+    if cols.size:
+        # Inverse CDF of a triangular distribution with mode 1.
+        u = rng.random((cols.size, n_muestras))
+        a, b = lo[cols][:, None], hi[cols][:, None]
+        width = b - a
+        with np.errstate(divide="ignore", invalid="ignore"):
+            f_mode = np.where(width > 0, (1.0 - a) / width, 0.5)
+        left = u < f_mode
+        block = np.where(left, u * (width * (1.0 - a)), (1.0 - u) * (width * (b - 1.0)))
+        np.sqrt(block, out=block)
+        out[cols] = np.where(left, a + block, b - block)
+    return out
+
+
+class MonteCarloEngine:
+    """Uncertainty mode of ``EmissionsEngine``.
+
+    Point values come from ``engine.calculate`` (units and consolidation
+    included); the distributions on ``ActivityData.incertidumbre`` and
+    ``EmissionFactor.incertidumbre`` only scale them. Inputs without a
+    distribution are treated as exact.
+    """
+
+    def __init__(
+        self,
+        engine: EmissionsEngine,
+        n_muestras: int = 10_000,
+        percentiles: Sequence[float] = (2.5, 50.0, 97.5),
+        seed: Optional[int] = None,
+        max_bytes: int = 64 * 2**20,
+    ):
+        self.engine = engine
+        self.n_muestras = n_muestras
+        self.percentiles = tuple(percentiles)
+        self.seed = seed
+        self.max_bytes = max_bytes
+
+    def summarize(
+        self,
+        rows: Iterable[tuple[ActivityData, EmissionFactor, EmissionSource, Optional[Scope2Method]]],
+        anio: int,
+    ) -> UncertaintySummary:
+        """Percentile bands of each scope total for the rows of ``anio``.
+
+        ``rows`` are the ``(activity, factor, source, scope2_method)``
+        arguments of ``EmissionsEngine.build_result``.
+        """
+        point, bucket, act_dists, factor_pos, factor_dists = [], [], [], [], []
+        seen: dict[tuple, int] = {}  # (factor id, distribution) -> column
+        for activity, factor, source, method in rows:
+            if activity.anio != anio:
+                continue
+            tCO2e = self.engine.calculate(activity, factor)
+            point.append(tCO2e)
+            bucket.append(scope_bucket(source.scope, method))
+            act_dists.append(activity.incertidumbre)
+            key = (factor.id, factor.incertidumbre)
+            col = seen.get(key)
+            if col is None:
+                col = seen[key] = len(factor_dists)
+                factor_dists.append(factor.incertidumbre)
+            factor_pos.append(col)
+
+        return self.summarize_columns(
+            np.asarray(point, dtype=np.float64),
+            np.asarray(bucket, dtype=np.int64),
+            act_dists,
+            np.asarray(factor_pos, dtype=np.int64),
+            factor_dists,
+            anio,
+        )
+
+    def summarize_columns(
+        self,
+        point: np.ndarray,
+        bucket: np.ndarray,
+        act_dists: Sequence[Optional[Distribution]],
+        factor_pos: np.ndarray,
+        factor_dists: Sequence[Optional[Distribution]],
+        anio: int,
+    ) -> UncertaintySummary:
+        """Columnar core of ``summarize``.
+
+        Args:
+            point: point tCO2e per row.
+            bucket: summary bucket per row (S1, S2 LBM, S2 MBM, S3).
+            act_dists: activity distribution per row.
+            factor_pos: column of each row's factor in ``factor_dists``.
+            factor_dists: one distribution per distinct factor.
+        """
+        rng = np.random.default_rng(self.seed)
+        n = self.n_muestras
+        point = np.asarray(point, dtype=np.float64)
+        bucket = np.asarray(bucket, dtype=np.int64)
+        factor_pos = np.asarray(factor_pos, dtype=np.int64)
+        central = np.bincount(bucket, weights=point, minlength=N_BUCKETS)
+
+        # Rows sharing (bucket, factor) are summed before the factor multiplier
+        # is applied: Σ_r p_r·a_r·f = f·Σ_r p_r·a_r.
+        n_factors = max(len(factor_dists), 1)
+        groups, group = np.unique(bucket * n_factors + factor_pos, return_inverse=True)
+        group_bucket = groups // n_factors
+        group_factor = groups % n_factors
+
+        act_code, act_sigma, act_lo, act_hi = _parameter_columns(act_dists)
+        factor_params = _parameter_columns(factor_dists)
+        exact = act_code == 0
+        exact_sums = np.bincount(group[exact], weights=point[exact], minlength=len(groups))
+
+        # Uncertain rows, ordered by group so each chunk reduces contiguous runs.
+        order = np.flatnonzero(~exact)
+        order = order[np.argsort(group[order], kind="stable")]
+
+        # Per sample column: group sums, their factor-scaled copy and the factor draws.
+        block = max(1, self.max_bytes // (8 * (2 * len(groups) + len(factor_dists) + 1)))
+        totals = np.zeros((N_BUCKETS, n))
+        for s0 in range(0, n, block):
+            width = min(block, n - s0)
+            sums = np.empty((len(groups), width))
+            sums[:] = exact_sums[:, None]
+            chunk = max(1, self.max_bytes // (8 * width * 3))
+            for start in range(0, len(order), chunk):
+                rows = order[start:start + chunk]
+                samples = sample_multipliers(rng, width, act_code[rows], act_sigma[rows], act_lo[rows], act_hi[rows])
+                samples *= point[rows][:, None]
+                g = group[rows]
+                starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+                sums[g[starts]] += np.add.reduceat(samples, starts, axis=0)
+            if len(groups):
+                sums *= sample_multipliers(rng, width, *factor_params)[group_factor]
+            np.add.at(totals[:, s0:s0 + width], group_bucket, sums)
+
+        columns = {
+            "scope_1_tCO2e": totals[BUCKET_S1],
+            "scope_2_lbm_tCO2e": totals[BUCKET_S2_LBM],
+            "scope_2_mbm_tCO2e": totals[BUCKET_S2_MBM],
+            "scope_3_tCO2e": totals[BUCKET_S3],
+            "total_tCO2e": totals[BUCKET_S1] + totals[BUCKET_S2_LBM] + totals[BUCKET_S3],
+        }
+        return UncertaintySummary(
+            central=EmissionSummary(
+                anio=anio,
+                scope_1_tCO2e=float(central[BUCKET_S1]),
+                scope_2_lbm_tCO2e=float(central[BUCKET_S2_LBM]),
+                scope_2_mbm_tCO2e=float(central[BUCKET_S2_MBM]),
+                scope_3_tCO2e=float(central[BUCKET_S3]),
+            ),
+            n_muestras=n,
+            percentiles=self.percentiles,
+            bandas={k: tuple(np.percentile(v, self.percentiles).tolist()) for k, v in columns.items()},
+            media={k: float(v.mean()) for k, v in columns.items()},
+        )
@@ -0,0 +1,195 @@
+"""
+Phase 1 — Conversión de Unidades
+================================
+Reconciles ``ActivityData.unidad`` with ``EmissionFactor.unidad_actividad``.
+
+Unit strings are parsed once into interned integer IDs. Every known unit
+belongs to a dimension (energía, volumen, masa, distancia) with a scale to
+that dimension's base unit, from which a dense conversion-factor matrix is
+precomputed. Conversions are therefore a single multiply per row — or one
+vectorised multiply per column in the batch engine.
+
+Units from different dimensions (e.g. m3 of gas vs GJ) have no conversion
+factor; they are reported together in a ``UnitMismatchError`` instead of
+being multiplied silently.
+Unrecognised strings all parse to the reserved ``UNKNOWN_UNIT`` code
+instead of being registered, so junk input cannot grow a shared registry;
+they only convert to an identical spelling.
+
+Parsing and scalar conversion are pure Python; NumPy is only imported by
+the column methods used by the batch engine.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Dimension, scale to base unit (kWh, m3, kg, km) and accepted spellings.
+UNIT_DEFINITIONS: dict[str, tuple[str, float, tuple[str, ...]]] = {
+    # Energía (base: kWh)
+    "Wh": ("energia", 1e-3, ("wh",)),
+    "kWh": ("energia", 1.0, ("kwh", "kw·h", "kw-h")),
+    "MWh": ("energia", 1e3, ("mwh",)),
+    "GWh": ("energia", 1e6, ("gwh",)),
+    "MJ": ("energia", 1 / 3.6, ("mj",)),
+    "GJ": ("energia", 1e3 / 3.6, ("gj",)),
+    "TJ": ("energia", 1e6 / 3.6, ("tj",)),
+    "therm": ("energia", 29.3071, ("therm", "therms", "termia", "termias")),
+    "MMBtu": ("energia", 293.071, ("mmbtu",)),
+    "tep": ("energia", 11_630.0, ("tep", "toe")),
+    # Volumen (base: m3)
+    "litros": ("volumen", 1e-3, ("l", "lt", "litro", "litros", "litre", "litres", "liter", "liters")),
+    "hl": ("volumen", 0.1, ("hl", "hectolitros")),
+    "m3": ("volumen", 1.0, ("m3", "m^3", "metros cubicos", "metros cúbicos")),
+    "gal": ("volumen", 0.003785411784, ("gal", "gallon", "gallons", "galon", "galón", "galones", "us gal")),
+    "gal_imp": ("volumen", 0.00454609, ("gal_imp", "imp gal", "uk gal", "imperial gallons")),
+    "bbl": ("volumen", 0.158987294928, ("bbl", "barril", "barriles", "barrel", "barrels")),
+    # Masa (base: kg)
+    "g": ("masa", 1e-3, ("g", "gramos")),
+    "kg": ("masa", 1.0, ("kg", "kilogramos", "kilos")),
+    "t": ("masa", 1e3, ("t", "tonelada", "toneladas", "tonne", "tonnes")),
+    "kt": ("masa", 1e6, ("kt",)),
+    "lb": ("masa", 0.45359237, ("lb", "lbs", "libras")),
+    # Distancia (base: km)
+    "m": ("distancia", 1e-3, ("m", "metros")),
+    "km": ("distancia", 1.0, ("km", "kilometros", "kilómetros")),
+    "mi": ("distancia", 1.609344, ("mi", "milla", "millas", "miles")),
+}
+
+
+UNKNOWN_UNIT = 0   # code of every unrecognised unit string
+
+
+def _normalize(unidad: str) -> str:
+    return " ".join(unidad.strip().lower().replace("³", "3").split())
+
+
+class UnitMismatchError(ValueError):
+    """Raised when activity and factor units cannot be converted.
+
+    Attributes:
+        filas: row indices (within the checked batch) with no conversion.
+        pares: ``{(unidad_actividad, unidad_factor): n_filas}``.
+    """
+
+    def __init__(self, filas: Sequence[int] | np.ndarray, pares: dict[tuple[str, str], int]):
+        self.filas = filas
+        self.pares = pares
+        detalle = ", ".join(f"{a} -> {b} ({n} filas)" for (a, b), n in pares.items())
+        super().__init__(f"{len(filas)} filas con unidades incompatibles: {detalle}")
+
+
+class UnitRegistry:
+    """Interns unit strings and converts between them.
+
+    Unknown strings parse to ``UNKNOWN_UNIT`` and are not remembered. The
+    scalar methods still convert an unknown unit to an identical spelling
+    (factor 1.0); in columns of IDs ``UNKNOWN_UNIT`` converts to nothing.
+    """
+
+    def __init__(self, definitions: dict[str, tuple[str, float, tuple[str, ...]]] = UNIT_DEFINITIONS):
+        self._ids: dict[str, int] = {}            # raw or normalised spelling -> id
+        self._names: list[str] = []               # id -> canonical name
+        self._dimensions: list[str] = []
+        self._scales: list[float] = []
+        self._matrix: np.ndarray | None = None
+
+        self._intern("desconocida", "?", float("nan"))   # UNKNOWN_UNIT
+        for name, (dimension, scale, aliases) in definitions.items():
+            unit_id = self._intern(name, dimension, scale)
+            for alias in (name, *aliases):
+                self._ids[_normalize(alias)] = unit_id
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def name(self, unit_id: int) -> str:
+        return self._names[unit_id]
+
+    def parse(self, unidad: str) -> int:
+        """Return the interned ID for ``unidad`` (``UNKNOWN_UNIT`` if unrecognised)."""
+        unit_id = self._ids.get(unidad)
+        if unit_id is not None:
+            return unit_id
+        unit_id = self._ids.get(_normalize(unidad))
+        if unit_id is None:
+            return UNKNOWN_UNIT
+        self._ids[unidad] = unit_id
+        return unit_id
+
+    def parse_many(self, unidades: Iterable[str]) -> np.ndarray:
+        """Vector of unit IDs; each distinct string is parsed only once."""
+        import numpy as np
+
+        return np.fromiter((self.parse(u) for u in unidades), dtype=np.int32)
+
+    @property
+    def conversion_matrix(self) -> np.ndarray:
+        """``M[a, b]`` converts a quantity in unit ``a`` into unit ``b`` (NaN if impossible)."""
+        import numpy as np
+
+        if self._matrix is None or self._matrix.shape[0] != len(self._names):
+            scales = np.asarray(self._scales)
+            dims = np.asarray(self._dimensions, dtype=object)
+            matrix = scales[:, None] / scales[None, :]
+            matrix[dims[:, None] != dims[None, :]] = np.nan
+            np.fill_diagonal(matrix, 1.0)
+            matrix[UNKNOWN_UNIT, :] = matrix[:, UNKNOWN_UNIT] = np.nan
+            self._matrix = matrix
+        return self._matrix
+
+    def convertible(self, desde: str, hacia: str) -> bool:
+        a, b = self.parse(desde), self.parse(hacia)
+        if UNKNOWN_UNIT in (a, b):
+            return _normalize(desde) == _normalize(hacia)
+        return a == b or self._dimensions[a] == self._dimensions[b]
+
+    def factor(self, desde: str, hacia: str) -> float:
+        """Scalar conversion factor from ``desde`` to ``hacia``.
+
+        Raises:
+            UnitMismatchError: if the units belong to different dimensions,
+                or are unrecognised and spelt differently.
+        """
+        a, b = self.parse(desde), self.parse(hacia)
+        if UNKNOWN_UNIT in (a, b):
+            if _normalize(desde) == _normalize(hacia):
+                return 1.0
+            raise UnitMismatchError([0], {(desde.strip(), hacia.strip()): 1})
+        if a == b:
+            return 1.0
+        if self._dimensions[a] != self._dimensions[b]:
+            raise UnitMismatchError([0], {(self._names[a], self._names[b]): 1})
+        return self._scales[a] / self._scales[b]
+
+    def conversion_column(self, desde: np.ndarray, hacia: np.ndarray) -> np.ndarray:
+        """Per-row conversion factors for two columns of unit IDs.
+
+        Raises:
+            UnitMismatchError: listing every non-convertible row at once.
+        """
+        import numpy as np
+
+        factors = self.conversion_matrix[desde, hacia]
+        bad = np.flatnonzero(np.isnan(factors))
+        if bad.size:
+            pairs, counts = np.unique(np.stack([desde[bad], hacia[bad]], axis=1), axis=0, return_counts=True)
+            raise UnitMismatchError(bad, {
+                (self._names[a], self._names[b]): int(n) for (a, b), n in zip(pairs.tolist(), counts.tolist())
+            })
+        return factors
+
+    # --- Private helpers ---
+
+    def _intern(self, name: str, dimension: str, scale: float) -> int:
+        self._names.append(name)
+        self._dimensions.append(dimension)
+        self._scales.append(scale)
+        return len(self._names) - 1
+
+
+DEFAULT_UNITS = UnitRegistry()
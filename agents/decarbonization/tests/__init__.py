@@ -4,7 +4,48 @@ Tests for the Decarbonization Agent System
 Validates all 4 phases: data models, formulas, decision rules, and MACC calculations.
 """
 
+import copy
+import json
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
+
+import numpy as np
+
+from agents.decarbonization.models.aggregation import EmissionCube, IncrementalSummary
+from agents.decarbonization.models.allocation import AllocationEngine, DriverMatrix
+from agents.decarbonization.models.batch import EmissionResultTable
+from agents.decarbonization.models.consolidation import ConsolidationTree
+from agents.decarbonization.models.dcf import DCFAssumptions, DCFEngine
+from agents.decarbonization.models.dependencies import TrackingEmissionsEngine, recalculate_book
+from agents.decarbonization.models.deployment import NO_DESPLEGADA, DeploymentSimulator
+from agents.decarbonization.models.factor_registry import GLOBAL, FactorRegistry
+from agents.decarbonization.models.footprint import BOMCycleError, BOMGraph
+from agents.decarbonization.models.forecast import (
+    ACTIVITY_DRIVERS,
+    INTENSITY_DRIVERS,
+    BAUForecaster,
+    BAUScenario,
+    SourceDrivers,
+)
+from agents.decarbonization.models.gases import GasInventory, GWPRegistry
+from agents.decarbonization.models.hourly import (
+    HourlyContracts,
+    HourlyGridFactors,
+    calculate_hourly_scope2,
+    load_hourly,
+    save_hourly,
+)
+from agents.decarbonization.models.logistics import FreightEngine, FreightLeg, Shipment, SiteRegistry
+from agents.decarbonization.models.spend import EEIOModel, SpendEngine
+from agents.decarbonization.models.stacking import StackingEngine
+from agents.decarbonization.models.trajectory import TrajectoryBuilder
+from agents.decarbonization.models.uncertainty import Distribution, MonteCarloEngine
+from agents.decarbonization.models.units import UNKNOWN_UNIT, UnitMismatchError, UnitRegistry
+from agents.decarbonization.utils.ingestion import stream_inventory, stream_spend
+from agents.decarbonization.utils.reporting import export_inventory_csv
 from agents.decarbonization.models.inventory import (
     ActivityData,
     ConsolidationConfig,
@@ -24,11 +65,16 @@ from agents.decarbonization.models.inventory import (
     Scope2Method,
     TimeHorizon,
 )
+from agents.decarbonization.agents.category_classifier import CategoryClassifier, classify
 from agents.decarbonization.agents.diagnostic_agent import (
     DiagnosticAgent,
     DiagnosticInput,
+    DiagnosticOutput,
+    PrioritySource,
 )
+from agents.decarbonization.agents.measure_catalog import MeasureCatalog, MeasureTemplate, _round_tenths
 from agents.decarbonization.agents.pathway_agent import PathwayAgent
+from agents.decarbonization.agents.portfolio import PortfolioRunner
 from agents.decarbonization.agents.financial_agent import (
     FinancialAgent,
     MeasureEconomics,
@@ -118,6 +164,1270 @@ class TestCoreFormula(unittest.TestCase):
         self.assertAlmostEqual(summary._intensidad_ingreso, 0.00005)
 
 
+class TestBatchCalculation(unittest.TestCase):
+    """Columnar engine must reproduce the scalar formula row by row."""
+
+    def setUp(self):
+        self.engine = EmissionsEngine(ConsolidationConfig(
+            tipo=ConsolidationType.EQUITY_SHARE, participacion_porcentaje=37.5,
+        ))
+
+    def test_matches_scalar_formula(self):
+        rng = np.random.default_rng(7)
+        cantidad = rng.uniform(0, 1e6, 500)
+        factor = rng.uniform(0.01, 5.0, 500)
+        gwp = rng.choice([1.0, 28.0, 265.0, 2088.0], 500)
+        table = self.engine.calculate_batch(
+            cantidad, factor, gwp, np.full(500, 1), np.full(500, 2023), np.arange(500),
+        )
+        for i in range(500):
+            expected = self.engine.calculate(
+                ActivityData(source_id="S", cantidad=cantidad[i], unidad="kWh", anio=2023),
+                EmissionFactor(id="EF", nombre="", factor=factor[i], unidad_actividad="kWh", gwp=gwp[i]),
+            )
+            self.assertEqual(table.tCO2e[i], expected)
+
+    def test_scope2_method_only_on_scope2_rows(self):
+        table = self.engine.calculate_batch(
+            [1000, 1000], [0.5, 0.5], [1.0, 1.0], [1, 2], [2023, 2023], [0, 1],
+            scope2_method=Scope2Method.MARKET_BASED, source_ids=["S1", "S2"],
+        )
+        results = table.to_results()
+        self.assertIsNone(results[0].scope2_method)
+        self.assertEqual(results[1].scope2_method, Scope2Method.MARKET_BASED)
+        self.assertEqual(results[1].source_id, "S2")
+
+    def test_summarize_matches_engine(self):
+        table = self.engine.calculate_batch(
+            [1000, 2000, 3000, 4000, 5000],
+            [1.0] * 5, [1.0] * 5,
+            [1, 2, 2, 3, 1],
+            [2023, 2023, 2023, 2023, 2024],
+            np.arange(5),
+            scope2_method=np.array([0, 1, 2, 0, 0]),
+        )
+        self.assertIsInstance(table, EmissionResultTable)
+        expected = EmissionsEngine.summarize(table.to_results(), 2023)
+        summary = table.summarize(2023)
+        self.assertAlmostEqual(summary.scope_1_tCO2e, expected.scope_1_tCO2e)
+        self.assertAlmostEqual(summary.scope_2_lbm_tCO2e, expected.scope_2_lbm_tCO2e)
+        self.assertAlmostEqual(summary.scope_2_mbm_tCO2e, expected.scope_2_mbm_tCO2e)
+        self.assertAlmostEqual(summary.scope_3_tCO2e, expected.scope_3_tCO2e)
+
+
+class TestFactorRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = FactorRegistry(regiones={"PT": "EU", "ES": "EU"})
+        self.registry.load_rows([
+            {"categoria": "electricidad", "unidad": "kWh", "pais": "ES", "anio": 2022, "fuente": "REE", "factor": 0.17},
+            {"categoria": "electricidad", "unidad": "kWh", "pais": "ES", "anio": 2023, "fuente": "REE", "factor": 0.15},
+            {"categoria": "electricidad", "unidad": "kWh", "pais": "EU", "anio": 2023, "fuente": "EEA", "factor": 0.25},
+            {"categoria": "electricidad", "unidad": "kWh", "pais": GLOBAL, "anio": 2023, "fuente": "IEA", "factor": 0.45},
+            {"categoria": "diesel", "unidad": "litros", "pais": GLOBAL, "anio": 2023, "fuente": "DEFRA", "factor": 2.68},
+        ])
+
+    def test_fallback_chain(self):
+        self.assertAlmostEqual(self.registry.resolve("electricidad", "kWh", "ES", 2023).factor, 0.15)
+        self.assertAlmostEqual(self.registry.resolve("electricidad", "kWh", "PT", 2023).factor, 0.25)
+        self.assertAlmostEqual(self.registry.resolve("electricidad", "kWh", "US", 2023).factor, 0.45)
+        self.assertIsNone(self.registry.resolve("electricidad", "MWh", "ES", 2023))
+
+    def test_most_recent_year_not_after_reporting_year(self):
+        self.assertAlmostEqual(self.registry.resolve("electricidad", "kWh", "ES", 2022).factor, 0.17)
+        self.assertAlmostEqual(self.registry.resolve("electricidad", "kWh", "ES", 2025).factor, 0.15)
+
+    def test_identical_rows_are_interned(self):
+        row = {"categoria": "glp", "unidad": "litros", "anio": 2023, "fuente": "DEFRA", "factor": 1.56, "id": "EF-GLP"}
+        self.registry.load_rows([dict(row, pais="ES"), dict(row, pais="PT"), dict(row, pais="ES", anio=2024)])
+        self.assertIs(
+            self.registry.resolve("glp", "litros", "ES", 2023),
+            self.registry.resolve("glp", "litros", "PT", 2023),
+        )
+        self.assertIs(
+            self.registry.resolve("glp", "litros", "ES", 2023),
+            self.registry.resolve("glp", "litros", "ES", 2024),
+        )
+
+    def test_resolve_sources_uses_facility_country(self):
+        sources = [
+            EmissionSource(id="S1", nombre="", descripcion="", scope=Scope.SCOPE_2,
+                           facility_id="F1", categoria="electricidad_comprada"),
+            EmissionSource(id="S2", nombre="", descripcion="", scope=Scope.SCOPE_1,
+                           facility_id="F2", categoria="diesel"),
+        ]
+        activities = [
+            ActivityData(source_id="S1", cantidad=10, unidad="kWh", anio=2023),
+            ActivityData(source_id="S2", cantidad=10, unidad="litros", anio=2023),
+        ]
+        facilities = [Facility("F1", "", "", "PT"), Facility("F2", "", "", "ES")]
+        factors = self.registry.resolve_sources(
+            sources, activities, facilities, categorias={"electricidad_comprada": "electricidad"},
+        )
+        self.assertAlmostEqual(factors[("S1", 2023)].factor, 0.25)
+        self.assertAlmostEqual(factors[("S2", 2023)].factor, 2.68)
+
+    def test_resolve_sources_keys_by_year_and_converts_units(self):
+        sources = [EmissionSource(id="S1", nombre="", descripcion="", scope=Scope.SCOPE_2,
+                                  facility_id="F1", categoria="electricidad")]
+        activities = [
+            ActivityData(source_id="S1", cantidad=10, unidad="kWh", anio=2022),
+            ActivityData(source_id="S1", cantidad=10, unidad="MWh", anio=2023),
+        ]
+        factors = self.registry.resolve_sources(sources, activities, [Facility("F1", "", "", "ES")])
+        self.assertAlmostEqual(factors[("S1", 2022)].factor, 0.17)
+        self.assertAlmostEqual(factors[("S1", 2023)].factor, 0.15)
+
+    def test_derived_id_survives_a_revised_value(self):
+        row = {"categoria": "electricidad", "unidad": "kWh", "pais": "ES", "anio": 2023, "fuente": "REE"}
+        before = self.registry.resolve("electricidad", "kWh", "ES", 2023)
+        self.registry.load_rows([dict(row, factor=0.14)])
+        after = self.registry.resolve("electricidad", "kWh", "ES", 2023)
+        self.assertAlmostEqual(after.factor, 0.14)
+        self.assertEqual(after.id, before.id)
+        self.assertNotEqual(after.id, self.registry.resolve("electricidad", "kWh", "ES", 2022).id)
+
+    def test_default_table_loads(self):
+        registry = FactorRegistry.from_defaults()
+        self.assertAlmostEqual(registry.resolve("r410a", "kg", "ES", 2023).gwp, 2088.0)
+
+
+class TestUnitConversion(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = EmissionsEngine(ConsolidationConfig(ConsolidationType.OPERATIONAL_CONTROL))
+        self.units = self.engine.units
+
+    def test_aliases_share_interned_id(self):
+        self.assertEqual(self.units.parse("litros"), self.units.parse(" Liters "))
+        self.assertEqual(self.units.parse("m³"), self.units.parse("m3"))
+        self.assertNotEqual(self.units.parse("kWh"), self.units.parse("MWh"))
+
+    def test_scalar_path_converts_mwh_to_kwh(self):
+        activity = ActivityData(source_id="S1", cantidad=1, unidad="MWh", anio=2023)
+        factor = EmissionFactor(id="EF1", nombre="grid", factor=0.5, unidad_actividad="kWh")
+        self.assertAlmostEqual(self.engine.calculate(activity, factor), 0.5)
+
+    def test_scalar_path_rejects_incompatible_units(self):
+        activity = ActivityData(source_id="S1", cantidad=1000, unidad="m3", anio=2023)
+        factor = EmissionFactor(id="EF1", nombre="gas", factor=56.1, unidad_actividad="GJ")
+        with self.assertRaises(UnitMismatchError):
+            self.engine.calculate(activity, factor)
+
+    def test_gallons_to_litres(self):
+        self.assertAlmostEqual(self.units.factor("gallons", "litros"), 3.785411784)
+
+    def test_batch_matches_scalar_with_conversion(self):
+        unidades = ["MWh", "kWh", "gal", "t"]
+        unidades_factor = ["kWh", "kWh", "litros", "kg"]
+        cantidad = np.array([2.5, 1000.0, 100.0, 3.0])
+        factor = np.array([0.15, 0.15, 2.68, 1.0])
+        table = self.engine.calculate_batch(
+            cantidad, factor, np.ones(4), np.ones(4), np.full(4, 2023), np.arange(4),
+            unidad=self.units.parse_many(unidades), unidad_factor=self.units.parse_many(unidades_factor),
+        )
+        for i in range(4):
+            expected = self.engine.calculate(
+                ActivityData(source_id="S", cantidad=cantidad[i], unidad=unidades[i], anio=2023),
+                EmissionFactor(id="EF", nombre="", factor=factor[i], unidad_actividad=unidades_factor[i]),
+            )
+            self.assertEqual(table.tCO2e[i], expected)
+
+    def test_batch_reports_all_mismatches_at_once(self):
+        units = UnitRegistry()
+        desde = units.parse_many(["m3", "kWh", "m3", "unidades", "kg"])
+        hacia = units.parse_many(["GJ", "kWh", "GJ", "kg", "t"])
+        with self.assertRaises(UnitMismatchError) as ctx:
+            units.conversion_column(desde, hacia)
+        self.assertEqual(ctx.exception.filas.tolist(), [0, 2, 3])
+        self.assertEqual(ctx.exception.pares[("m3", "GJ")], 2)
+        self.assertEqual(ctx.exception.pares[("desconocida", "kg")], 1)
+
+    def test_unknown_units_are_not_registered(self):
+        units = UnitRegistry()
+        size = len(units)
+        self.assertEqual(units.parse("palés"), UNKNOWN_UNIT)
+        units.parse_many(f"basura-{i}" for i in range(100))
+        self.assertEqual(len(units), size)
+        self.assertEqual(units.factor("Palés", " palés"), 1.0)
+        self.assertFalse(units.convertible("palés", "cajas"))
+        with self.assertRaises(UnitMismatchError):
+            units.factor("palés", "kg")
+
+    def test_scalar_path_without_numpy(self):
+        code = (
+            "import sys; sys.modules['numpy'] = None\n"
+            "from agents.decarbonization.models.inventory import *\n"
+            "engine = EmissionsEngine(ConsolidationConfig(ConsolidationType.OPERATIONAL_CONTROL))\n"
+            "activity = ActivityData(source_id='S', cantidad=2.0, unidad='MWh', anio=2023)\n"
+            "factor = EmissionFactor(id='EF', nombre='', factor=0.5, unidad_actividad='kWh')\n"
+            "print(engine.calculate(activity, factor))\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        self.assertAlmostEqual(float(out.stdout), 1.0)
+
+
+class TestStreamingIngestion(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sources = [
+            EmissionSource(id="S1", nombre="", descripcion="", scope=Scope.SCOPE_2,
+                           facility_id="F1", categoria="electricidad"),
+            EmissionSource(id="S2", nombre="", descripcion="", scope=Scope.SCOPE_1,
+                           facility_id="F2", categoria="diesel"),
+        ]
+        self.facilities = [Facility("F1", "", "", "ES"), Facility("F2", "", "", "ES")]
+        self.registry = FactorRegistry.from_defaults()
+        self.engine = EmissionsEngine(ConsolidationConfig(ConsolidationType.OPERATIONAL_CONTROL))
+
+        csv_path = os.path.join(self.tmp.name, "a.csv")
+        with open(csv_path, "w", encoding="utf-8") as fh:
+            fh.write("source_id,cantidad,unidad,anio\n")
+            for i in range(250):
+                fh.write(f"S1,{1000 + i},kWh,{2022 + i % 2}\n")
+            fh.write("S9,1,kWh,2023\n")       # unknown source
+            fh.write("S1,5,MWh,2023\n")       # converted
+        jsonl_path = os.path.join(self.tmp.name, "b.jsonl")
+        with open(jsonl_path, "w", encoding="utf-8") as fh:
+            for i in range(120):
+                fh.write(json.dumps({"source_id": "S2", "cantidad": 50 + i, "unidad": "litros", "anio": 2023}) + "\n")
+            fh.write(json.dumps({"source_id": "S2", "cantidad": 1, "unidad": "kg", "anio": 2023}) + "\n")
+        self.paths = [csv_path, jsonl_path]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_missing_geography_is_not_a_unit_mismatch(self):
+        registry = FactorRegistry()
+        registry.add("electricidad", "kWh", "ES", 2023, "REE", 0.15)
+        path = os.path.join(self.tmp.name, "fr.csv")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write("source_id,cantidad,unidad,anio\nS1,10,kWh,2023\nS1,10,kg,2023\nS3,10,kWh,2023\nS3,10,kg,2023\n")
+        sources = self.sources + [EmissionSource(id="S3", nombre="", descripcion="", scope=Scope.SCOPE_2,
+                                                 facility_id="F3", categoria="electricidad")]
+        facilities = self.facilities + [Facility("F3", "", "", "FR")]
+        report = stream_inventory([path], sources, facilities, registry, self.engine)
+        self.assertEqual(report.filas_sin_factor, 2)
+        self.assertEqual(report.unidades_incompatibles, {("kg", "kWh"): 1})
+
+    def test_chunked_summary_matches_full_results(self):
+        report = stream_inventory(self.paths, self.sources, self.facilities,
+                                  self.registry, self.engine, chunk_size=64)
+        self.assertEqual(report.filas_leidas, 373)
+        self.assertEqual(report.filas_sin_fuente, 1)
+        self.assertEqual(report.filas_sin_factor, 0)
+        self.assertEqual(report.unidades_incompatibles, {("kg", "litros"): 1})
+
+        source_map = {s.id: s for s in self.sources}
+        factor = {"S1": self.registry.resolve("electricidad", "kWh", "ES", 2023),
+                  "S2": self.registry.resolve("diesel", "litros", "ES", 2023)}
+        results = []
+        for i in range(250):
+            act = ActivityData("S1", 1000 + i, "kWh", 2022 + i % 2)
+            results.append(self.engine.build_result(act, factor["S1"], source_map["S1"], Scope2Method.LOCATION_BASED))
+        results.append(self.engine.build_result(ActivityData("S1", 5, "MWh", 2023), factor["S1"],
+                                                source_map["S1"], Scope2Method.LOCATION_BASED))
+        for i in range(120):
+            act = ActivityData("S2", 50 + i, "litros", 2023)
+            results.append(self.engine.build_result(act, factor["S2"], source_map["S2"]))
+
+        for anio in (2022, 2023):
+            expected = EmissionsEngine.summarize(results, anio)
+            got = report.resumen.summary(anio)
+            self.assertAlmostEqual(got.scope_1_tCO2e, expected.scope_1_tCO2e, places=6)
+            self.assertAlmostEqual(got.scope_2_lbm_tCO2e, expected.scope_2_lbm_tCO2e, places=6)
+        self.assertAlmostEqual(
+            report.resumen.by_facility(2023)["F2"],
+            EmissionsEngine.summarize(results, 2023).scope_1_tCO2e, places=6,
+        )
+
+    def test_rows_without_factor_are_counted(self):
+        registry = FactorRegistry()
+        registry.add("electricidad", "kWh", "ES", 2023, "X", 0.2)
+        report = stream_inventory(self.paths, self.sources, self.facilities, registry, self.engine)
+        self.assertEqual(report.filas_sin_factor, 121)
+        self.assertEqual(report.resumen.filas, 251)
+
+    def test_malformed_rows_are_counted(self):
+        bad_path = os.path.join(self.tmp.name, "bad.csv")
+        with open(bad_path, "w", encoding="utf-8") as fh:
+            fh.write("source_id,cantidad,unidad,anio\n")
+            fh.write("S1,,kWh,2023\n")          # blank cantidad
+            fh.write("S1,12,kWh,dos mil\n")     # malformed anio
+            fh.write("S1,7\n")                  # short row
+            fh.write("S1,10,kWh,2023\n")
+        report = stream_inventory([bad_path], self.sources, self.facilities, self.registry, self.engine)
+        self.assertEqual(report.filas_leidas, 4)
+        self.assertEqual(report.filas_invalidas, 3)
+        self.assertEqual(report.resumen.filas, 1)
+
+
+class TestIncrementalSummary(unittest.TestCase):
+
+    def _assert_matches(self, inc, records, anio):
+        expected = EmissionsEngine.summarize(list(records.values()), anio)
+        got = inc.summary(anio)
+        self.assertAlmostEqual(got.scope_1_tCO2e, expected.scope_1_tCO2e, places=6)
+        self.assertAlmostEqual(got.scope_2_lbm_tCO2e, expected.scope_2_lbm_tCO2e, places=6)
+        self.assertAlmostEqual(got.scope_2_mbm_tCO2e, expected.scope_2_mbm_tCO2e, places=6)
+        self.assertAlmostEqual(got.scope_3_tCO2e, expected.scope_3_tCO2e, places=6)
+
+    def test_random_edits_match_full_resummarize(self):
+        rng = np.random.default_rng(3)
+        scopes = [(Scope.SCOPE_1, None), (Scope.SCOPE_2, Scope2Method.LOCATION_BASED),
+                  (Scope.SCOPE_2, Scope2Method.MARKET_BASED), (Scope.SCOPE_3, None)]
+        records: dict[int, EmissionResult] = {}
+        inc = IncrementalSummary()
+        for step in range(2000):
+            key = int(rng.integers(0, 300))
+            if key in records and rng.random() < 0.3:
+                del records[key]
+                inc.remove(key)
+                continue
+            scope, method = scopes[int(rng.integers(0, 4))]
+            result = EmissionResult(source_id=f"S{key}", scope=scope, tCO2e=float(rng.uniform(0, 1e5)),
+                                    anio=2022 + int(rng.integers(0, 2)), scope2_method=method)
+            records[key] = result
+            inc.upsert(key, result)
+        for anio in (2022, 2023):
+            self._assert_matches(inc, records, anio)
+
+    def test_intensities_follow_edits(self):
+        org = Organization("ACME", "ES", "Mfg", 100, 1_000_000, 2023)
+        inc = IncrementalSummary(org)
+        inc.upsert("a", EmissionResult(source_id="S1", scope=Scope.SCOPE_1, tCO2e=500, anio=2023))
+        self.assertAlmostEqual(inc.summary(2023).intensidad_por_empleado, 5.0)
+        inc.upsert("a", EmissionResult(source_id="S1", scope=Scope.SCOPE_1, tCO2e=300, anio=2023))
+        self.assertAlmostEqual(inc.summary(2023).intensidad_por_empleado, 3.0)
+
+    def test_removing_last_record_resets_to_zero(self):
+        inc = IncrementalSummary()
+        inc.upsert(1, EmissionResult(source_id="S1", scope=Scope.SCOPE_3, tCO2e=0.1, anio=2023))
+        inc.upsert(2, EmissionResult(source_id="S2", scope=Scope.SCOPE_3, tCO2e=0.2, anio=2023))
+        inc.remove(1)
+        inc.remove(2)
+        self.assertEqual(inc.summary(2023).scope_3_tCO2e, 0.0)
+        with self.assertRaises(KeyError):
+            inc.remove(2)
+
+
+class TestEmissionCube(unittest.TestCase):
+
+    def setUp(self):
+        self.sources = [
+            EmissionSource(id="S1", nombre="", descripcion="", scope=Scope.SCOPE_2,
+                           facility_id="F1", categoria="electricidad"),
+            EmissionSource(id="S2", nombre="", descripcion="", scope=Scope.SCOPE_1,
+                           facility_id="F1", categoria="gas"),
+            EmissionSource(id="S3", nombre="", descripcion="", scope=Scope.SCOPE_1,
+                           facility_id="F2", categoria="gas"),
+        ]
+        self.results = []
+        for anio in range(2015, 2025):
+            self.results += [
+                EmissionResult(source_id="S1", scope=Scope.SCOPE_2, tCO2e=100 + anio % 7, anio=anio,
+                               scope2_method=Scope2Method.LOCATION_BASED),
+                EmissionResult(source_id="S1", scope=Scope.SCOPE_2, tCO2e=40, anio=anio,
+                               scope2_method=Scope2Method.MARKET_BASED),
+                EmissionResult(source_id="S2", scope=Scope.SCOPE_1, tCO2e=50 + anio % 3, anio=anio),
+                EmissionResult(source_id="S3", scope=Scope.SCOPE_1, tCO2e=20, anio=anio),
+            ]
+        self.cube = EmissionCube.from_results(self.results, self.sources)
+
+    def test_summaries_match_engine_for_every_year(self):
+        summaries = self.cube.summaries()
+        self.assertEqual(list(summaries), list(range(2015, 2025)))
+        for anio, summary in summaries.items():
+            expected = EmissionsEngine.summarize(self.results, anio)
+            self.assertAlmostEqual(summary.scope_1_tCO2e, expected.scope_1_tCO2e)
+            self.assertAlmostEqual(summary.scope_2_lbm_tCO2e, expected.scope_2_lbm_tCO2e)
+            self.assertAlmostEqual(summary.scope_2_mbm_tCO2e, expected.scope_2_mbm_tCO2e)
+            self.assertAlmostEqual(summary.total_tCO2e, expected.total_tCO2e)
+
+    def test_single_year_summary(self):
+        self.assertEqual(self.cube.summary(2020), self.cube.summaries()[2020])
+        self.assertEqual(self.cube.summary(1990).total_tCO2e, 0.0)
+
+    def test_rollups_and_drilldowns(self):
+        by_facility = self.cube.rollup("facility", anio=2023)
+        self.assertAlmostEqual(by_facility[("F1",)], 100 + 2023 % 7 + 50 + 2023 % 3)
+        self.assertAlmostEqual(by_facility[("F2",)], 20)
+        mbm = self.cube.rollup("categoria", metodo_scope2=Scope2Method.MARKET_BASED, anio=2023)
+        self.assertAlmostEqual(mbm[("electricidad",)], 40)
+        gas_by_year = self.cube.rollup("anio", categoria="gas")
+        self.assertEqual(len(gas_by_year), 10)
+
+    def test_table_and_results_build_same_cube(self):
+        engine = EmissionsEngine(ConsolidationConfig(ConsolidationType.OPERATIONAL_CONTROL))
+        table = engine.calculate_batch(
+            [1000, 2000, 3000], [1.0, 1.0, 1.0], [1.0, 1.0, 1.0], [2, 1, 1], [2023, 2023, 2024], [0, 1, 2],
+            scope2_method=Scope2Method.LOCATION_BASED, source_ids=["S1", "S2", "S3"],
+        )
+        from_table = EmissionCube()
+        from_table.add_table(table, self.sources)
+        from_results = EmissionCube.from_results(table.to_results(), self.sources)
+        self.assertEqual(from_table.celdas, from_results.celdas)
+
+
+class TestCompactRecords(unittest.TestCase):
+
+    def _results(self):
+        return [
+            EmissionResult(source_id="S1", scope=Scope.SCOPE_2, tCO2e=300.0, anio=2023,
+                           scope2_method=Scope2Method.LOCATION_BASED),
+            EmissionResult(source_id="S2", scope=Scope.SCOPE_1, tCO2e=500.0, anio=2023),
+            EmissionResult(source_id="S3", scope=Scope.SCOPE_1, tCO2e=200.0, anio=2023),
+            EmissionResult(source_id="S2", scope=Scope.SCOPE_1, tCO2e=50.0, anio=2022),
+        ]
+
+    def test_records_are_slotted(self):
+        for obj in (ActivityData("S1", 1.0, "kWh", 2023), self._results()[0],
+                    EmissionSource("S1", "", "", Scope.SCOPE_1, "F1", "gas")):
+            self.assertFalse(hasattr(obj, "__dict__"))
+
+    def test_table_is_sixteen_bytes_per_row(self):
+        table = EmissionResultTable.from_results(self._results())
+        self.assertEqual(table.nbytes / len(table), 16)
+
+    def test_row_views_expose_result_attributes(self):
+        results = self._results()
+        table = EmissionResultTable.from_results(results)
+        for row, r in zip(table, results):
+            self.assertEqual(
+                (row.source_id, row.scope, row.tCO2e, row.anio, row.scope2_method),
+                (r.source_id, r.scope, r.tCO2e, r.anio, r.scope2_method),
+            )
+        self.assertEqual(table[-1].anio, 2022)
+        source_map = {}
+        self.assertEqual(export_inventory_csv(table, source_map), export_inventory_csv(results, source_map))
+
+    def test_diagnostic_accepts_table(self):
+        results = self._results()
+        sources = [
+            EmissionSource(id="S1", nombre="Electricity", descripcion="", scope=Scope.SCOPE_2,
+                           facility_id="F1", categoria="electricidad_comprada"),
+            EmissionSource(id="S2", nombre="Gas Boiler", descripcion="", scope=Scope.SCOPE_1,
+                           facility_id="F1", categoria="caldera_gas_natural"),
+            EmissionSource(id="S3", nombre="Fleet", descripcion="", scope=Scope.SCOPE_1,
+                           facility_id="F1", categoria="transporte_flota"),
+        ]
+        diag_input = DiagnosticInput(anio_base=2023, summary=EmissionsEngine.summarize(results, 2023))
+        expected = DiagnosticAgent().run(diag_input, sources, results)
+        got = DiagnosticAgent().run(diag_input, sources, EmissionResultTable.from_results(results))
+        self.assertEqual(
+            [(p.source.id, p.tCO2e) for p in got.fuentes_prioritarias],
+            [(p.source.id, p.tCO2e) for p in expected.fuentes_prioritarias],
+        )
+
+
+class TestFactorRevision(unittest.TestCase):
+
+    def _engine(self, org, grid, gas):
+        engine = TrackingEmissionsEngine(ConsolidationConfig(ConsolidationType.OPERATIONAL_CONTROL),
+                                         organizacion=org)
+        s1 = EmissionSource("S1", "", "", Scope.SCOPE_2, "F1", "electricidad")
+        s2 = EmissionSource("S2", "", "", Scope.SCOPE_1, "F1", "gas")
+        engine.build_result(ActivityData("S1", 1000, "kWh", 2022), grid, s1, Scope2Method.LOCATION_BASED)
+        engine.build_result(ActivityData("S1", 2000, "MWh", 2023), grid, s1, Scope2Method.LOCATION_BASED)
+        engine.build_result(ActivityData("S2", 500, "m3", 2023), gas, s2)
+        return engine
+
+    def setUp(self):
+        self.grid = EmissionFactor(id="EF-GRID", nombre="grid", factor=0.15, unidad_actividad="kWh")
+        self.gas = EmissionFactor(id="EF-GAS", nombre="gas", factor=2.0, unidad_actividad="m3")
+
+    def test_only_affected_rows_are_recalculated(self):
+        engine = self._engine("A", self.grid, self.gas)
+        gas_before = engine.results[2].tCO2e
+        report = engine.recalculate_for_factor_change("EF-GRID", 0.10)
+        self.assertEqual(report.filas_recalculadas, 2)
+        self.assertEqual(report.fuentes_afectadas, ["S1"])
+        self.assertAlmostEqual(report.delta_por_anio[2023], -100.0)
+        self.assertAlmostEqual(engine.results[1].tCO2e, 200.0)
+        self.assertEqual(engine.results[2].tCO2e, gas_before)
+        self.assertEqual(self.grid.factor, 0.15)  # shared factor left untouched
+
+    def test_summary_is_patched(self):
+        engine = self._engine("A", self.grid, self.gas)
+        engine.recalculate_for_factor_change("EF-GRID", 0.10)
+        engine.recalculate_for_factor_change("EF-GRID", 0.12)
+        for anio in (2022, 2023):
+            expected = EmissionsEngine.summarize(engine.results, anio)
+            self.assertAlmostEqual(engine.resumen.summary(anio).scope_2_lbm_tCO2e, expected.scope_2_lbm_tCO2e)
+            self.assertAlmostEqual(engine.resumen.summary(anio).scope_1_tCO2e, expected.scope_1_tCO2e)
+
+    def test_book_reports_moved_organizations(self):
+        other_grid = EmissionFactor(id="EF-GRID-PT", nombre="grid", factor=0.2, unidad_actividad="kWh")
+        engines = [self._engine("A", self.grid, self.gas), self._engine("B", other_grid, self.gas)]
+        reports = recalculate_book(engines, "EF-GAS", 2.1)
+        self.assertEqual([r.organizacion for r in reports], ["A", "B"])
+        reports = recalculate_book(engines, "EF-GRID", 0.15)  # unchanged value
+        self.assertEqual(reports, [])
+
+    def test_batch_tables_are_tracked(self):
+        engine = self._engine("A", self.grid, self.gas)
+        units = engine.units
+        table = engine.calculate_batch(
+            np.array([1000.0, 2.0, 300.0]), np.array([0.15, 0.15, 2.0]), np.ones(3),
+            np.array([2, 2, 1]), np.array([2022, 2023, 2023]), np.array([0, 0, 1]),
+            scope2_method=Scope2Method.LOCATION_BASED, source_ids=["S1", "S2"],
+            unidad=units.parse_many(["kWh", "MWh", "m3"]), unidad_factor=units.parse_many(["kWh", "kWh", "m3"]),
+            factor_idx=np.array([0, 0, 1]), factor_ids=["EF-GRID", "EF-GAS"],
+        )
+        report = engine.recalculate_for_factor_change("EF-GRID", 0.10)
+        self.assertEqual(report.filas_recalculadas, 4)
+        self.assertAlmostEqual(report.delta_por_anio[2022], -0.1)
+        self.assertAlmostEqual(report.delta_por_anio[2023], -100.1)
+        self.assertEqual(table.tCO2e.tolist()[2], 0.6)
+        self.assertAlmostEqual(table.tCO2e[1], 0.2)
+        for anio in (2022, 2023):
+            expected = EmissionsEngine.summarize(engine.results + table.to_results(), anio)
+            self.assertAlmostEqual(engine.resumen.summary(anio).scope_2_lbm_tCO2e, expected.scope_2_lbm_tCO2e)
+            self.assertAlmostEqual(engine.resumen.summary(anio).scope_1_tCO2e, expected.scope_1_tCO2e)
+
+
+class TestHourlyScope2(unittest.TestCase):
+    """Hourly matching validated against an explicit per-hour reference loop."""
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.hours = 48
+        self.consumo = rng.uniform(0, 10, (7, self.hours))
+        self.region_idx = np.array([0, 0, 1, 1, 1, 2, 0])
+        self.grid = HourlyGridFactors(
+            regiones=["ES", "PT", "FR"],
+            red=rng.uniform(0.1, 0.4, (self.hours, 3)),
+            residual=rng.uniform(0.3, 0.6, (self.hours, 3)),
+            cfe_red=rng.uniform(0, 0.5, (self.hours, 3)),
+        )
+        self.contratos = HourlyContracts(
+            region_idx=np.array([0, 1]),
+            kwh=rng.uniform(0, 25, (2, self.hours)),
+            factor=np.array([0.0, 0.02]),
+        )
+
+    def _reference(self):
+        n = len(self.region_idx)
+        lbm, mbm, cfe = np.zeros(n), np.zeros(n), np.zeros(n)
+        for h in range(self.hours):
+            for r in range(3):
+                meters = [i for i in range(n) if self.region_idx[i] == r]
+                load = sum(self.consumo[i, h] for i in meters)
+                supply = sum(self.contratos.kwh[c, h] for c in range(2) if self.contratos.region_idx[c] == r)
+                rate = (sum(self.contratos.kwh[c, h] * self.contratos.factor[c] for c in range(2)
+                            if self.contratos.region_idx[c] == r) / supply) if supply else 0.0
+                share = min(load, supply) / load if load else 0.0
+                for i in meters:
+                    kwh = self.consumo[i, h]
+                    matched = kwh * share
+                    lbm[i] += kwh * self.grid.red[h, r]
+                    mbm[i] += matched * rate + (kwh - matched) * self.grid.residual[h, r]
+                    cfe[i] += matched + (kwh - matched) * self.grid.cfe_red[h, r]
+        return lbm / 1000, mbm / 1000, cfe
+
+    def test_matches_reference_loop(self):
+        out = calculate_hourly_scope2(self.consumo, self.region_idx, self.grid, self.contratos, chunk=3)
+        lbm, mbm, cfe = self._reference()
+        np.testing.assert_allclose(out.lbm_tCO2e, lbm)
+        np.testing.assert_allclose(out.mbm_tCO2e, mbm)
+        np.testing.assert_allclose(out.cfe_kwh, cfe)
+        self.assertTrue(0 <= out.cfe_score <= 1)
+
+    def test_memory_mapped_inputs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "consumo.npy")
+            save_hourly(path, self.consumo)
+            mapped = load_hourly(path)
+            self.assertIsInstance(mapped, np.memmap)
+            out = calculate_hourly_scope2(mapped, self.region_idx, self.grid, self.contratos)
+            ref = calculate_hourly_scope2(self.consumo, self.region_idx, self.grid, self.contratos)
+            np.testing.assert_allclose(out.mbm_tCO2e, ref.mbm_tCO2e)
+            del mapped, out
+
+    def test_results_table_splits_lbm_and_mbm(self):
+        out = calculate_hourly_scope2(self.consumo, self.region_idx, self.grid, self.contratos)
+        table = out.to_table([f"M{i}" for i in range(7)], 2023)
+        summary = table.summarize(2023)
+        self.assertAlmostEqual(summary.scope_2_lbm_tCO2e, out.lbm_tCO2e.sum())
+        self.assertAlmostEqual(summary.scope_2_mbm_tCO2e, out.mbm_tCO2e.sum())
+        self.assertLess(summary.scope_2_mbm_tCO2e, out.consumo_kwh.sum() * 0.6 / 1000)
+
+
+class TestMonteCarloUncertainty(unittest.TestCase):
+    """Percentile bands from the Monte Carlo uncertainty mode."""
+
+    def setUp(self):
+        self.engine = EmissionsEngine(ConsolidationConfig(ConsolidationType.OPERATIONAL_CONTROL))
+        self.s1 = EmissionSource("S1", "Caldera", "", Scope.SCOPE_1, "F1", "caldera")
+        self.s1b = EmissionSource("S1b", "Caldera 2", "", Scope.SCOPE_1, "F1", "caldera")
+        self.s2 = EmissionSource("S2", "Red", "", Scope.SCOPE_2, "F1", "electricidad")
+
+    def _mc(self, **kw):
+        return MonteCarloEngine(self.engine, n_muestras=kw.pop("n", 20_000), seed=7, **kw)
+
+    def test_exact_inputs_give_point_values(self):
+        ef = EmissionFactor("EF", "Gas", 2.0, "m3")
+        rows = [(ActivityData("S1", 1000.0, "m3", 2023), ef, self.s1, None),
+                (ActivityData("S2", 5000.0, "kWh", 2023), EmissionFactor("EF2", "Red", 0.2, "kWh"),
+                 self.s2, Scope2Method.MARKET_BASED)]
+        out = self._mc().summarize(rows, 2023)
+        self.assertEqual(out.central.scope_1_tCO2e, 2.0)
+        self.assertEqual(out.bandas["scope_1_tCO2e"], (2.0, 2.0, 2.0))
+        self.assertEqual(out.bandas["scope_2_mbm_tCO2e"], (1.0, 1.0, 1.0))
+        self.assertEqual(out.bandas["total_tCO2e"], (2.0, 2.0, 2.0))
+
+    def test_normal_activity_band_matches_stated_uncertainty(self):
+        ef = EmissionFactor("EF", "Gas", 2.0, "m3")
+        act = ActivityData("S1", 1000.0, "m3", 2023, incertidumbre=Distribution.normal(10.0))
+        out = self._mc().summarize([(act, ef, self.s1, None)], 2023)
+        lo, hi = out.banda("scope_1_tCO2e")
+        self.assertAlmostEqual(lo, 1.8, delta=0.01)
+        self.assertAlmostEqual(hi, 2.2, delta=0.01)
+        self.assertAlmostEqual(out.media["scope_1_tCO2e"], 2.0, delta=0.005)
+
+    def test_shared_factor_is_fully_correlated(self):
+        ef = EmissionFactor("EF", "Gas", 2.0, "m3", incertidumbre=Distribution.lognormal(10.0))
+        rows = [(ActivityData("S1", 1000.0, "m3", 2023), ef, self.s1, None),
+                (ActivityData("S1b", 1000.0, "m3", 2023), ef, self.s1b, None)]
+        lo, hi = self._mc().summarize(rows, 2023).banda("scope_1_tCO2e")
+        self.assertAlmostEqual(hi / 4.0, 1.10, delta=0.01)   # not narrowed by √2
+
+        copies = [(ActivityData("S1", 1000.0, "m3", 2023), ef, self.s1, None),
+                  (ActivityData("S1b", 1000.0, "m3", 2023), copy.copy(ef), self.s1b, None)]
+        self.assertEqual(self._mc().summarize(copies, 2023).banda("scope_1_tCO2e"), (lo, hi))
+
+        independent = [(ActivityData("S1", 1000.0, "m3", 2023, incertidumbre=Distribution.normal(10.0)),
+                        EmissionFactor("EF", "Gas", 2.0, "m3"), self.s1, None),
+                       (ActivityData("S1b", 1000.0, "m3", 2023, incertidumbre=Distribution.normal(10.0)),
+                        EmissionFactor("EF", "Gas", 2.0, "m3"), self.s1b, None)]
+        lo, hi = self._mc().summarize(independent, 2023).banda("scope_1_tCO2e")
+        self.assertAlmostEqual(hi / 4.0, 1 + 0.10 / 2 ** 0.5, delta=0.01)
+
+    def test_triangular_and_chunking(self):
+        ef = EmissionFactor("EF", "Gas", 1.0, "m3")
+        rows = [(ActivityData("S1", 1000.0, "m3", 2023, incertidumbre=Distribution.triangular(0.8, 1.4)),
+                 ef, self.s1, None) for _ in range(50)]
+        small = self._mc(max_bytes=4096).summarize(rows, 2023)
+        large = self._mc().summarize(rows, 2023)
+        expected_mean = 50 * (0.8 + 1.0 + 1.4) / 3
+        self.assertAlmostEqual(small.media["scope_1_tCO2e"], expected_mean, delta=0.05)
+        self.assertAlmostEqual(large.media["scope_1_tCO2e"], expected_mean, delta=0.05)
+        lo, hi = small.banda("scope_1_tCO2e")
+        self.assertLess(lo, expected_mean)
+        self.assertGreater(hi, expected_mean)
+
+    def test_other_years_ignored(self):
+        ef = EmissionFactor("EF", "Gas", 2.0, "m3")
+        out = self._mc(n=10).summarize([(ActivityData("S1", 1000.0, "m3", 2022), ef, self.s1, None)], 2023)
+        self.assertEqual(out.central.total_tCO2e, 0.0)
+        self.assertEqual(out.bandas["total_tCO2e"], (0.0, 0.0, 0.0))
+
+
+class TestConsolidationTree(unittest.TestCase):
+    """Effective ownership factors and group roll-up."""
+
+    def setUp(self):
+        # HOLDING ─ 80 % SUB (controlled) ─ 60 % NIETA (controlled)
+        #         └ 50 % JV (joint control)
+        #         └ 30 % ASOC (no control)
+        self.tree = ConsolidationTree("HOLDING")
+        self.tree.add_link("HOLDING", "SUB", 80.0)
+        self.tree.add_link("SUB", "NIETA", 60.0)
+        self.tree.add_link("HOLDING", "JV", 50.0, conjunto=True)
+        self.tree.add_link("HOLDING", "ASOC", 30.0)
+        self.resumenes = {
+            e: EmissionSummary(2023, scope_1_tCO2e=100.0, scope_2_lbm_tCO2e=10.0)
+            for e in ("HOLDING", "SUB", "NIETA", "JV", "ASOC")
+        }
+
+    def test_effective_factors(self):
+        equity = self.tree.factores(ConsolidationType.EQUITY_SHARE)
+        self.assertAlmostEqual(equity["NIETA"], 0.48)
+        self.assertAlmostEqual(equity["ASOC"], 0.30)
+        financial = self.tree.factores(ConsolidationType.FINANCIAL_CONTROL)
+        self.assertEqual((financial["NIETA"], financial["JV"], financial["ASOC"]), (1.0, 0.5, 0.0))
+        operational = self.tree.factores(ConsolidationType.OPERATIONAL_CONTROL)
+        self.assertEqual((operational["SUB"], operational["JV"]), (1.0, 0.0))
+        self.assertIs(self.tree.factores(ConsolidationType.EQUITY_SHARE), equity)
+
+    def test_rollup_matches_per_entity_engines(self):
+        tipo = ConsolidationType.EQUITY_SHARE
+        out = self.tree.rollup(self.resumenes, tipo, 2023)
+        expected = 0.0
+        for entidad in self.resumenes:
+            engine = EmissionsEngine(self.tree.config(entidad, tipo))
+            ef = EmissionFactor("EF", "Gas", 1.0, "kg")
+            expected += engine.calculate(ActivityData(entidad, 100_000.0, "kg", 2023), ef)
+        self.assertAlmostEqual(out.consolidado.scope_1_tCO2e, expected)
+        self.assertAlmostEqual(out.por_entidad["NIETA"].scope_1_tCO2e, 48.0)
+        self.assertAlmostEqual(out.por_subgrupo["SUB"].scope_1_tCO2e, 80.0 + 48.0)
+        self.assertAlmostEqual(out.consolidado.total_tCO2e, 3.08 * 110.0)
+
+    def test_new_link_invalidates_cache(self):
+        self.assertNotIn("NUEVA", self.tree.factores(ConsolidationType.OPERATIONAL_CONTROL))
+        self.tree.add_link("NIETA", "NUEVA", 100.0)
+        self.assertEqual(self.tree.factor("NUEVA", ConsolidationType.OPERATIONAL_CONTROL), 1.0)
+        self.assertEqual(self.tree.entidades()[-1], "NUEVA")
+
+    def test_invalid_links(self):
+        with self.assertRaises(KeyError):
+            self.tree.add_link("DESCONOCIDA", "X", 50.0)
+        with self.assertRaises(ValueError):
+            self.tree.add_link("JV", "SUB", 50.0)
+
+
+class TestSpendScope3(unittest.TestCase):
+    """Spend-based Scope 3 over an EEIO intensity matrix."""
+
+    def setUp(self):
+        self.modelo = EEIOModel(
+            sectores=["C20", "F41", "H49"],
+            gases=["CO2", "CH4"],
+            matriz=np.array([[0.5, 0.2, 0.8],
+                             [0.01, 0.0, 0.0]]),
+            gwp=np.array([1.0, 30.0]),
+            categorias={"F41": 2, "H49": 4},
+        )
+        self.lines = [
+            {"proveedor": "A", "commodity": "C20.14", "moneda": "EUR", "importe": 1000.0},
+            {"proveedor": "B", "commodity": "F41", "moneda": "USD", "importe": 2000.0},
+            {"proveedor": "C", "commodity": "H49.4", "moneda": "EUR", "importe": 500.0},
+            {"proveedor": "D", "commodity": "H49.4", "moneda": "EUR", "importe": 500.0, "categoria": "9"},
+            {"proveedor": "E", "commodity": "Z99", "moneda": "EUR", "importe": 10.0},
+            {"proveedor": "F", "commodity": "C20", "moneda": "JPY", "importe": 10.0},
+        ]
+
+    def _engine(self, **kw):
+        return SpendEngine(self.modelo, tipos_cambio={"USD": 0.9}, **kw)
+
+    def test_categories_and_intensities(self):
+        report = self._engine().calculate(self.lines)
+        self.assertAlmostEqual(report.tCO2e_por_categoria[1], 1000.0 * 0.8 / 1000)
+        self.assertAlmostEqual(report.tCO2e_por_categoria[2], 1800.0 * 0.2 / 1000)
+        self.assertAlmostEqual(report.tCO2e_por_categoria[4], 500.0 * 0.8 / 1000)
+        self.assertAlmostEqual(report.tCO2e_por_categoria[9], 500.0 * 0.8 / 1000)
+        self.assertEqual(report.gasto_por_categoria[2], 1800.0)
+        self.assertEqual(report.lineas_leidas, 6)
+        self.assertEqual(report.lineas_sin_sector, {"Z99": 1})
+        self.assertEqual(report.monedas_desconocidas, {"JPY": 1})
+
+    def test_supplier_specific_intensity(self):
+        report = self._engine(proveedores={"A": 0.1}).calculate(self.lines)
+        self.assertAlmostEqual(report.tCO2e_por_categoria[1], 0.1)
+
+    def test_chunking_and_streaming_match(self):
+        whole = self._engine().calculate(self.lines)
+        chunked = self._engine().calculate(self.lines, chunk_size=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ledger.jsonl")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write("\n".join(json.dumps(line) for line in self.lines))
+            streamed = stream_spend([path], self._engine(), chunk_size=3)
+        for other in (chunked, streamed):
+            self.assertEqual(other.tCO2e_por_categoria.keys(), whole.tCO2e_por_categoria.keys())
+            for categoria, value in whole.tCO2e_por_categoria.items():
+                self.assertAlmostEqual(other.tCO2e_por_categoria[categoria], value)
+
+    def test_writes_into_emission_summary(self):
+        summary = EmissionSummary(anio=2023, scope_1_tCO2e=10.0, scope_3_tCO2e=1.0)
+        self._engine().calculate(self.lines).apply_to(summary)
+        self.assertAlmostEqual(summary.scope_3_tCO2e, 1.0 + 0.8 + 0.36 + 0.4 + 0.4)
+        self.assertEqual(sorted(summary.scope_3_por_categoria), [1, 2, 4, 9])
+
+    def test_invalid_lines_counted(self):
+        self.modelo.categorias["C20"] = 16
+        with self.assertRaises(ValueError):
+            self._engine()
+        line = {"proveedor": "A", "commodity": "C20", "moneda": "EUR", "importe": 1.0}
+        lines = [{**line, "categoria": "-2"}, line, {**line, "categoria": "16"}, {**line, "categoria": "x"},
+                 {**line, "importe": "n/a"}, {"commodity": "C20", "moneda": "EUR"}]
+        report = SpendEngine(EEIOModel(["C20"], ["CO2"], np.ones((1, 1)), np.ones(1))).calculate(lines)
+        self.assertEqual(report.lineas_leidas, 6)
+        self.assertEqual(report.lineas_invalidas, 5)
+        self.assertEqual(report.gasto_por_categoria, {1: 1.0})
+
+    def test_spend_deflated_to_model_price_year(self):
+        self.modelo.anio_precios = 2020
+        indice = {2020: 100.0, 2023: 125.0}
+        lines = [
+            {"proveedor": "A", "commodity": "C20", "moneda": "EUR", "importe": 1000.0, "anio": 2023},
+            {"proveedor": "A", "commodity": "C20", "moneda": "EUR", "importe": 1000.0},
+            {"proveedor": "A", "commodity": "C20", "moneda": "EUR", "importe": 1000.0, "anio": 2019},
+        ]
+        report = self._engine(indice_precios=indice).calculate(lines)
+        self.assertAlmostEqual(report.gasto_por_categoria[1], 800.0 + 1000.0)
+        self.assertEqual(report.anios_sin_indice, {2019: 1})
+        self.assertEqual(self._engine().calculate(lines).gasto_por_categoria[1], 3000.0)
+        with self.assertRaises(ValueError):
+            self._engine(indice_precios={2023: 1.0})
+
+
+class TestFreightLogistics(unittest.TestCase):
+    """Distance-based freight emissions over a cached haversine matrix."""
+
+    def setUp(self):
+        planta = Facility("F1", "Planta", "Madrid", "ES", latitud=40.4168, longitud=-3.7038)
+        self.sitios = SiteRegistry.from_facilities(
+            [planta, Facility("F2", "Oficina", "", "ES")],
+            {"BCN": (41.3874, 2.1686), "LIS": (38.7223, -9.1393)},
+        )
+        self.engine = FreightEngine(self.sitios, {"carretera": 0.1, "ferrocarril": 0.03},
+                                    desvios={"carretera": 1.2})
+
+    def test_haversine_distance(self):
+        self.assertEqual(len(self.sitios), 3)   # F2 has no coordinates
+        d = self.sitios.distances(self.sitios.index(["F1"]), self.sitios.index(["BCN"]))[0]
+        self.assertAlmostEqual(d, 505.0, delta=2.0)
+        np.testing.assert_allclose(self.sitios.distance_matrix, self.sitios.distance_matrix.T)
+
+    def test_legs_map_to_scopes_and_categories(self):
+        envios = [
+            Shipment("F1", "BCN", 10.0, "carretera", FreightLeg.FLOTA_PROPIA),
+            Shipment("LIS", "F1", 20.0, "ferrocarril", FreightLeg.AGUAS_ARRIBA),
+            Shipment("F1", "LIS", 5.0, "carretera"),
+            Shipment("F1", "XXX", 5.0, "carretera"),
+            Shipment("F1", "BCN", 5.0, "dron"),
+        ]
+        report = self.engine.calculate(envios)
+        dist = self.sitios.distance_matrix
+        f1, bcn, lis = self.sitios.index(["F1", "BCN", "LIS"])
+        self.assertAlmostEqual(report.tkm[0], 10.0 * dist[f1, bcn] * 1.2)
+        self.assertAlmostEqual(report.tCO2e[1], 20.0 * dist[lis, f1] * 0.03 / 1000)
+        self.assertEqual(report.tCO2e[3], 0.0)
+        self.assertEqual(report.envios_sin_ubicacion, 1)
+        self.assertEqual(report.modos_desconocidos, {"dron": 1})
+
+        summary = report.apply_to(EmissionSummary(anio=2023))
+        self.assertAlmostEqual(summary.scope_1_tCO2e, report.tCO2e[0])
+        self.assertAlmostEqual(summary.scope_3_por_categoria[4], report.tCO2e[1])
+        self.assertAlmostEqual(summary.scope_3_por_categoria[9], report.tCO2e[2])
+        self.assertAlmostEqual(summary.scope_3_tCO2e, report.tCO2e[1] + report.tCO2e[2])
+
+    def test_matrix_cache_and_large_registry_fallback(self):
+        cached = self.sitios.distance_matrix
+        self.assertIs(self.sitios.distance_matrix, cached)
+        self.sitios.add("PAR", 48.8566, 2.3522)
+        self.assertEqual(self.sitios.distance_matrix.shape, (4, 4))
+
+        o, d = self.sitios.index(["F1", "PAR"]), self.sitios.index(["PAR", "BCN"])
+        expected = self.sitios.distances(o, d)
+        self.sitios.max_matrix_sites = 2
+        np.testing.assert_allclose(self.sitios.distances(o, d), expected)
+
+    def test_empty_registry(self):
+        engine = FreightEngine(SiteRegistry(), {"carretera": 0.1})
+        report = engine.calculate([Shipment("F1", "BCN", 10.0, "carretera")])
+        self.assertEqual(report.tCO2e.tolist(), [0.0])
+        self.assertEqual(report.envios_sin_ubicacion, 1)
+        self.assertEqual(report.tCO2e_por_tramo, {})
+        self.assertEqual(engine.calculate([]).tCO2e.size, 0)
+        with self.assertRaisesRegex(ValueError, "vacío"):
+            SiteRegistry().distances(np.array([0]), np.array([0]))
+
+
+class TestMultiGasInventory(unittest.TestCase):
+    """Per-gas storage and GWP restatement across assessment reports."""
+
+    def setUp(self):
+        self.engine = EmissionsEngine(ConsolidationConfig(ConsolidationType.EQUITY_SHARE, 50.0))
+        self.caldera = EmissionSource("S1", "Caldera", "", Scope.SCOPE_1, "F1", "caldera")
+        self.frio = EmissionSource("S2", "Frío", "", Scope.SCOPE_1, "F1", "refrigeracion")
+        self.red = EmissionSource("S3", "Red", "", Scope.SCOPE_2, "F1", "electricidad")
+        self.gas = EmissionFactor("EF-GN", "Gas natural", 0.0, "m3",
+                                  gases={"CO2": 2.0, "CH4": 0.001, "N2O": 0.0001})
+        self.r410a = EmissionFactor("EF-R410A", "R-410A", 0.0, "kg", gases={"R-410A": 1.0})
+        self.elec = EmissionFactor("EF-ELEC", "Red", 0.15, "kWh")
+        self.inventory = GasInventory(self.engine)
+        self.inventory.add_many([
+            (ActivityData("S1", 1000.0, "m3", 2023), self.gas, self.caldera, None),
+            (ActivityData("S2", 10.0, "kg", 2023), self.r410a, self.frio, None),
+            (ActivityData("S3", 1.0, "MWh", 2023), self.elec, self.red, Scope2Method.LOCATION_BASED),
+            (ActivityData("S1", 999.0, "m3", 2022), self.gas, self.caldera, None),
+        ])
+
+    def test_restatement_matches_recalculation(self):
+        tablas = GWPRegistry()
+        restated = self.inventory.restate(2023, ["AR4", "AR5", "AR6"])
+        for informe, summary in restated.items():
+            expected = 0.0
+            for activity, factor in ((ActivityData("S1", 1000.0, "m3", 2023), self.gas),
+                                     (ActivityData("S2", 10.0, "kg", 2023), self.r410a)):
+                scalar = EmissionFactor(factor.id, factor.nombre, tablas.co2e_factor(factor.gases, informe), factor.unidad_actividad)
+                expected += self.engine.calculate(activity, scalar)
+            self.assertAlmostEqual(summary.scope_1_tCO2e, expected)
+            self.assertAlmostEqual(summary.scope_2_lbm_tCO2e, 0.075)   # CO2e factor, not restated
+        self.assertAlmostEqual(restated["AR4"].scope_1_tCO2e - restated["AR6"].scope_1_tCO2e,
+                               0.5 * (1.0 * (25 - 27.9) + 0.1 * (298 - 273) + 10.0 * (2087.5 - 2255.5)) / 1000)
+
+    def test_blends_and_by_gas(self):
+        tablas = GWPRegistry()
+        self.assertAlmostEqual(tablas.gwp("R-410A", "AR4"), 2087.5)
+        self.assertAlmostEqual(tablas.gwp("R-404A", "AR6"), 4728.0)
+        by_gas = self.inventory.by_gas(2023)
+        self.assertAlmostEqual(by_gas["CO2"], 1000.0)   # 50 % equity share
+        self.assertAlmostEqual(by_gas["R-410A"], 5.0)
+
+    def test_table_codes_match_results(self):
+        self.inventory.add(ActivityData("S3", 2.0, "MWh", 2023), self.elec, self.red)   # no Scope 2 method
+        rows = [
+            (ActivityData("S1", 1000.0, "m3", 2023), self.gas, self.caldera, None),
+            (ActivityData("S2", 10.0, "kg", 2023), self.r410a, self.frio, None),
+            (ActivityData("S3", 1.0, "MWh", 2023), self.elec, self.red, Scope2Method.LOCATION_BASED),
+            (ActivityData("S1", 999.0, "m3", 2022), self.gas, self.caldera, None),
+            (ActivityData("S3", 2.0, "MWh", 2023), self.elec, self.red, None),
+        ]
+        expected = EmissionResultTable.from_results(self.engine.build_result(*row) for row in rows)
+        table = self.inventory.to_table()
+        self.assertEqual(table.scope.tolist(), expected.scope.tolist())
+        self.assertEqual(table.scope2_method.tolist(), expected.scope2_method.tolist())
+
+    def test_table_and_missing_gwp(self):
+        table = self.inventory.to_table("AR5")
+        self.assertEqual(len(table), 4)
+        summary = table.summarize(2023)
+        self.assertAlmostEqual(summary.scope_1_tCO2e, self.inventory.summarize(2023, "AR5").scope_1_tCO2e)
+
+        tablas = GWPRegistry({"SOLO_CO2": {"CO2": 1.0}, "AR6": {"CO2": 1.0, "SF6": 25_200}})
+        inventory = GasInventory(self.engine, tablas)
+        sf6 = EmissionFactor("EF-SF6", "SF6", 0.0, "kg", gases={"SF6": 1.0})
+        inventory.add(ActivityData("S2", 1.0, "kg", 2023), sf6, self.frio)
+        self.assertAlmostEqual(inventory.summarize(2023, "AR6").scope_1_tCO2e, 12.6)
+        with self.assertRaises(KeyError):
+            inventory.summarize(2023, "SOLO_CO2")
+        with self.assertRaises(KeyError):
+            inventory.add(ActivityData("S1", 1.0, "m3", 2023), self.gas, self.caldera)
+        self.assertEqual(len(inventory), 1)
+
+
+class TestBAUForecast(unittest.TestCase):
+    """Business-as-usual projection and its use as pathway baseline."""
+
+    def setUp(self):
+        self.sources = [
+            EmissionSource("E", "Red", "", Scope.SCOPE_2, "F1", "electricidad_comprada"),
+            EmissionSource("G", "Caldera", "", Scope.SCOPE_1, "F1", "caldera_gas_natural"),
+            EmissionSource("R", "Fugas", "", Scope.SCOPE_1, "F1", "refrigeracion_fugitivas"),
+        ]
+        self.results = [
+            EmissionResult("E", Scope.SCOPE_2, 100.0, 2023, Scope2Method.LOCATION_BASED),
+            EmissionResult("E", Scope.SCOPE_2, 40.0, 2023, Scope2Method.MARKET_BASED),
+            EmissionResult("G", Scope.SCOPE_1, 200.0, 2023),
+            EmissionResult("R", Scope.SCOPE_1, 10.0, 2023),
+            EmissionResult("G", Scope.SCOPE_1, 999.0, 2022),
+        ]
+        self.escenarios = [
+            BAUScenario("base", produccion=2.0, factor_red=-5.0, precio_combustible=10.0, elasticidad_precio=-0.5),
+            BAUScenario("curva", produccion={2030: 1.4}, factor_red={2030: 0.5, 2050: 0.1}),
+        ]
+
+    def test_projection_matches_drivers(self):
+        bau = BAUForecaster(self.escenarios, 2023).project_sources(self.sources, self.results)
+        self.assertEqual(bau.emisiones.shape, (2, 3, 28))
+        np.testing.assert_allclose(bau.emisiones[:, :, 0], [[100.0, 200.0, 10.0]] * 2)
+        t = 7  # 2030
+        self.assertAlmostEqual(bau.emisiones[0, 0, t], 100.0 * 1.02 ** 7 * 0.95 ** 7)
+        self.assertAlmostEqual(bau.emisiones[0, 1, t], 200.0 * 1.02 ** 7 * 1.10 ** (7 * -0.5))
+        self.assertAlmostEqual(bau.emisiones[1, 0, t], 100.0 * 1.4 * 0.5)
+        self.assertAlmostEqual(bau.emisiones[1, 0, -1], 100.0 * 1.4 * 0.1)
+        self.assertEqual(bau.emisiones[0, 2, -1], 10.0)
+        self.assertAlmostEqual(bau.trayectoria("curva")[2030], 100 * 0.7 + 200 * 1.4 + 10)
+
+    def test_overrides_and_organisation_batch(self):
+        forecaster = BAUForecaster(self.escenarios[:1], 2023, anio_final=2030)
+        bau = forecaster.project_sources(self.sources, self.results, {"R": SourceDrivers("produccion")})
+        self.assertAlmostEqual(bau.emisiones[0, 2, -1], 10.0 * 1.02 ** 7)
+
+        e0 = np.array([1.0, 2.0, 3.0, 4.0])
+        act = np.full(4, ACTIVITY_DRIVERS.index("constante"))
+        inten = np.full(4, INTENSITY_DRIVERS.index("ninguna"))
+        orgs = forecaster.project(e0, act, inten).por_organizacion(np.array([1, 0, 1, 3]), n_orgs=4)
+        np.testing.assert_allclose(orgs[0, :, 0], [2.0, 4.0, 0.0, 4.0])
+
+    def test_feeds_pathway_agent(self):
+        diagnostic = DiagnosticOutput(fuentes_prioritarias=[], objetivo_preliminar_reduccion_pct=42.0,
+                                      trayectoria_hitos={2023: 310.0, 2030: 180.0})
+        bau = BAUForecaster(self.escenarios, 2023).project_sources(self.sources, self.results)
+        output = PathwayAgent().run(diagnostic, linea_base=bau.trayectoria("base"))
+        self.assertEqual(output.brecha_bau[2023], 0.0)
+        self.assertAlmostEqual(output.brecha_bau[2030], round(bau.trayectoria("base")[2030] - 180.0, 1))
+        self.assertIn("brecha vs BAU", output.resumen)
+        self.assertEqual(PathwayAgent().run(diagnostic).brecha_bau, {})
+
+
+class TestInternalAllocation(unittest.TestCase):
+    """Driver-based allocation to departments and products."""
+
+    def setUp(self):
+        self.sources = [
+            EmissionSource("E", "Red", "", Scope.SCOPE_2, "F1", "electricidad_comprada"),
+            EmissionSource("G", "Caldera", "", Scope.SCOPE_1, "F1", "caldera_gas_natural"),
+            EmissionSource("H", "Horno", "", Scope.SCOPE_1, "F2", "horno"),
+            EmissionSource("X", "Almacén", "", Scope.SCOPE_1, "F3", "caldera_gas_natural"),
+        ]
+        self.results = [
+            EmissionResult("E", Scope.SCOPE_2, 100.0, 2023, Scope2Method.LOCATION_BASED),
+            EmissionResult("E", Scope.SCOPE_2, 40.0, 2023, Scope2Method.MARKET_BASED),
+            EmissionResult("G", Scope.SCOPE_1, 60.0, 2023),
+            EmissionResult("H", Scope.SCOPE_1, 30.0, 2023),
+            EmissionResult("X", Scope.SCOPE_1, 10.0, 2023),
+            EmissionResult("G", Scope.SCOPE_1, 999.0, 2022),
+        ]
+        self.engine = AllocationEngine(
+            {
+                "superficie_m2": DriverMatrix.from_records("superficie_m2", [
+                    ("F1", "Produccion", 300.0), ("F1", "Oficinas", 100.0), ("F2", "Produccion", 50.0),
+                ]),
+                "horas_maquina": DriverMatrix.from_records("horas_maquina", [
+                    ("F1", "Produccion", 900.0), ("F1", "Mantenimiento", 100.0), ("H", "Mantenimiento", 1.0),
+                ]),
+            },
+            driver_por_categoria={"electricidad_comprada": "superficie_m2"},
+            driver_por_defecto="horas_maquina",
+        )
+
+    def test_departments(self):
+        result = self.engine.allocate_results(self.sources, self.results, 2023)
+        got = dict(zip(result.destinos, result.tCO2e))
+        self.assertAlmostEqual(got["Produccion"], 75.0 + 54.0)
+        self.assertAlmostEqual(got["Oficinas"], 25.0)
+        self.assertAlmostEqual(got["Mantenimiento"], 6.0 + 30.0)  # H is its own origin
+        self.assertEqual(result.sin_asignar, {"F3": 10.0})
+        self.assertAlmostEqual(result.total_tCO2e + result.sin_asignar_tCO2e, 200.0)
+
+        records = result.to_records()
+        self.assertEqual({r.tipo for r in records}, {"departamento"})
+        self.assertAlmostEqual(sum(r.porcentaje for r in records), 95.0)
+
+    def test_chained_to_products(self):
+        departments = self.engine.allocate_results(self.sources, self.results, 2023)
+        units = DriverMatrix.from_records("unidades", [
+            ("Produccion", "SKU-1", 3.0), ("Produccion", "SKU-2", 1.0), ("Oficinas", "SKU-2", 1.0),
+        ])
+        products = AllocationEngine.chain(departments, units)
+        got = dict(zip(products.destinos, products.tCO2e))
+        self.assertAlmostEqual(got["SKU-1"], 129.0 * 0.75)
+        self.assertAlmostEqual(got["SKU-2"], 129.0 * 0.25 + 25.0)
+        self.assertEqual(products.sin_asignar, {"F3": 10.0, "Mantenimiento": 36.0})
+        self.assertEqual([r.tipo for r in products.to_records()], ["producto", "producto"])
+
+    def test_driver_validation(self):
+        with self.assertRaises(ValueError):
+            DriverMatrix("unidades").add("A", "B", -1.0)
+        engine = AllocationEngine({"ingresos": DriverMatrix("ingresos")}, driver_por_categoria={"horno": "otro"})
+        with self.assertRaises(KeyError):
+            engine.allocate_results(self.sources, self.results, 2023)
+
+
+class TestProductFootprint(unittest.TestCase):
+    """Memoised BOM footprints with incremental updates."""
+
+    def setUp(self):
+        self.bom = BOMGraph()
+        self.bom.add_lines([
+            ("Bici", "Cuadro", 1.0), ("Bici", "Rueda", 2.0),
+            ("Patinete", "Rueda", 2.0), ("Patinete", "Tornillo", 10.0),
+            ("Rueda", "Tornillo", 4.0), ("Cuadro", "Tornillo", 6.0),
+        ])
+        for node, own in {"Bici": 5.0, "Patinete": 2.0, "Cuadro": 40.0, "Rueda": 3.0, "Tornillo": 0.1}.items():
+            self.bom.set_own(node, own)
+
+    def test_shared_components_computed_once(self):
+        got = self.bom.footprints()
+        self.assertAlmostEqual(got["Rueda"], 3.4)
+        self.assertAlmostEqual(got["Bici"], 5.0 + 40.6 + 2 * 3.4)
+        self.assertAlmostEqual(got["Patinete"], 2.0 + 2 * 3.4 + 1.0)
+        self.assertEqual(self.bom.calculados, len(self.bom))
+
+    def test_incremental_update_touches_ancestors_only(self):
+        self.bom.footprints()
+        self.bom.reset_stats()
+        self.bom.set_own("Cuadro", 30.0)
+        self.assertEqual(self.bom.ancestors("Cuadro"), {"Bici"})
+        self.assertAlmostEqual(self.bom.footprint("Bici"), 5.0 + 30.6 + 2 * 3.4)
+        self.assertAlmostEqual(self.bom.footprint("Patinete"), 9.8)
+        self.assertEqual(self.bom.calculados, 2)  # Cuadro, Bici
+
+        self.bom.reset_stats()
+        self.bom.set_own("Tornillo", 0.2)
+        self.bom.footprints()
+        self.assertEqual(self.bom.calculados, len(self.bom))
+
+    def test_cycles_and_allocation_input(self):
+        self.bom.add_component("Tornillo", "Bici", 1.0)
+        with self.assertRaises(BOMCycleError):
+            self.bom.footprint("Patinete")
+        self.bom.remove_component("Tornillo", "Bici")
+        self.assertAlmostEqual(self.bom.footprint("Patinete"), 9.8)
+
+        units = DriverMatrix.from_records("unidades", [("F1", "Rueda", 1.0)])
+        allocated = AllocationEngine({"unidades": units}).allocate_results(
+            [EmissionSource("S", "", "", Scope.SCOPE_1, "F1", "horno")],
+            [EmissionResult("S", Scope.SCOPE_1, 2.0, 2023)], 2023, tipo="producto",
+        )
+        self.bom.set_own_from_allocation(allocated, {"Rueda": 1_000})
+        self.assertAlmostEqual(self.bom.footprint("Rueda"), 2.4)
+
+
+class TestTargetTrajectories(unittest.TestCase):
+    """Portfolio target pathways (ACA, net zero, SDA)."""
+
+    def test_absolute_contraction_matches_diagnostic(self):
+        builder = TrajectoryBuilder(2020)
+        aca = builder.absolute_contraction(np.array([1_000.0, 500.0]), np.array([2023, 2020]), 42.0, 2030)
+        self.assertEqual(aca.emisiones.shape, (2, 31))
+        self.assertTrue(np.isnan(aca.emisiones[0, :3]).all())
+        hitos = DiagnosticAgent()._build_trajectory(2023, 1_000.0, 42.0, 2030)
+        for year, value in hitos.items():
+            self.assertAlmostEqual(aca.trayectoria(0)[year], value, places=6)
+        self.assertAlmostEqual(aca.en(2030)[1], 290.0)
+        self.assertEqual(aca.en(2050)[0], 0.0)  # 6 %/año continues to zero
+        np.testing.assert_allclose(aca.reduccion_pct(2030, np.array([2023, 2020])), [42.0, 42.0])
+        with self.assertRaises(ValueError):
+            aca.en(2010)   # before the first year, not a wrapped-around column
+        with self.assertRaises(ValueError):
+            aca.reduccion_pct(2030, 2019)
+
+    def test_scalar_arguments(self):
+        aca = TrajectoryBuilder(2020).absolute_contraction(1_000.0, 2020, 42.0, 2030)
+        self.assertEqual(aca.emisiones.shape, (1, 31))
+        self.assertAlmostEqual(aca.en(2030)[0], 580.0)
+
+    def test_net_zero(self):
+        nz = TrajectoryBuilder(2020).net_zero(np.array([100.0]), 2020, 50.0, 2030, 90.0, 2040)
+        t = nz.trayectoria(0)
+        self.assertAlmostEqual(t[2025], 75.0)
+        self.assertAlmostEqual(t[2030], 50.0)
+        self.assertAlmostEqual(t[2035], 30.0)
+        self.assertAlmostEqual(t[2040], 10.0)
+        self.assertAlmostEqual(t[2050], 10.0)
+        with self.assertRaises(ValueError):
+            TrajectoryBuilder(2020).net_zero(np.array([1.0]), 2020, 50.0, 2045, 90.0, 2040)
+        with self.assertRaises(ValueError):
+            TrajectoryBuilder(2015).net_zero(100.0, 2020, 50.0, 2018)
+
+    def test_sda_convergence(self):
+        builder = TrajectoryBuilder(2020, 2030)
+        sector = np.array([np.linspace(1.0, 0.2, 11)])
+        sda = builder.sda(np.array([2.0, 0.5]), np.array([10.0, 10.0]), 2020, 0, sector, 5.0)
+        np.testing.assert_allclose(sda.intensidad[:, 0], [2.0, 0.5])
+        np.testing.assert_allclose(sda.intensidad[:, -1], [0.2, 0.2])
+        self.assertAlmostEqual(sda.intensidad[0, 5], 1.8 * 0.5 + 0.2)
+        self.assertAlmostEqual(sda.emisiones[0, 5], (1.8 * 0.5 + 0.2) * 10.0 * 1.05 ** 5)
+
+        flat_sector_activity = np.full((1, 11), 100.0)
+        with_share = builder.sda(np.array([2.0]), np.array([10.0]), 2020, 0, sector, 5.0, flat_sector_activity)
+        self.assertAlmostEqual(with_share.intensidad[0, 5], 1.8 * 0.5 / 1.05 ** 5 + 0.2)
+
+
+class TestMeasureStacking(unittest.TestCase):
+    """Residual-based reductions of overlapping measures."""
+
+    def test_multiplicative_and_sequential(self):
+        e = np.array([100.0, 50.0])
+        r = np.array([[80.0, 30.0, 15.0], [10.0, 0.0, 0.0]])
+        np.testing.assert_allclose(StackingEngine().stack(e, r), [[80.0, 6.0, 2.1], [10.0, 0.0, 0.0]])
+        np.testing.assert_allclose(StackingEngine("secuencial").stack(e, r), [[80.0, 20.0, 0.0], [10.0, 0.0, 0.0]])
+        with self.assertRaises(ValueError):
+            StackingEngine("aditivo")
+
+    def test_all_orderings(self):
+        e = np.array([100.0])
+        r = np.array([[80.0, 30.0, 15.0]])
+        perms, avoided = StackingEngine().orderings(e, r)
+        self.assertEqual(perms.shape, (6, 3))
+        np.testing.assert_allclose(avoided.sum(axis=-1), 100.0 * (1 - 0.2 * 0.7 * 0.85))  # order independent
+        first_pv = perms.tolist().index([1, 0, 2])
+        np.testing.assert_allclose(avoided[first_pv, 0], [56.0, 30.0, 2.1])
+        _, seq = StackingEngine("secuencial").orderings(e, r)
+        self.assertEqual(seq.sum(axis=-1).min(), 100.0)
+        self.assertAlmostEqual(seq[perms.tolist().index([2, 1, 0]), 0, 0], 55.0)
+
+
+class TestDeploymentSimulator(unittest.TestCase):
+    """Year-by-year deployment of measures against the pathway."""
+
+    def _measure(self, mid, source_id, tCO2e, horizonte=TimeHorizon.SHORT, vida=3):
+        return ReductionMeasure(
+            mid, mid, "", ReductionLever.EFFICIENCY, Scope.SCOPE_1, source_id, tCO2e, horizonte, vida,
+        )
+
+    def test_ramp_decay_and_replacement(self):
+        medidas = [self._measure("A", "S1", 500.0)]
+        kwargs = dict(anio_final=2025, rampa_anios=2, degradacion_pct=10.0)
+        sim = DeploymentSimulator(medidas, {"S1": 1000.0, "S2": 200.0}, 2020, **kwargs)
+        result = sim.simulate([2021])
+        self.assertEqual(result.residual.shape, (1, 2, 6))
+        np.testing.assert_allclose(result.residual[0, 0], [1000, 750, 550, 595, 500, 550])
+        np.testing.assert_allclose(result.residual[0, 1], 200.0)
+        no_replace = DeploymentSimulator(medidas, {"S1": 1000.0}, 2020, reposicion=False, **kwargs)
+        np.testing.assert_allclose(no_replace.simulate([2021]).totales[0, -2:], [1000, 1000])
+        np.testing.assert_allclose(sim.simulate([NO_DESPLEGADA]).totales, 1200.0)
+
+    def test_overlapping_measures_stack_on_baseline(self):
+        medidas = [self._measure("A", "S1", 800.0, vida=30), self._measure("B", "S1", 300.0, vida=30)]
+        sim = DeploymentSimulator(medidas, {"S1": 1000.0}, 2020, anio_final=2024, rampa_anios=1, degradacion_pct=0.0)
+        self.assertAlmostEqual(sim.simulate(sim.default_plan()).trayectoria()[2022], 1000 * 0.2 * 0.7)
+        bau = np.array([[1000.0, 1000.0, 500.0, 500.0, 500.0]])
+        self.assertAlmostEqual(sim.simulate(sim.default_plan(), bau).residual[0, 0, 2], 500 * 0.2 * 0.7)
+        with self.assertRaises(ValueError):
+            sim.simulate([2020, 2021])   # before the short-term window
+
+    def test_plans_scored_against_pathway(self):
+        measures = [self._measure("A", "S1", 400.0, vida=30), self._measure("B", "S2", 200.0, TimeHorizon.MEDIUM, 30)]
+        sim = DeploymentSimulator(measures, {"S1": 1000.0, "S2": 500.0}, 2020, anio_final=2030, degradacion_pct=0.0)
+        senda = {2020: 1500.0, 2025: 1000.0, 2030: 900.0, 2040: 0.0}
+        planes = np.array([sim.default_plan(), [2022, 2025], [NO_DESPLEGADA, 2023]])
+        hitos, gap = sim.simulate(planes).brecha(senda)
+        np.testing.assert_array_equal(hitos, [2020, 2025, 2030])
+        np.testing.assert_allclose(gap[0], [0.0, -100.0, 0.0])
+        np.testing.assert_allclose(sim.score(planes, senda), [0.0, 0.0, 700.0])
+        sampled = sim.sample_plans(1000, seed=0, prob_despliegue=0.5)
+        self.assertEqual(sim.score(sampled, senda).shape, (1000,))
+        self.assertTrue(((sampled == NO_DESPLEGADA) | (sampled >= sim.ventana[:, 0])).all())
+
+
+class TestDCFEngine(unittest.TestCase):
+    """NPV, IRR and payback of measures' discounted cash flows."""
+
+    def test_npv_irr_and_payback(self):
+        engine = DCFEngine(DCFAssumptions(tasa_descuento_pct=10.0, inflacion_pct=0.0))
+        r = engine.evaluate([1000.0, 1000.0, 100.0], [300.0, 100.0, 0.0], [5, 5, 3], [10.0, 10.0, 0.0])
+        annuity = sum(1.1 ** -t for t in range(1, 6))
+        np.testing.assert_allclose(r.van_eur, [300 * annuity - 1000, 100 * annuity - 1000, -100])
+        np.testing.assert_allclose(r.macc_eur_per_tCO2e[:2], -r.van_eur[:2] / 50.0)
+        self.assertEqual(r.macc_eur_per_tCO2e[2], float("inf"))
+        self.assertAlmostEqual(r.tir_pct[0], 15.2382, places=3)
+        self.assertLess(r.tir_pct[1], 0.0)
+        self.assertTrue(np.isnan(r.tir_pct[2]))
+        self.assertAlmostEqual(r.payback_anios[0], 1000 / 300)
+        discounted = [300 * 1.1 ** -t for t in range(1, 6)]
+        self.assertAlmostEqual(r.payback_descontado_anios[0], 4 + (1000 - sum(discounted[:4])) / discounted[4])
+        self.assertEqual(r.payback_descontado_anios[1], float("inf"))
+
+    def test_escalation_and_timing(self):
+        base = DCFEngine(DCFAssumptions(tasa_descuento_pct=5.0, inflacion_pct=2.0, escalado_energia_pct=3.0))
+        flows = base.cash_flows([500.0], [100.0], [3])
+        np.testing.assert_allclose(flows[0], [-500.0, 100.0, 100 * 1.02 * 1.03, 100 * (1.02 * 1.03) ** 2])
+        early = DCFEngine(DCFAssumptions(tasa_descuento_pct=5.0, inflacion_pct=2.0,
+                                         escalado_energia_pct=3.0, momento_opex="inicio"))
+        self.assertAlmostEqual(
+            early.evaluate(500.0, 100.0, 3, 1.0).van_eur[0] + 500,
+            (base.evaluate(500.0, 100.0, 3, 1.0).van_eur[0] + 500) * 1.05,
+        )
+        irr = base.irr(flows)[0]
+        self.assertAlmostEqual(float((flows[0] * (1 + irr) ** -np.arange(4.0)).sum()), 0.0, places=6)
+        for momento, expected in (("final", 4.0), ("medio", 3.5), ("inicio", 3.0)):
+            engine = DCFEngine(DCFAssumptions(tasa_descuento_pct=0.0, inflacion_pct=0.0, momento_opex=momento))
+            r = engine.evaluate(1000.0, 250.0, 10, 1.0)
+            self.assertAlmostEqual(r.payback_anios[0], expected)
+            self.assertAlmostEqual(r.payback_descontado_anios[0], expected)
+        with self.assertRaises(ValueError):
+            DCFAssumptions(momento_opex="trimestral")
+
+
 class TestDataModels(unittest.TestCase):
 
     def test_organization(self):
@@ -211,6 +1521,84 @@ class TestDiagnosticAgent(unittest.TestCase):
         output = agent.run(diag_input, [], [])
         self.assertEqual(len(output.fuentes_prioritarias), 0)
 
+    def test_ranking_matches_full_sort(self):
+        rng = np.random.default_rng(3)
+        values = rng.integers(1, 20, 300).astype(float)  # many ties
+        sources = [EmissionSource(f"S{i}", "", "", Scope.SCOPE_1, "F1", "caldera_gas_natural")
+                   for i in range(300) if i % 7]
+        results = [EmissionResult(f"S{i}", Scope.SCOPE_1, v, 2023) for i, v in enumerate(values)]
+        results += [EmissionResult(f"X{i}", Scope.SCOPE_1, 1_000.0, 2023) for i in range(30)]  # no source
+        summary = EmissionsEngine.summarize(results, 2023)
+        output = DiagnosticAgent().run(DiagnosticInput(anio_base=2023, summary=summary), sources, results)
+
+        known = {s.id for s in sources}
+        ranked = sorted(((r.source_id, r.tCO2e) for r in results if r.source_id in known),
+                        key=lambda x: x[1], reverse=True)
+        self.assertEqual([(p.source.id, p.tCO2e) for p in output.fuentes_prioritarias], ranked[:5])
+
+
+class TestCategoryClassifier(unittest.TestCase):
+    """Per-attribute keyword precedence, matched once per category."""
+
+    def test_profiles(self):
+        gas = classify("Gas_Refrigerante")
+        self.assertEqual((gas.familia, gas.horizonte, gas.potencial_pct, gas.viabilidad, gas.regla),
+                         ("termico", TimeHorizon.LONG, 0.60, "baja", "gas_natural"))
+        red = classify("red_vapor")
+        self.assertEqual((red.familia, red.regla), ("otros", "electricidad"))
+        self.assertEqual(classify("iluminacion_led").horizonte, TimeHorizon.SHORT)
+        fleet = classify("transporte_flota")
+        self.assertEqual((fleet.potencial_pct, fleet.viabilidad, fleet.regla), (0.50, "media", "transporte"))
+        self.assertEqual(classify("equipo_refrigeracion").familia, "refrigerante")
+        self.assertEqual(classify("otros").regla, None)
+
+    def test_cached_per_distinct_category(self):
+        classifier = CategoryClassifier()
+        profiles = [classifier.classify(c) for c in ["caldera", "grid", "caldera"] * 1_000]
+        self.assertEqual(len(classifier), 2)
+        self.assertIs(profiles[0], profiles[2])
+        self.assertEqual(classifier.keywords("caldera_gas_natural"), {"caldera", "gas"})
+
+    def test_overlapping_keywords_and_bau_drivers(self):
+        self.assertEqual(CategoryClassifier().keywords("refrigeracion_fugitivas"),
+                         {"refrigera", "refrigeracion", "fugitiva", "fugitivas"})
+        self.assertEqual(classify("refrigerante").drivers_bau, ("constante", "ninguna"))
+        self.assertEqual(classify("refrigerante").familia, "otros")
+        self.assertEqual(classify("viajes_negocio").drivers_bau, ("plantilla", "ninguna"))
+        self.assertEqual(classify("diesel").drivers_bau, ("produccion", "combustible"))
+
+
+class TestPortfolioRunner(unittest.TestCase):
+    """Batch diagnostics over a process pool."""
+
+    def _bundles(self, n):
+        bundles = []
+        for i in range(n):
+            sources = [EmissionSource(f"S{j}", f"Fuente {j}", "", Scope.SCOPE_1, "F1", "caldera_gas_natural")
+                       for j in range(4)]
+            results = [EmissionResult(f"S{j}", Scope.SCOPE_1, float((i + 1) * (j + 1)), 2023) for j in range(4)]
+            summary = EmissionsEngine.summarize(results, 2023)
+            bundles.append((DiagnosticInput(anio_base=2023, summary=summary), sources, results))
+        return bundles
+
+    def test_pool_matches_serial_and_isolates_failures(self):
+        bundles = self._bundles(7)
+        bundles[3] = (DiagnosticInput(anio_base=2023, summary=None), [], [])
+        nombres = [f"Org{i}" for i in range(7)]
+        report = PortfolioRunner(max_workers=2, chunk_size=2).run(bundles, nombres)
+
+        self.assertEqual([r.organizacion for r in report.resultados], nombres)
+        self.assertEqual([r.organizacion for r in report.fallos], ["Org3"])
+        self.assertIn("AttributeError", report.fallos[0].error)
+        serial = PortfolioRunner(max_workers=1).run(bundles, nombres)
+        for pooled, single in zip(report.outputs, serial.outputs):
+            self.assertEqual(pooled, single)
+        self.assertEqual(report.outputs[6].fuentes_prioritarias[0].tCO2e, 28.0)
+
+    def test_names_must_match(self):
+        with self.assertRaises(ValueError):
+            PortfolioRunner(max_workers=1).run(self._bundles(2), ["A"])
+
 
 # ======================================================================
 # Phase 3 — Pathway Agent Tests
@@ -267,6 +1655,52 @@ class TestPathwayAgent(unittest.TestCase):
             )
 
 
+class TestMeasureCatalog(unittest.TestCase):
+    """Declarative measure templates compiled into a dispatch table."""
+
+    def setUp(self):
+        def t(regla, prioridad, fraccion, **cond):
+            return MeasureTemplate(regla, prioridad, ReductionLever.EFFICIENCY, f"{regla}-{prioridad}", fraccion,
+                                   TimeHorizon.SHORT, **cond)
+        self.catalog = MeasureCatalog([
+            t("electricidad", 2, 0.30),
+            t("electricidad", 1, 0.80),
+            t("electricidad", 3, 0.25, paises=frozenset({"ES"}), sectores=frozenset({"Cemento"})),
+            t("gas_natural", 1, 0.20, scopes=frozenset({1})),
+            t("generica", 1, 0.15),
+        ])
+
+    def test_dispatch_and_vectorised_expansion(self):
+        cat = self.catalog
+        blocks = np.array([
+            cat.block("electricidad"),
+            cat.block("electricidad", "Cemento", "ES"),
+            cat.block("gas_natural", scope=2),
+            cat.block(None),
+            cat.block("electricidad"),
+        ])
+        self.assertEqual(blocks[0], blocks[4])
+        self.assertEqual([x.medida for x in cat.templates(blocks[1])],
+                         ["electricidad-1", "electricidad-2", "electricidad-3"])
+        table = cat.expand(blocks, np.array([100.0, 10.0, 50.0, 7.0, 1.0]))
+        self.assertEqual(table.fila.tolist(), [0, 0, 1, 1, 1, 3, 4, 4])
+        np.testing.assert_allclose(table.reduccion_tCO2e, [80.0, 30.0, 8.0, 3.0, 2.5, 1.1, 0.8, 0.3])
+
+    def test_rounding_matches_python(self):
+        values = np.round(np.random.default_rng(0).uniform(0, 1e4, 20_000), 1) * 0.5
+        self.assertEqual(_round_tenths(values).tolist(), [round(v, 1) for v in values.tolist()])
+
+    def test_pathway_agent_uses_catalog(self):
+        src = EmissionSource("S1", "Red", "", Scope.SCOPE_2, "F1", "electricidad_comprada")
+        ps = PrioritySource(src, 100.0, 100.0, Scope.SCOPE_2)
+        diagnostic = DiagnosticOutput(fuentes_prioritarias=[ps], objetivo_preliminar_reduccion_pct=42.0,
+                                      trayectoria_hitos={2023: 100.0})
+        output = PathwayAgent(self.catalog).run(diagnostic, sector="Cemento", pais="ES")
+        self.assertEqual([m.id for m in output.medidas], ["M-001", "M-002", "M-003"])
+        self.assertEqual(output.medidas[2].reduccion_estimada_tCO2e, 25.0)
+        self.assertEqual(len(PathwayAgent(self.catalog).run(diagnostic).medidas), 2)
+
+
 # ======================================================================
 # Phase 4 — Financial Agent / MACC Tests
 # ======================================================================
@@ -352,6 +1786,55 @@ class TestFinancialAgent(unittest.TestCase):
         expected_capex = sum(e.capex_eur for e in economics)
         self.assertAlmostEqual(output.inversion_total_eur, expected_capex, places=0)
 
+    def test_dcf_mode_adds_discounted_curve(self):
+        pathway = self._run_full_pipeline()
+        economics = [MeasureEconomics(m.id, 100_000, 20_000) for m in pathway.medidas]
+        plain = FinancialAgent().run(pathway, economics)
+        self.assertEqual(plain.curva_macc_descontada, [])
+        self.assertIsNone(plain.ranking[0].van_eur)
+
+        output = FinancialAgent(dcf=DCFEngine(DCFAssumptions(tasa_descuento_pct=8.0, inflacion_pct=0.0))).run(
+            pathway, economics,
+        )
+        self.assertEqual([e.macc_eur_per_tCO2e for e in output.ranking], [e.macc_eur_per_tCO2e for e in plain.ranking])
+        for entry in output.ranking:
+            annuity = sum(1.08 ** -t for t in range(1, entry.vida_util_anios + 1))
+            self.assertAlmostEqual(entry.van_eur, 20_000 * annuity - 100_000, places=1)
+            # discounting shrinks the savings, so the abatement cost rises
+            self.assertGreater(entry.macc_descontado_eur_per_tCO2e, entry.macc_eur_per_tCO2e)
+            self.assertGreater(entry.payback_descontado_anios, 5.0)
+        y = [bar["y"] for bar in output.curva_macc_descontada]
+        self.assertEqual(y, sorted(y))
+        self.assertEqual(output.curva_macc_descontada[-1]["x_end"], output.curva_macc[-1]["x_end"])
+        self.assertIn("VAN total", output.resumen)
+
+    def test_stacking_avoids_double_counting(self):
+        pathway = self._run_full_pipeline()
+        self.assertEqual(pathway.emisiones_fuente, {"S1": 1000.0})
+        economics = [MeasureEconomics(m.id, 100_000, 0) for m in pathway.medidas]
+        additive = FinancialAgent(apilar=False).run(pathway, economics)
+        stacked = FinancialAgent().run(pathway, economics)
+        annual = sum(e.tCO2e_evitadas_anuales for e in stacked.ranking)
+        self.assertAlmostEqual(annual, 1000.0 * (1 - 0.2 * 0.7 * 0.85), places=1)
+        self.assertLess(stacked.reduccion_total_tCO2e, additive.reduccion_total_tCO2e)
+        # PPA has the lowest standalone MACC, so it keeps its full reduction
+        by_id = {e.measure_id: e for e in stacked.ranking}
+        self.assertEqual(by_id["M-001"].tCO2e_evitadas_anuales, 800.0)
+        self.assertEqual(by_id["M-002"].tCO2e_evitadas_anuales, 60.0)
+        macc = [e.macc_eur_per_tCO2e for e in stacked.ranking]
+        self.assertEqual(macc, sorted(macc))
+
+    def test_default_agent_stacks_measures(self):
+        pathway = self._run_full_pipeline()
+        economics = [MeasureEconomics(m.id, 100_000, 0) for m in pathway.medidas]
+        default = FinancialAgent().run(pathway, economics)
+        explicit = FinancialAgent(StackingEngine("multiplicativo")).run(pathway, economics)
+        standalone = sum(m.reduccion_estimada_tCO2e for m in pathway.medidas)
+        annual = sum(e.tCO2e_evitadas_anuales for e in default.ranking)
+        self.assertLessEqual(annual, pathway.emisiones_fuente["S1"])
+        self.assertLess(annual, standalone)
+        self.assertEqual(default.reduccion_total_tCO2e, explicit.reduccion_total_tCO2e)
+
     def test_net_cost_formula(self):
         """Coste_Neto = CAPEX - (Ahorro_Operativo_Anual * Vida_Util)"""
         # CAPEX=200k, Savings=30k/yr, Life=10yr → Net = 200k - 300k = -100k (net savings)
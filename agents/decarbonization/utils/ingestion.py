@@ -0,0 +1,184 @@
+"""
+Streaming Inventory Ingestion
+=============================
+Generator-based pipeline that reads activity rows lazily from CSV / JSONL
+files of any size, resolves emission factors, calculates emissions chunk by
+chunk with the columnar engine and folds each chunk into a
+``RunningSummary``. Memory is bounded by ``chunk_size`` plus the number of
+distinct (año, scope, método, instalación) keys — no ``EmissionResult`` is
+kept.
+
+Expected row fields: ``source_id``, ``cantidad``, ``unidad``, ``anio``.
+Procurement ledgers for spend-based Scope 3 (``stream_spend``) use
+``proveedor``, ``commodity``, ``moneda``, ``importe`` and optionally
+``categoria``.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+
+import numpy as np
+
+from ..models.aggregation import RunningSummary
+from ..models.factor_registry import GLOBAL, FactorRegistry
+from ..models.inventory import EmissionSource, EmissionsEngine, Facility, Scope2Method
+from ..models.spend import SpendEngine, SpendReport
+
+
+def iter_activity_rows(path: str | Path) -> Iterator[dict]:
+    """Yield activity rows one at a time from a ``.csv`` or ``.jsonl`` file."""
+    path = Path(path)
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(fh)
+
+
+def iter_chunks(rows: Iterable[dict], chunk_size: int) -> Iterator[list[dict]]:
+    """Group an iterable of rows into lists of at most ``chunk_size``."""
+    it = iter(rows)
+    while chunk := list(islice(it, chunk_size)):
+        yield chunk
+
+
+@dataclass
+class StreamingReport:
+    """Outcome of a streaming ingestion run."""
+    resumen: RunningSummary
+    filas_leidas: int = 0
+    filas_sin_fuente: int = 0
+    filas_sin_factor: int = 0
+    filas_invalidas: int = 0   # blank or malformed cantidad / anio / unidad
+    unidades_incompatibles: dict[tuple[str, str], int] = field(default_factory=dict)
+
+
+class _ResolvedFactor(NamedTuple):
+    factor: float   # per unit of the row, conversion into the factor unit included
+    gwp: float
+
+
+class _UnitMismatch(NamedTuple):
+    par: tuple[str, str]   # (row unit, a factor unit of the category)
+
+
+_Lookup = Union[_ResolvedFactor, _UnitMismatch, None]   # None: no factor for the country and year
+
+
+def stream_inventory(
+    paths: Iterable[str | Path],
+    sources: Iterable[EmissionSource],
+    facilities: Iterable[Facility],
+    registry: FactorRegistry,
+    engine: EmissionsEngine,
+    categorias: Optional[dict[str, str]] = None,
+    scope2_method: Optional[Scope2Method] = Scope2Method.LOCATION_BASED,
+    chunk_size: int = 100_000,
+) -> StreamingReport:
+    """Calculate and summarise the activity rows in ``paths`` chunk by chunk.
+
+    Factors are resolved in the row's unit or any unit it converts to.
+    Rows whose source is unknown, with a blank or malformed field, with no
+    factor for their category in their country and year, or whose unit
+    cannot be converted into any factor unit available there are skipped
+    and counted in the returned report.
+    """
+    categorias = categorias or {}
+    sources = list(sources)
+    pais_map = {f.id: f.pais for f in facilities}
+    facility_ids = sorted({s.facility_id for s in sources}) or [""]
+    facility_pos = {fid: i for i, fid in enumerate(facility_ids)}
+
+    source_pos = {s.id: i for i, s in enumerate(sources)}
+    src_scope = np.array([s.scope.value for s in sources], dtype=np.int8)
+    src_facility = np.array([facility_pos[s.facility_id] for s in sources], dtype=np.int64)
+    src_ids = [s.id for s in sources]
+
+    units = engine.units
+    report = StreamingReport(resumen=RunningSummary())
+    resolved: dict[tuple[int, str, int], _Lookup] = {}   # (source position, unidad, anio) -> lookup
+
+    def lookup(pos: int, unidad: str, anio: int) -> _Lookup:
+        key = (pos, unidad, anio)
+        if key not in resolved:
+            src = sources[pos]
+            categoria = categorias.get(src.categoria, src.categoria)
+            pais = pais_map.get(src.facility_id, GLOBAL)
+            ef = registry.resolve_convertible(categoria, unidad, pais, anio, units)
+            if ef is not None:
+                resolved[key] = _ResolvedFactor(ef.factor * units.factor(unidad, ef.unidad_actividad), ef.gwp)
+            else:
+                # A mismatch only if this geography and year have factors, all in other units
+                candidates = [u for u in registry.unidades(categoria) if registry.resolve(categoria, u, pais, anio)]
+                resolved[key] = _UnitMismatch((unidad.strip(), candidates[0])) if candidates else None
+        return resolved[key]
+
+    rows = (row for path in paths for row in iter_activity_rows(path))
+    for chunk in iter_chunks(rows, chunk_size):
+        report.filas_leidas += len(chunk)
+        pos_col, qty, ef_col, gwp_col, year_col = [], [], [], [], []
+        for row in chunk:
+            pos = source_pos.get(row.get("source_id"))
+            if pos is None:
+                report.filas_sin_fuente += 1
+                continue
+            try:
+                anio = int(row["anio"])
+                cantidad = float(row["cantidad"])
+                unidad = str(row["unidad"])
+            except (KeyError, TypeError, ValueError):
+                report.filas_invalidas += 1
+                continue
+            hit = lookup(pos, unidad, anio)
+            if hit is None:
+                report.filas_sin_factor += 1
+                continue
+            if isinstance(hit, _UnitMismatch):
+                report.unidades_incompatibles[hit.par] = report.unidades_incompatibles.get(hit.par, 0) + 1
+                continue
+            pos_col.append(pos)
+            qty.append(cantidad)
+            ef_col.append(hit.factor)
+            gwp_col.append(hit.gwp)
+            year_col.append(anio)
+        if not pos_col:
+            continue
+
+        pos_arr = np.array(pos_col, dtype=np.int64)
+        table = engine.calculate_batch(
+            np.array(qty),
+            np.array(ef_col),
+            np.array(gwp_col),
+            src_scope[pos_arr],
+            np.array(year_col),
+            pos_arr,
+            scope2_method=scope2_method,
+            source_ids=src_ids,
+        )
+        report.resumen.add_table(table, src_facility[pos_arr], facility_ids)
+
+    return report
+
+
+def stream_spend(
+    paths: Iterable[str | Path],
+    engine: SpendEngine,
+    chunk_size: int = 100_000,
+) -> SpendReport:
+    """Run procurement ledger files through ``engine`` chunk by chunk.
+
+    Only one chunk of lines is held in memory; the engine accumulates a
+    ``categorías × sectores`` spend matrix between chunks.
+    """
+    rows = (row for path in paths for row in iter_activity_rows(path))
+    for chunk in iter_chunks(rows, chunk_size):
+        engine.add_lines(chunk)
+    return engine.finish()
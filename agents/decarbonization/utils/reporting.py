@@ -15,6 +15,8 @@ from typing import Any
 from ..agents.financial_agent import FinancialOutput, MACCEntry
 from ..agents.diagnostic_agent import DiagnosticOutput
 from ..agents.pathway_agent import PathwayOutput
+from ..models.aggregation import EmissionCube
+from ..models.batch import SCOPE2_METHOD_BY_CODE
 from ..models.inventory import EmissionSummary, Organization
 
 
@@ -26,7 +28,7 @@ def export_executive_summary(
     target_pct: float,
 ) -> dict[str, Any]:
     """Generate a structured executive summary as a dictionary."""
-    return {
+    data = {
         "organizacion": org.nombre,
         "pais": org.pais,
         "sector": org.sector,
@@ -51,6 +53,11 @@ def export_executive_summary(
         },
         "roadmap": financial.roadmap,
     }
+    if summary.scope_3_por_categoria:
+        data["emisiones"]["scope_3_por_categoria"] = {
+            str(categoria): round(tCO2e, 1) for categoria, tCO2e in sorted(summary.scope_3_por_categoria.items())
+        }
+    return data
 
 
 def export_summary_json(
@@ -110,6 +117,24 @@ def export_inventory_csv(
     return output.getvalue()
 
 
+def export_cube_csv(cube: EmissionCube) -> str:
+    """Export aggregation cube cells as CSV (one row per cell)."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["anio", "scope", "scope2_method", "facility_id", "categoria", "tCO2e"])
+    for (anio, scope, method, facility, categoria), value in sorted(cube.celdas.items()):
+        scope2_method = SCOPE2_METHOD_BY_CODE[method]
+        writer.writerow([
+            anio,
+            f"Scope {scope}",
+            scope2_method.value if scope2_method else "",
+            facility,
+            categoria,
+            round(value, 2),
+        ])
+    return output.getvalue()
+
+
 def export_trajectory_csv(trajectory: dict[int, float]) -> str:
     """Export decarbonisation trajectory as CSV."""
     output = io.StringIO()